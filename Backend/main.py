@@ -3,28 +3,135 @@ Backend API for InvestLink
 Handles user registration, authentication, and recommendations
 """
 
+import os
 import sys
+import time
+import asyncio
 import sqlite3
-import hashlib
-import secrets
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from contextlib import contextmanager
+from typing import Dict, List, Optional
+from contextlib import asynccontextmanager, contextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 
 # Paths
 ROOT = Path(__file__).resolve().parent.parent
-DB_PATH = ROOT / "Data" / "invest.sqlite"
+DB_PATH = Path(os.environ.get("INVESTLINK_DB", ROOT / "Data" / "invest.sqlite"))
 
 # Add Scripts folder to path for importing recommendation engine
 sys.path.insert(0, str(ROOT / "Scripts"))
-from Model_Reccomendation import RecommendationEngine
 
-# Initialize recommendation engine (lazy loaded)
-recommendation_engine = RecommendationEngine()
+from Cursor_Store import CursorError  # stdlib only, unlike the engine itself
+from Sqlite_Pool import POOL_MAX_READERS, ConnectionPool
+from Bounded_Executor import BoundedExecutor, ExecutorFull
+from Password_Hashing import hash_password, needs_upgrade, verify_password
+from Make_Database import install_search_index
+import Search_Index
 
-app = FastAPI(title="InvestLink API", version="1.0.0")
+# Pooled, tuned SQLite connections (INVESTLINK_DB_POOL=0: a fresh connection per request)
+DB_POOL = os.environ.get("INVESTLINK_DB_POOL", "1") != "0"
+DB_READERS = int(os.environ.get("INVESTLINK_DB_READERS", POOL_MAX_READERS))
+
+# Recommendation scoring runs on its own bounded executor, so it can't take the
+# threads cheap endpoints need; requests beyond workers + queue get a 503
+RECOMMEND_WORKERS = int(os.environ.get("INVESTLINK_RECOMMEND_WORKERS", "2"))
+RECOMMEND_QUEUE = int(os.environ.get("INVESTLINK_RECOMMEND_QUEUE", "64"))
+
+# PBKDF2 for login/registration runs in a process pool of this size; logins
+# beyond workers + queue get a 503 (INVESTLINK_KDF_WORKERS=0: hash in a request thread)
+KDF_WORKERS = int(os.environ.get("INVESTLINK_KDF_WORKERS", min(2, os.cpu_count() or 1)))
+KDF_QUEUE = int(os.environ.get("INVESTLINK_KDF_QUEUE", "32"))
+
+# Profile search over the FTS5 indexes, created at startup if the database
+# predates them (INVESTLINK_SEARCH_FTS=0: the old LIKE '%q%' scan)
+SEARCH_FTS = os.environ.get("INVESTLINK_SEARCH_FTS", "1") != "0"
+
+# Load the recommendation engine in a background thread at startup
+# (INVESTLINK_WARMUP=0 defers it to the first recommendation request)
+WARMUP = os.environ.get("INVESTLINK_WARMUP", "1") != "0"
+
+
+# --- Recommendation engine (lazy) ---
+# Model_Reccomendation pulls in torch; it is imported on first use so the API
+# serves /health immediately. Progress is reported by /ready.
+
+_engine = None
+_engine_lock = threading.Lock()
+_engine_import = {"state": "pending", "seconds": None, "error": None}
+
+
+def get_engine():
+    """Import and create the recommendation engine on first use (not loaded yet)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine_import.update(state="loading", error=None)
+                start = time.perf_counter()
+                try:
+                    from Model_Reccomendation import ENGINE_SNAPSHOT, RecommendationEngine
+                except Exception as e:
+                    _engine_import.update(state="failed", seconds=round(time.perf_counter() - start, 3), error=str(e))
+                    raise
+                _engine_import.update(state="ready", seconds=round(time.perf_counter() - start, 3))
+                # Workers map one shared snapshot of the engine arrays (INVESTLINK_SNAPSHOT=0: off)
+                _engine = RecommendationEngine(db_path=DB_PATH, snapshot_path=ENGINE_SNAPSHOT)
+    return _engine
+
+
+def notify_interaction(side: str, requester_id: int, candidate_id: int, interacted: bool):
+    """Keep a loaded engine's interactions, cached results and swipe queue in sync (no-op before load)"""
+    if _engine is not None:
+        _engine.record_interaction(side, requester_id, candidate_id, interacted)
+
+
+def notify_profile_change(side: str, requester_id: int):
+    """Drop the requester's cached recommendations and swipe queue, if the engine exists"""
+    if _engine is not None:
+        _engine.invalidate(side, requester_id)
+
+
+def recommendation_page(side: str, requester_id: int, num: int, cursor: Optional[str], reciprocal: bool):
+    """Engine page for the recommendation endpoints; runs on the recommendation executor (may import/load the engine)"""
+    return get_engine().recommendation_page(side, requester_id, num_recommendations=num, cursor=cursor, reciprocal=reciprocal)
+
+
+def warm_up_engine():
+    """Import and load the engine; failures are reported by /ready"""
+    try:
+        get_engine().load()
+    except Exception as e:
+        print(f"Recommendation engine warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _search
+    if WARMUP:
+        threading.Thread(target=warm_up_engine, name="engine-warmup", daemon=True).start()
+    if SEARCH_FTS:
+        try:
+            if await run_db(install_search_index, write=True):
+                print("Search indexes built")
+        except Exception as e:
+            print(f"Search index unavailable, using LIKE search: {e}")
+            _search = Search_Index.search_like
+    if _kdf_executor is not None:
+        # Start the hashing processes now rather than on the first login
+        for _ in range(KDF_WORKERS):
+            _kdf_executor.executor.submit(needs_upgrade, "")
+    yield
+    if _kdf_executor is not None:
+        _kdf_executor.executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="InvestLink API", version="1.0.0", lifespan=lifespan)
 
 # CORS - allow frontend to communicate with backend
 app.add_middleware(
@@ -132,9 +239,16 @@ class SearchResult(BaseModel):
 
 # --- Database helpers ---
 
+_db_pool = ConnectionPool(DB_PATH, max_readers=DB_READERS)  # connects lazily (after any worker fork)
+
+
 @contextmanager
-def get_db():
-    """Context manager for database connections"""
+def get_db(write: bool = False):
+    """Context manager for database connections (write=True: the pool's writer connection)"""
+    if DB_POOL:
+        with (_db_pool.writer() if write else _db_pool.reader()) as conn:
+            yield conn
+        return
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     try:
@@ -143,33 +257,100 @@ def get_db():
         conn.close()
 
 
-def hash_password(password: str) -> str:
-    """Hash password with salt for secure storage"""
-    salt = secrets.token_hex(16)
-    hashed = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    )
-    return f"{salt}${hashed.hex()}"
-
-
-def verify_password(password: str, stored_hash: str) -> bool:
-    """Verify a password against a stored hash"""
-    # Check if this is a hashed password (contains $)
-    if '$' in stored_hash:
-        salt, hash_value = stored_hash.split('$', 1)
-        hashed = hashlib.pbkdf2_hmac(
-            'sha256',
-            password.encode('utf-8'),
-            salt.encode('utf-8'),
-            100000
+# Database calls from async endpoints run on their own threads (one per pooled
+# connection + the writer), never on the event loop or Starlette's threadpool
+_db_executor = BoundedExecutor(
+    ThreadPoolExecutor(DB_READERS + 1, thread_name_prefix="db"), DB_READERS + 1, name="database"
+)
+_recommend_executor = BoundedExecutor(
+    ThreadPoolExecutor(RECOMMEND_WORKERS, thread_name_prefix="recommend"),
+    RECOMMEND_WORKERS, RECOMMEND_QUEUE, name="recommendation",
+)
+
+
+async def run_db(fn, *args, write: bool = False):
+    """Await fn(conn, *args) on a pooled connection (write=True: the writer connection)"""
+    def call():
+        with get_db(write=write) as conn:
+            return fn(conn, *args)
+    return await _db_executor.run(call)
+
+
+async def db_fetchone(sql: str, params: tuple = ()):
+    return await run_db(lambda conn: conn.execute(sql, params).fetchone())
+
+
+async def db_fetchall(sql: str, params: tuple = ()) -> list:
+    return await run_db(lambda conn: conn.execute(sql, params).fetchall())
+
+
+_search = Search_Index.search if SEARCH_FTS else Search_Index.search_like
+
+
+# Spawned (not forked) workers: the parent may already hold engine threads and torch
+# state. Like any spawn pool, scripts that import this module need a __main__ guard.
+_kdf_executor = BoundedExecutor(
+    ProcessPoolExecutor(KDF_WORKERS, mp_context=multiprocessing.get_context("spawn")),
+    KDF_WORKERS, KDF_QUEUE, name="password hashing",
+) if KDF_WORKERS > 0 else None
+_password_upgrades = set()  # (login table, id) being upgraded
+_background_tasks = set()   # strong references until the tasks finish
+
+
+async def kdf(fn, *args):
+    """Await a Password_Hashing function on the hashing pool (raises ExecutorFull when it is saturated)"""
+    if _kdf_executor is None:
+        return await run_in_threadpool(fn, *args)
+    return await _kdf_executor.run(fn, *args)
+
+
+async def upgrade_password(table: str, key: str, column: str, account_id: int, password: str, plaintext: str):
+    """Replace a legacy plaintext password with its hash, unless the row changed meanwhile"""
+    def store(conn: sqlite3.Connection, hashed: str):
+        conn.execute(
+            f"UPDATE {table} SET {column} = ? WHERE {key} = ? AND {column} = ?",
+            (hashed, account_id, plaintext)
         )
-        return hashed.hex() == hash_value
-    else:
-        # Plain text password (for existing demo data)
-        return password == stored_hash
+        conn.commit()
+    
+    try:
+        await run_db(store, await kdf(hash_password, password), write=True)
+    except ExecutorFull:
+        pass  # busy: retried on the next login
+    except Exception as e:
+        print(f"Password upgrade failed for {table} {account_id}: {e}")
+    finally:
+        _password_upgrades.discard((table, account_id))
+
+
+def schedule_password_upgrade(table: str, key: str, column: str, account_id: int, password: str, stored: str):
+    """Hash a plaintext password in the background after a successful login"""
+    if not needs_upgrade(stored) or (table, account_id) in _password_upgrades:
+        return
+    _password_upgrades.add((table, account_id))
+    task = asyncio.get_running_loop().create_task(upgrade_password(table, key, column, account_id, password, stored))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+# Display fields for recommendation cards (one batched query per page)
+COMPANY_CARD_COLUMNS = "C_desc, C_place, C_funding_stage, C_industry, C_fund_size, C_link, C_img"
+INVESTOR_CARD_COLUMNS = (
+    "U_invest_requirements, U_places, U_fund_stage, U_industry, "
+    "U_check_size_min, U_check_size_max, U_website, U_pic_link"
+)
+FETCH_CHUNK = 500  # ids per IN (...) query, below SQLite's bound-parameter limit
+
+
+def fetch_rows_by_id(conn: sqlite3.Connection, table: str, key: str, columns: str, ids: List[int]) -> Dict[int, tuple]:
+    """{id: (columns...)} for every id that exists, in one IN (...) query per FETCH_CHUNK ids"""
+    rows = {}
+    for start in range(0, len(ids), FETCH_CHUNK):
+        chunk = ids[start:start + FETCH_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(f"SELECT {key}, {columns} FROM {table} WHERE {key} IN ({placeholders})", chunk):
+            rows[row[0]] = tuple(row)[1:]
+    return rows
 
 
 def get_next_user_id(conn: sqlite3.Connection) -> int:
@@ -212,18 +393,61 @@ def root():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Check if database is accessible"""
     try:
-        with get_db() as conn:
-            conn.execute("SELECT 1")
+        await db_fetchone("SELECT 1")
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness of each component: database, engine import, profiles,
+    embeddings, ANN index and models. 503 until recommendations can be served.
+    """
+    start = time.perf_counter()
+    try:
+        await db_fetchone("SELECT 1")
+        db = {"state": "ready", "seconds": round(time.perf_counter() - start, 3), "error": None}
+    except Exception as e:
+        db = {"state": "failed", "seconds": None, "error": str(e)}
+    
+    components = {"database": db, "engine_import": dict(_engine_import)}
+    engine_ready = False
+    if _engine is not None:
+        status = _engine.readiness()
+        components.update(status["components"])
+        engine_ready = status["ready"]
+    
+    ready = engine_ready and db["state"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "components": components},
+    )
+
+
+# Keys of RecommendationEngine.stats(), reported as null until the engine has loaded
+ENGINE_METRICS = ("results", "queues", "encoder_batching", "locks")
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Serving metrics (executors incl. password hashing, database pool, result cache, swipe queues, encoder batching, engine lock)"""
+    executors = {
+        "recommendation": _recommend_executor.stats(),
+        "database": _db_executor.stats(),
+        "password_hashing": _kdf_executor.stats() if _kdf_executor else None,
+    }
+    database = _db_pool.stats() if DB_POOL else None
+    engine = _engine.stats() if _engine is not None else dict.fromkeys(ENGINE_METRICS)
+    return {"executors": executors, "database": database, **engine}
+
+
 @app.post("/api/register/investor", response_model=RegistrationResponse)
-def register_investor(data: InvestorRegistration):
+async def register_investor(data: InvestorRegistration):
     """
     Register a new investor:
     1. Generate unique user_id
@@ -231,64 +455,73 @@ def register_investor(data: InvestorRegistration):
     3. Insert into user_info (id, profile data)
     """
     
-    try:
-        with get_db() as conn:
-            # Check if email already exists
-            if email_exists(conn, data.email):
-                raise HTTPException(
-                    status_code=400,
-                    detail="An account with this email already exists"
-                )
-            
-            # Get next user ID
-            user_id = get_next_user_id(conn)
-            
-            # Hash the password
-            hashed_password = hash_password(data.password)
-            
-            # Format list fields as comma-separated strings (matching CSV format)
-            places = ", ".join(data.countries)
-            fund_stages = ", ".join(data.fundStages)
-            industries = ", ".join(data.industries)
-            
-            # Insert into user_login
-            conn.execute(
-                """INSERT INTO user_login (user_id, user_email, user_password)
-                   VALUES (?, ?, ?)""",
-                (user_id, data.email, hashed_password)
+    def check_email(conn: sqlite3.Connection):
+        # Check if email already exists
+        if email_exists(conn, data.email):
+            raise HTTPException(
+                status_code=400,
+                detail="An account with this email already exists"
             )
-            
-            # Insert into user_info
-            conn.execute(
-                """INSERT INTO user_info 
-                   (user_id, U_name, U_invest_requirements, U_places, 
-                    U_fund_stage, U_industry, U_check_size_max, 
-                    U_check_size_min, U_website, U_pic_link)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    user_id,
-                    data.fullName,
-                    data.investRequirements,
-                    places,
-                    fund_stages,
-                    industries,
-                    data.checkSizeMax,
-                    data.checkSizeMin,
-                    data.website,
-                    data.profilePic
-                )
-            )
-            
-            conn.commit()
-            
-            return RegistrationResponse(
-                success=True,
-                message="Investor registered successfully!",
-                user_id=user_id
+    
+    def register(conn: sqlite3.Connection, hashed_password: str):
+        # Re-check on the writer: another registration may have taken the email while hashing
+        check_email(conn)
+        
+        # Get next user ID
+        user_id = get_next_user_id(conn)
+        
+        # Format list fields as comma-separated strings (matching CSV format)
+        places = ", ".join(data.countries)
+        fund_stages = ", ".join(data.fundStages)
+        industries = ", ".join(data.industries)
+        
+        # Insert into user_login
+        conn.execute(
+            """INSERT INTO user_login (user_id, user_email, user_password)
+               VALUES (?, ?, ?)""",
+            (user_id, data.email, hashed_password)
+        )
+        
+        # Insert into user_info
+        conn.execute(
+            """INSERT INTO user_info 
+               (user_id, U_name, U_invest_requirements, U_places, 
+                U_fund_stage, U_industry, U_check_size_max, 
+                U_check_size_min, U_website, U_pic_link)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                user_id,
+                data.fullName,
+                data.investRequirements,
+                places,
+                fund_stages,
+                industries,
+                data.checkSizeMax,
+                data.checkSizeMin,
+                data.website,
+                data.profilePic
             )
-            
+        )
+        
+        conn.commit()
+        
+        return RegistrationResponse(
+            success=True,
+            message="Investor registered successfully!",
+            user_id=user_id
+        )
+    
+    try:
+        # Reject a taken email before paying for the hash, then hash the
+        # password (hashing pool) and insert on the writer connection
+        await run_db(check_email)
+        hashed_password = await kdf(hash_password, data.password)
+        return await run_db(register, hashed_password, write=True)
+        
     except HTTPException:
         raise
+    except ExecutorFull:
+        raise HTTPException(status_code=503, detail="Too many sign-ins right now, retry shortly", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -297,7 +530,7 @@ def register_investor(data: InvestorRegistration):
 
 
 @app.post("/api/register/company", response_model=RegistrationResponse)
-def register_company(data: CompanyRegistration):
+async def register_company(data: CompanyRegistration):
     """
     Register a new company/startup:
     1. Generate unique company_id
@@ -305,57 +538,66 @@ def register_company(data: CompanyRegistration):
     3. Insert into company_info (id, profile data)
     """
     
-    try:
-        with get_db() as conn:
-            # Check if email already exists
-            if company_email_exists(conn, data.email):
-                raise HTTPException(
-                    status_code=400,
-                    detail="An account with this email already exists"
-                )
-            
-            # Get next company ID
-            company_id = get_next_company_id(conn)
-            
-            # Hash the password
-            hashed_password = hash_password(data.password)
-            
-            # Insert into company_login
-            conn.execute(
-                """INSERT INTO company_login (company_id, company_email, company_password)
-                   VALUES (?, ?, ?)""",
-                (company_id, data.email, hashed_password)
-            )
-            
-            # Insert into company_info
-            conn.execute(
-                """INSERT INTO company_info 
-                   (company_id, C_name, C_desc, C_place, C_funding_stage, 
-                    C_industry, C_fund_size, C_link, C_img)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    company_id,
-                    data.companyName,
-                    data.description,
-                    data.country,
-                    data.fundingStage,
-                    data.industry,
-                    data.fundingAmount,
-                    data.website,
-                    data.logoUrl
-                )
+    def check_email(conn: sqlite3.Connection):
+        # Check if email already exists
+        if company_email_exists(conn, data.email):
+            raise HTTPException(
+                status_code=400,
+                detail="An account with this email already exists"
             )
-            
-            conn.commit()
-            
-            return RegistrationResponse(
-                success=True,
-                message="Company registered successfully!",
-                company_id=company_id
+    
+    def register(conn: sqlite3.Connection, hashed_password: str):
+        # Re-check on the writer: another registration may have taken the email while hashing
+        check_email(conn)
+        
+        # Get next company ID
+        company_id = get_next_company_id(conn)
+        
+        # Insert into company_login
+        conn.execute(
+            """INSERT INTO company_login (company_id, company_email, company_password)
+               VALUES (?, ?, ?)""",
+            (company_id, data.email, hashed_password)
+        )
+        
+        # Insert into company_info
+        conn.execute(
+            """INSERT INTO company_info 
+               (company_id, C_name, C_desc, C_place, C_funding_stage, 
+                C_industry, C_fund_size, C_link, C_img)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                company_id,
+                data.companyName,
+                data.description,
+                data.country,
+                data.fundingStage,
+                data.industry,
+                data.fundingAmount,
+                data.website,
+                data.logoUrl
             )
-            
+        )
+        
+        conn.commit()
+        
+        return RegistrationResponse(
+            success=True,
+            message="Company registered successfully!",
+            company_id=company_id
+        )
+    
+    try:
+        # Reject a taken email before paying for the hash, then hash the
+        # password (hashing pool) and insert on the writer connection
+        await run_db(check_email)
+        hashed_password = await kdf(hash_password, data.password)
+        return await run_db(register, hashed_password, write=True)
+        
     except HTTPException:
         raise
+    except ExecutorFull:
+        raise HTTPException(status_code=503, detail="Too many sign-ins right now, retry shortly", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -364,46 +606,49 @@ def register_company(data: CompanyRegistration):
 
 
 @app.post("/api/login/investor", response_model=LoginResponse)
-def login_investor(data: LoginRequest):
+async def login_investor(data: LoginRequest):
     """
     Login as an investor
     """
     try:
-        with get_db() as conn:
-            # Get user by email
-            cursor = conn.execute(
-                """SELECT ul.user_id, ul.user_password, ui.U_name 
-                   FROM user_login ul
-                   JOIN user_info ui ON ul.user_id = ui.user_id
-                   WHERE ul.user_email = ?""",
-                (data.email,)
+        # Get user by email
+        result = await db_fetchone(
+            """SELECT ul.user_id, ul.user_password, ui.U_name 
+               FROM user_login ul
+               JOIN user_info ui ON ul.user_id = ui.user_id
+               WHERE ul.user_email = ?""",
+            (data.email,)
+        )
+        
+        if not result:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid email or password"
             )
-            result = cursor.fetchone()
-            
-            if not result:
-                raise HTTPException(
-                    status_code=401,
-                    detail="Invalid email or password"
-                )
-            
-            user_id, stored_password, name = result
-            
-            # Verify password
-            if not verify_password(data.password, stored_password):
-                raise HTTPException(
-                    status_code=401,
-                    detail="Invalid email or password"
-                )
-            
-            return LoginResponse(
-                success=True,
-                message="Login successful",
-                user_id=user_id,
-                name=name
+        
+        user_id, stored_password, name = result
+        
+        # Verify password
+        if not await kdf(verify_password, data.password, stored_password):
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid email or password"
             )
-            
+        
+        # Legacy plaintext row: store its hash in the background
+        schedule_password_upgrade("user_login", "user_id", "user_password", user_id, data.password, stored_password)
+        
+        return LoginResponse(
+            success=True,
+            message="Login successful",
+            user_id=user_id,
+            name=name
+        )
+        
     except HTTPException:
         raise
+    except ExecutorFull:
+        raise HTTPException(status_code=503, detail="Too many sign-ins right now, retry shortly", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -412,46 +657,49 @@ def login_investor(data: LoginRequest):
 
 
 @app.post("/api/login/company", response_model=LoginResponse)
-def login_company(data: LoginRequest):
+async def login_company(data: LoginRequest):
     """
     Login as a company/startup
     """
     try:
-        with get_db() as conn:
-            # Get company by email
-            cursor = conn.execute(
-                """SELECT cl.company_id, cl.company_password, ci.C_name 
-                   FROM company_login cl
-                   JOIN company_info ci ON cl.company_id = ci.company_id
-                   WHERE cl.company_email = ?""",
-                (data.email,)
+        # Get company by email
+        result = await db_fetchone(
+            """SELECT cl.company_id, cl.company_password, ci.C_name 
+               FROM company_login cl
+               JOIN company_info ci ON cl.company_id = ci.company_id
+               WHERE cl.company_email = ?""",
+            (data.email,)
+        )
+        
+        if not result:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid email or password"
             )
-            result = cursor.fetchone()
-            
-            if not result:
-                raise HTTPException(
-                    status_code=401,
-                    detail="Invalid email or password"
-                )
-            
-            company_id, stored_password, name = result
-            
-            # Verify password
-            if not verify_password(data.password, stored_password):
-                raise HTTPException(
-                    status_code=401,
-                    detail="Invalid email or password"
-                )
-            
-            return LoginResponse(
-                success=True,
-                message="Login successful",
-                company_id=company_id,
-                name=name
+        
+        company_id, stored_password, name = result
+        
+        # Verify password
+        if not await kdf(verify_password, data.password, stored_password):
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid email or password"
             )
-            
+        
+        # Legacy plaintext row: store its hash in the background
+        schedule_password_upgrade("company_login", "company_id", "company_password", company_id, data.password, stored_password)
+        
+        return LoginResponse(
+            success=True,
+            message="Login successful",
+            company_id=company_id,
+            name=name
+        )
+        
     except HTTPException:
         raise
+    except ExecutorFull:
+        raise HTTPException(status_code=503, detail="Too many sign-ins right now, retry shortly", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -460,34 +708,32 @@ def login_company(data: LoginRequest):
 
 
 @app.get("/api/investor/{user_id}")
-def get_investor_profile(user_id: int):
+async def get_investor_profile(user_id: int):
     """Get investor profile by ID"""
     try:
-        with get_db() as conn:
-            cursor = conn.execute(
-                """SELECT user_id, U_name, U_invest_requirements, U_places,
-                          U_fund_stage, U_industry, U_check_size_max, 
-                          U_check_size_min, U_website, U_pic_link
-                   FROM user_info WHERE user_id = ?""",
-                (user_id,)
-            )
-            result = cursor.fetchone()
-            
-            if not result:
-                raise HTTPException(status_code=404, detail="Investor not found")
-            
-            return {
-                "user_id": result[0],
-                "name": result[1],
-                "invest_requirements": result[2],
-                "places": result[3],
-                "fund_stage": result[4],
-                "industry": result[5],
-                "check_size_max": result[6],
-                "check_size_min": result[7],
-                "website": result[8],
-                "pic_link": result[9]
-            }
+        result = await db_fetchone(
+            """SELECT user_id, U_name, U_invest_requirements, U_places,
+                      U_fund_stage, U_industry, U_check_size_max, 
+                      U_check_size_min, U_website, U_pic_link
+               FROM user_info WHERE user_id = ?""",
+            (user_id,)
+        )
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="Investor not found")
+        
+        return {
+            "user_id": result[0],
+            "name": result[1],
+            "invest_requirements": result[2],
+            "places": result[3],
+            "fund_stage": result[4],
+            "industry": result[5],
+            "check_size_max": result[6],
+            "check_size_min": result[7],
+            "website": result[8],
+            "pic_link": result[9]
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -495,33 +741,31 @@ def get_investor_profile(user_id: int):
 
 
 @app.get("/api/company/{company_id}")
-def get_company_profile(company_id: int):
+async def get_company_profile(company_id: int):
     """Get company profile by ID"""
     try:
-        with get_db() as conn:
-            cursor = conn.execute(
-                """SELECT company_id, C_name, C_desc, C_place,
-                          C_funding_stage, C_industry, C_fund_size, 
-                          C_link, C_img
-                   FROM company_info WHERE company_id = ?""",
-                (company_id,)
-            )
-            result = cursor.fetchone()
-            
-            if not result:
-                raise HTTPException(status_code=404, detail="Company not found")
-            
-            return {
-                "company_id": result[0],
-                "name": result[1],
-                "desc": result[2],
-                "place": result[3],
-                "funding_stage": result[4],
-                "industry": result[5],
-                "fund_size": result[6],
-                "link": result[7],
-                "img": result[8]
-            }
+        result = await db_fetchone(
+            """SELECT company_id, C_name, C_desc, C_place,
+                      C_funding_stage, C_industry, C_fund_size, 
+                      C_link, C_img
+               FROM company_info WHERE company_id = ?""",
+            (company_id,)
+        )
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="Company not found")
+        
+        return {
+            "company_id": result[0],
+            "name": result[1],
+            "desc": result[2],
+            "place": result[3],
+            "funding_stage": result[4],
+            "industry": result[5],
+            "fund_size": result[6],
+            "link": result[7],
+            "img": result[8]
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -529,25 +773,21 @@ def get_company_profile(company_id: int):
 
 
 @app.get("/api/users/count")
-def get_user_count():
+async def get_user_count():
     """Get total number of registered investors"""
     try:
-        with get_db() as conn:
-            cursor = conn.execute("SELECT COUNT(*) FROM user_info")
-            count = cursor.fetchone()[0]
-            return {"count": count}
+        count = (await db_fetchone("SELECT COUNT(*) FROM user_info"))[0]
+        return {"count": count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/companies/count")
-def get_company_count():
+async def get_company_count():
     """Get total number of registered companies"""
     try:
-        with get_db() as conn:
-            cursor = conn.execute("SELECT COUNT(*) FROM company_info")
-            count = cursor.fetchone()[0]
-            return {"count": count}
+        count = (await db_fetchone("SELECT COUNT(*) FROM company_info"))[0]
+        return {"count": count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -555,85 +795,89 @@ def get_company_count():
 # --- Swipe/Interaction Endpoints ---
 
 @app.post("/api/swipe/investor/{user_id}/company/{company_id}", response_model=SwipeResponse)
-def investor_swipe_company(user_id: int, company_id: int, data: SwipeRequest):
+async def investor_swipe_company(user_id: int, company_id: int, data: SwipeRequest):
     """
     Record an investor's swipe (like/dislike) on a company.
     Updates user_to_company_interact table.
     """
-    try:
-        with get_db() as conn:
-            like_value = 1 if data.like else 0
-            
-            # Check if interaction already exists
-            cursor = conn.execute(
-                "SELECT 1 FROM user_to_company_interact WHERE u_id = ? AND c_id = ?",
-                (user_id, company_id)
+    def swipe(conn: sqlite3.Connection):
+        like_value = 1 if data.like else 0
+        
+        # Check if interaction already exists
+        cursor = conn.execute(
+            "SELECT 1 FROM user_to_company_interact WHERE u_id = ? AND c_id = ?",
+            (user_id, company_id)
+        )
+        exists = cursor.fetchone() is not None
+        
+        if exists:
+            # Update existing interaction
+            conn.execute(
+                "UPDATE user_to_company_interact SET like_or_not = ? WHERE u_id = ? AND c_id = ?",
+                (like_value, user_id, company_id)
             )
-            exists = cursor.fetchone() is not None
-            
-            if exists:
-                # Update existing interaction
-                conn.execute(
-                    "UPDATE user_to_company_interact SET like_or_not = ? WHERE u_id = ? AND c_id = ?",
-                    (like_value, user_id, company_id)
-                )
-            else:
-                # Insert new interaction
-                conn.execute(
-                    "INSERT INTO user_to_company_interact (u_id, c_id, like_or_not) VALUES (?, ?, ?)",
-                    (user_id, company_id, like_value)
-                )
-            
-            conn.commit()
-            
-            # Reload recommendation engine's interactions
-            recommendation_engine.user_interactions.setdefault(user_id, set()).add(company_id)
-            
-            action = "liked" if data.like else "passed on"
-            return SwipeResponse(success=True, message=f"Successfully {action} company")
-            
+        else:
+            # Insert new interaction
+            conn.execute(
+                "INSERT INTO user_to_company_interact (u_id, c_id, like_or_not) VALUES (?, ?, ?)",
+                (user_id, company_id, like_value)
+            )
+        
+        conn.commit()
+        
+        # Update recommendation engine's interactions, cached results and swipe queue
+        notify_interaction("investor", user_id, company_id, True)
+        
+        action = "liked" if data.like else "passed on"
+        return SwipeResponse(success=True, message=f"Successfully {action} company")
+    
+    try:
+        return await run_db(swipe, write=True)
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Swipe failed: {str(e)}")
 
 
 @app.post("/api/swipe/company/{company_id}/investor/{user_id}", response_model=SwipeResponse)
-def company_swipe_investor(company_id: int, user_id: int, data: SwipeRequest):
+async def company_swipe_investor(company_id: int, user_id: int, data: SwipeRequest):
     """
     Record a company's swipe (like/dislike) on an investor.
     Updates company_to_user_interact table.
     """
-    try:
-        with get_db() as conn:
-            like_value = 1 if data.like else 0
-            
-            # Check if interaction already exists
-            cursor = conn.execute(
-                "SELECT 1 FROM company_to_user_interact WHERE c_id = ? AND u_id = ?",
-                (company_id, user_id)
+    def swipe(conn: sqlite3.Connection):
+        like_value = 1 if data.like else 0
+        
+        # Check if interaction already exists
+        cursor = conn.execute(
+            "SELECT 1 FROM company_to_user_interact WHERE c_id = ? AND u_id = ?",
+            (company_id, user_id)
+        )
+        exists = cursor.fetchone() is not None
+        
+        if exists:
+            # Update existing interaction
+            conn.execute(
+                "UPDATE company_to_user_interact SET like_or_not = ? WHERE c_id = ? AND u_id = ?",
+                (like_value, company_id, user_id)
             )
-            exists = cursor.fetchone() is not None
-            
-            if exists:
-                # Update existing interaction
-                conn.execute(
-                    "UPDATE company_to_user_interact SET like_or_not = ? WHERE c_id = ? AND u_id = ?",
-                    (like_value, company_id, user_id)
-                )
-            else:
-                # Insert new interaction
-                conn.execute(
-                    "INSERT INTO company_to_user_interact (c_id, u_id, like_or_not) VALUES (?, ?, ?)",
-                    (company_id, user_id, like_value)
-                )
-            
-            conn.commit()
-            
-            # Reload recommendation engine's interactions
-            recommendation_engine.company_interactions.setdefault(company_id, set()).add(user_id)
-            
-            action = "liked" if data.like else "passed on"
-            return SwipeResponse(success=True, message=f"Successfully {action} investor")
-            
+        else:
+            # Insert new interaction
+            conn.execute(
+                "INSERT INTO company_to_user_interact (c_id, u_id, like_or_not) VALUES (?, ?, ?)",
+                (company_id, user_id, like_value)
+            )
+        
+        conn.commit()
+        
+        # Update recommendation engine's interactions, cached results and swipe queue
+        notify_interaction("company", company_id, user_id, True)
+        
+        action = "liked" if data.like else "passed on"
+        return SwipeResponse(success=True, message=f"Successfully {action} investor")
+    
+    try:
+        return await run_db(swipe, write=True)
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Swipe failed: {str(e)}")
 
@@ -641,153 +885,153 @@ def company_swipe_investor(company_id: int, user_id: int, data: SwipeRequest):
 # --- Interaction History Endpoints ---
 
 @app.get("/api/interactions/investor/{user_id}")
-def get_investor_interactions(user_id: int):
+async def get_investor_interactions(user_id: int):
     """
     Get an investor's interaction history (liked and disliked companies).
     """
     try:
-        with get_db() as conn:
-            # Get liked companies (like_or_not = 1)
-            cursor = conn.execute(
-                """SELECT c.company_id, c.C_name, c.C_desc, c.C_place, c.C_industry, c.C_funding_stage, c.C_fund_size, c.C_img
-                   FROM user_to_company_interact i
-                   JOIN company_info c ON i.c_id = c.company_id
-                   WHERE i.u_id = ? AND i.like_or_not = 1""",
-                (user_id,)
-            )
-            liked = [
-                {"company_id": r[0], "name": r[1], "desc": r[2], "place": r[3], 
-                 "industry": r[4], "funding_stage": r[5], "fund_size": r[6], "img": r[7]}
-                for r in cursor.fetchall()
-            ]
-            
-            # Get disliked companies (like_or_not = 0)
-            cursor = conn.execute(
-                """SELECT c.company_id, c.C_name, c.C_desc, c.C_place, c.C_industry, c.C_funding_stage, c.C_fund_size, c.C_img
-                   FROM user_to_company_interact i
-                   JOIN company_info c ON i.c_id = c.company_id
-                   WHERE i.u_id = ? AND i.like_or_not = 0""",
-                (user_id,)
-            )
-            disliked = [
-                {"company_id": r[0], "name": r[1], "desc": r[2], "place": r[3], 
-                 "industry": r[4], "funding_stage": r[5], "fund_size": r[6], "img": r[7]}
-                for r in cursor.fetchall()
-            ]
-            
-            return {"liked": liked, "disliked": disliked}
-            
+        # Get liked companies (like_or_not = 1)
+        rows = await db_fetchall(
+            """SELECT c.company_id, c.C_name, c.C_desc, c.C_place, c.C_industry, c.C_funding_stage, c.C_fund_size, c.C_img
+               FROM user_to_company_interact i
+               JOIN company_info c ON i.c_id = c.company_id
+               WHERE i.u_id = ? AND i.like_or_not = 1""",
+            (user_id,)
+        )
+        liked = [
+            {"company_id": r[0], "name": r[1], "desc": r[2], "place": r[3], 
+             "industry": r[4], "funding_stage": r[5], "fund_size": r[6], "img": r[7]}
+            for r in rows
+        ]
+        
+        # Get disliked companies (like_or_not = 0)
+        rows = await db_fetchall(
+            """SELECT c.company_id, c.C_name, c.C_desc, c.C_place, c.C_industry, c.C_funding_stage, c.C_fund_size, c.C_img
+               FROM user_to_company_interact i
+               JOIN company_info c ON i.c_id = c.company_id
+               WHERE i.u_id = ? AND i.like_or_not = 0""",
+            (user_id,)
+        )
+        disliked = [
+            {"company_id": r[0], "name": r[1], "desc": r[2], "place": r[3], 
+             "industry": r[4], "funding_stage": r[5], "fund_size": r[6], "img": r[7]}
+            for r in rows
+        ]
+        
+        return {"liked": liked, "disliked": disliked}
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/interactions/company/{company_id}")
-def get_company_interactions(company_id: int):
+async def get_company_interactions(company_id: int):
     """
     Get a company's interaction history (liked and disliked investors).
     """
     try:
-        with get_db() as conn:
-            # Get liked investors (like_or_not = 1)
-            cursor = conn.execute(
-                """SELECT u.user_id, u.U_name, u.U_invest_requirements, u.U_places, u.U_industry, u.U_fund_stage, u.U_pic_link
-                   FROM company_to_user_interact i
-                   JOIN user_info u ON i.u_id = u.user_id
-                   WHERE i.c_id = ? AND i.like_or_not = 1""",
-                (company_id,)
-            )
-            liked = [
-                {"user_id": r[0], "name": r[1], "invest_requirements": r[2], "places": r[3], 
-                 "industry": r[4], "fund_stage": r[5], "pic_link": r[6]}
-                for r in cursor.fetchall()
-            ]
-            
-            # Get disliked investors (like_or_not = 0)
-            cursor = conn.execute(
-                """SELECT u.user_id, u.U_name, u.U_invest_requirements, u.U_places, u.U_industry, u.U_fund_stage, u.U_pic_link
-                   FROM company_to_user_interact i
-                   JOIN user_info u ON i.u_id = u.user_id
-                   WHERE i.c_id = ? AND i.like_or_not = 0""",
-                (company_id,)
-            )
-            disliked = [
-                {"user_id": r[0], "name": r[1], "invest_requirements": r[2], "places": r[3], 
-                 "industry": r[4], "fund_stage": r[5], "pic_link": r[6]}
-                for r in cursor.fetchall()
-            ]
-            
-            return {"liked": liked, "disliked": disliked}
-            
+        # Get liked investors (like_or_not = 1)
+        rows = await db_fetchall(
+            """SELECT u.user_id, u.U_name, u.U_invest_requirements, u.U_places, u.U_industry, u.U_fund_stage, u.U_pic_link
+               FROM company_to_user_interact i
+               JOIN user_info u ON i.u_id = u.user_id
+               WHERE i.c_id = ? AND i.like_or_not = 1""",
+            (company_id,)
+        )
+        liked = [
+            {"user_id": r[0], "name": r[1], "invest_requirements": r[2], "places": r[3], 
+             "industry": r[4], "fund_stage": r[5], "pic_link": r[6]}
+            for r in rows
+        ]
+        
+        # Get disliked investors (like_or_not = 0)
+        rows = await db_fetchall(
+            """SELECT u.user_id, u.U_name, u.U_invest_requirements, u.U_places, u.U_industry, u.U_fund_stage, u.U_pic_link
+               FROM company_to_user_interact i
+               JOIN user_info u ON i.u_id = u.user_id
+               WHERE i.c_id = ? AND i.like_or_not = 0""",
+            (company_id,)
+        )
+        disliked = [
+            {"user_id": r[0], "name": r[1], "invest_requirements": r[2], "places": r[3], 
+             "industry": r[4], "fund_stage": r[5], "pic_link": r[6]}
+            for r in rows
+        ]
+        
+        return {"liked": liked, "disliked": disliked}
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.put("/api/interactions/investor/{user_id}/company/{company_id}")
-def update_investor_interaction(user_id: int, company_id: int, data: InteractionUpdate):
+async def update_investor_interaction(user_id: int, company_id: int, data: InteractionUpdate):
     """
     Update an investor's interaction with a company.
     new_status: -1 = revert (no interaction), 0 = dislike, 1 = like
     """
+    def update(conn: sqlite3.Connection):
+        if data.new_status == -1:
+            # Revert to no interaction
+            conn.execute(
+                "UPDATE user_to_company_interact SET like_or_not = -1 WHERE u_id = ? AND c_id = ?",
+                (user_id, company_id)
+            )
+            # Remove from recommendation engine's tracked interactions
+            notify_interaction("investor", user_id, company_id, False)
+            message = "Interaction reverted"
+        else:
+            # Update to new status (0 or 1)
+            conn.execute(
+                "UPDATE user_to_company_interact SET like_or_not = ? WHERE u_id = ? AND c_id = ?",
+                (data.new_status, user_id, company_id)
+            )
+            # Ensure it's tracked as interacted
+            notify_interaction("investor", user_id, company_id, True)
+            message = "Liked" if data.new_status == 1 else "Disliked"
+        
+        conn.commit()
+        return {"success": True, "message": message}
+    
     try:
-        with get_db() as conn:
-            if data.new_status == -1:
-                # Revert to no interaction
-                conn.execute(
-                    "UPDATE user_to_company_interact SET like_or_not = -1 WHERE u_id = ? AND c_id = ?",
-                    (user_id, company_id)
-                )
-                # Remove from recommendation engine's tracked interactions
-                if user_id in recommendation_engine.user_interactions:
-                    recommendation_engine.user_interactions[user_id].discard(company_id)
-                message = "Interaction reverted"
-            else:
-                # Update to new status (0 or 1)
-                conn.execute(
-                    "UPDATE user_to_company_interact SET like_or_not = ? WHERE u_id = ? AND c_id = ?",
-                    (data.new_status, user_id, company_id)
-                )
-                # Ensure it's tracked as interacted
-                recommendation_engine.user_interactions.setdefault(user_id, set()).add(company_id)
-                message = "Liked" if data.new_status == 1 else "Disliked"
-            
-            conn.commit()
-            return {"success": True, "message": message}
-            
+        return await run_db(update, write=True)
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.put("/api/interactions/company/{company_id}/investor/{user_id}")
-def update_company_interaction(company_id: int, user_id: int, data: InteractionUpdate):
+async def update_company_interaction(company_id: int, user_id: int, data: InteractionUpdate):
     """
     Update a company's interaction with an investor.
     new_status: -1 = revert (no interaction), 0 = dislike, 1 = like
     """
+    def update(conn: sqlite3.Connection):
+        if data.new_status == -1:
+            # Revert to no interaction
+            conn.execute(
+                "UPDATE company_to_user_interact SET like_or_not = -1 WHERE c_id = ? AND u_id = ?",
+                (company_id, user_id)
+            )
+            # Remove from recommendation engine's tracked interactions
+            notify_interaction("company", company_id, user_id, False)
+            message = "Interaction reverted"
+        else:
+            # Update to new status (0 or 1)
+            conn.execute(
+                "UPDATE company_to_user_interact SET like_or_not = ? WHERE c_id = ? AND u_id = ?",
+                (data.new_status, company_id, user_id)
+            )
+            # Ensure it's tracked as interacted
+            notify_interaction("company", company_id, user_id, True)
+            message = "Liked" if data.new_status == 1 else "Disliked"
+        
+        conn.commit()
+        return {"success": True, "message": message}
+    
     try:
-        with get_db() as conn:
-            if data.new_status == -1:
-                # Revert to no interaction
-                conn.execute(
-                    "UPDATE company_to_user_interact SET like_or_not = -1 WHERE c_id = ? AND u_id = ?",
-                    (company_id, user_id)
-                )
-                # Remove from recommendation engine's tracked interactions
-                if company_id in recommendation_engine.company_interactions:
-                    recommendation_engine.company_interactions[company_id].discard(user_id)
-                message = "Interaction reverted"
-            else:
-                # Update to new status (0 or 1)
-                conn.execute(
-                    "UPDATE company_to_user_interact SET like_or_not = ? WHERE c_id = ? AND u_id = ?",
-                    (data.new_status, company_id, user_id)
-                )
-                # Ensure it's tracked as interacted
-                recommendation_engine.company_interactions.setdefault(company_id, set()).add(user_id)
-                message = "Liked" if data.new_status == 1 else "Disliked"
-            
-            conn.commit()
-            return {"success": True, "message": message}
-            
+        return await run_db(update, write=True)
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -795,105 +1039,112 @@ def update_company_interaction(company_id: int, user_id: int, data: InteractionU
 # --- Recommendation Endpoints ---
 
 @app.get("/api/recommendations/investor/{user_id}")
-def get_recommendations_for_investor(user_id: int, num: int = 5):
+async def get_recommendations_for_investor(user_id: int, num: int = 5, reciprocal: bool = False, cursor: Optional[str] = None):
     """
     Get company recommendations for an investor.
     
     Args:
         user_id: The investor's ID
         num: Number of recommendations (default 5)
+        reciprocal: Rank by the harmonic mean of both sides' like probabilities,
+            favouring companies likely to like the investor back (default false)
+        cursor: Cursor from the previous page; omit to start a new stream
     
     Returns:
-        List of recommended companies with match probabilities
+        A page of recommended companies with match probabilities (num is
+        capped server-side), and the cursor for the next page (null at the end)
     """
     try:
-        # Get recommendations from engine
-        recs = recommendation_engine.recommend_for_investor(user_id, num_recommendations=num)
+        # The first page opens the requester's queue (on the recommendation executor); later pages pop from it
+        recs, next_cursor = await _recommend_executor.run(
+            recommendation_page, "investor", user_id, num, cursor, reciprocal
+        )
         
         if not recs:
-            return {"recommendations": [], "message": "No recommendations available"}
+            return {"recommendations": [], "cursor": next_cursor, "message": "No recommendations available"}
         
-        # Format response with company details
+        # Format response with company details (one query for the whole page, engine order kept)
+        details = await run_db(fetch_rows_by_id, "company_info", "company_id", COMPANY_CARD_COLUMNS, [r[0] for r in recs])
         recommendations = []
-        with get_db() as conn:
-            for company_id, company_name, probability in recs:
-                # Get additional company info
-                cursor = conn.execute(
-                    """SELECT C_desc, C_place, C_funding_stage, C_industry, C_fund_size, C_link, C_img
-                       FROM company_info WHERE company_id = ?""",
-                    (company_id,)
-                )
-                result = cursor.fetchone()
-                
-                if result:
-                    recommendations.append({
-                        "company_id": company_id,
-                        "name": company_name.strip(),
-                        "match_probability": round(probability * 100, 1),
-                        "description": result[0],
-                        "place": result[1],
-                        "funding_stage": result[2],
-                        "industry": result[3],
-                        "fund_size": result[4],
-                        "link": result[5],
-                        "img": result[6]
-                    })
-        
-        return {"recommendations": recommendations}
+        for company_id, company_name, probability in recs:
+            result = details.get(company_id)
+            
+            if result:
+                recommendations.append({
+                    "company_id": company_id,
+                    "name": company_name.strip(),
+                    "match_probability": round(probability * 100, 1),
+                    "description": result[0],
+                    "place": result[1],
+                    "funding_stage": result[2],
+                    "industry": result[3],
+                    "fund_size": result[4],
+                    "link": result[5],
+                    "img": result[6]
+                })
+        
+        return {"recommendations": recommendations, "cursor": next_cursor}
         
+    except CursorError as e:
+        raise HTTPException(status_code=410, detail=f"Cursor expired or invalid ({str(e)}); request without a cursor")
+    except ExecutorFull:
+        raise HTTPException(status_code=503, detail="Too many recommendation requests, retry shortly", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(e)}")
 
 
 @app.get("/api/recommendations/company/{company_id}")
-def get_recommendations_for_company(company_id: int, num: int = 5):
+async def get_recommendations_for_company(company_id: int, num: int = 5, reciprocal: bool = False, cursor: Optional[str] = None):
     """
     Get investor recommendations for a company.
     
     Args:
         company_id: The company's ID
         num: Number of recommendations (default 5)
+        reciprocal: Rank by the harmonic mean of both sides' like probabilities,
+            favouring investors likely to like the company back (default false)
+        cursor: Cursor from the previous page; omit to start a new stream
     
     Returns:
-        List of recommended investors with match probabilities
+        A page of recommended investors with match probabilities (num is
+        capped server-side), and the cursor for the next page (null at the end)
     """
     try:
-        # Get recommendations from engine
-        recs = recommendation_engine.recommend_for_company(company_id, num_recommendations=num)
+        # The first page opens the requester's queue (on the recommendation executor); later pages pop from it
+        recs, next_cursor = await _recommend_executor.run(
+            recommendation_page, "company", company_id, num, cursor, reciprocal
+        )
         
         if not recs:
-            return {"recommendations": [], "message": "No recommendations available"}
+            return {"recommendations": [], "cursor": next_cursor, "message": "No recommendations available"}
         
-        # Format response with investor details
+        # Format response with investor details (one query for the whole page, engine order kept)
+        details = await run_db(fetch_rows_by_id, "user_info", "user_id", INVESTOR_CARD_COLUMNS, [r[0] for r in recs])
         recommendations = []
-        with get_db() as conn:
-            for user_id, user_name, probability in recs:
-                # Get additional investor info
-                cursor = conn.execute(
-                    """SELECT U_invest_requirements, U_places, U_fund_stage, U_industry, 
-                              U_check_size_min, U_check_size_max, U_website, U_pic_link
-                       FROM user_info WHERE user_id = ?""",
-                    (user_id,)
-                )
-                result = cursor.fetchone()
-                
-                if result:
-                    recommendations.append({
-                        "user_id": user_id,
-                        "name": user_name.strip(),
-                        "match_probability": round(probability * 100, 1),
-                        "invest_requirements": result[0],
-                        "places": result[1],
-                        "fund_stage": result[2],
-                        "industry": result[3],
-                        "check_size_min": result[4],
-                        "check_size_max": result[5],
-                        "website": result[6],
-                        "pic_link": result[7]
-                    })
-        
-        return {"recommendations": recommendations}
+        for user_id, user_name, probability in recs:
+            result = details.get(user_id)
+            
+            if result:
+                recommendations.append({
+                    "user_id": user_id,
+                    "name": user_name.strip(),
+                    "match_probability": round(probability * 100, 1),
+                    "invest_requirements": result[0],
+                    "places": result[1],
+                    "fund_stage": result[2],
+                    "industry": result[3],
+                    "check_size_min": result[4],
+                    "check_size_max": result[5],
+                    "website": result[6],
+                    "pic_link": result[7]
+                })
         
+        return {"recommendations": recommendations, "cursor": next_cursor}
+        
+    except CursorError as e:
+        raise HTTPException(status_code=410, detail=f"Cursor expired or invalid ({str(e)}); request without a cursor")
+    except ExecutorFull:
+        raise HTTPException(status_code=503, detail="Too many recommendation requests, retry shortly", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(e)}")
 
@@ -905,7 +1156,7 @@ def load_recommendation_engine():
     Call this to warm up the engine before first use.
     """
     try:
-        recommendation_engine.load()
+        get_engine().load()
         return {"status": "loaded", "message": "Recommendation engine ready"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load engine: {str(e)}")
@@ -914,57 +1165,60 @@ def load_recommendation_engine():
 # --- Profile Update Endpoints ---
 
 @app.put("/api/investor/{user_id}/profile")
-def update_investor_profile(user_id: int, data: InvestorProfileUpdate):
+async def update_investor_profile(user_id: int, data: InvestorProfileUpdate):
     """Update an investor's profile"""
+    def update(conn: sqlite3.Connection):
+        # Check if user exists
+        cursor = conn.execute("SELECT 1 FROM user_info WHERE user_id = ?", (user_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Investor not found")
+        
+        # Build update query dynamically
+        updates = []
+        params = []
+        
+        if data.fullName is not None:
+            updates.append("U_name = ?")
+            params.append(data.fullName)
+        if data.investRequirements is not None:
+            updates.append("U_invest_requirements = ?")
+            params.append(data.investRequirements)
+        if data.countries is not None:
+            updates.append("U_places = ?")
+            params.append(", ".join(data.countries))
+        if data.fundStages is not None:
+            updates.append("U_fund_stage = ?")
+            params.append(", ".join(data.fundStages))
+        if data.industries is not None:
+            updates.append("U_industry = ?")
+            params.append(", ".join(data.industries))
+        if data.checkSizeMin is not None:
+            updates.append("U_check_size_min = ?")
+            params.append(data.checkSizeMin)
+        if data.checkSizeMax is not None:
+            updates.append("U_check_size_max = ?")
+            params.append(data.checkSizeMax)
+        if data.website is not None:
+            updates.append("U_website = ?")
+            params.append(data.website)
+        if data.profilePic is not None:
+            updates.append("U_pic_link = ?")
+            params.append(data.profilePic)
+        
+        if not updates:
+            return {"success": True, "message": "No changes to apply"}
+        
+        params.append(user_id)
+        query = f"UPDATE user_info SET {', '.join(updates)} WHERE user_id = ?"
+        conn.execute(query, params)
+        conn.commit()
+        notify_profile_change("investor", user_id)
+        
+        return {"success": True, "message": "Profile updated successfully"}
+    
     try:
-        with get_db() as conn:
-            # Check if user exists
-            cursor = conn.execute("SELECT 1 FROM user_info WHERE user_id = ?", (user_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Investor not found")
-            
-            # Build update query dynamically
-            updates = []
-            params = []
-            
-            if data.fullName is not None:
-                updates.append("U_name = ?")
-                params.append(data.fullName)
-            if data.investRequirements is not None:
-                updates.append("U_invest_requirements = ?")
-                params.append(data.investRequirements)
-            if data.countries is not None:
-                updates.append("U_places = ?")
-                params.append(", ".join(data.countries))
-            if data.fundStages is not None:
-                updates.append("U_fund_stage = ?")
-                params.append(", ".join(data.fundStages))
-            if data.industries is not None:
-                updates.append("U_industry = ?")
-                params.append(", ".join(data.industries))
-            if data.checkSizeMin is not None:
-                updates.append("U_check_size_min = ?")
-                params.append(data.checkSizeMin)
-            if data.checkSizeMax is not None:
-                updates.append("U_check_size_max = ?")
-                params.append(data.checkSizeMax)
-            if data.website is not None:
-                updates.append("U_website = ?")
-                params.append(data.website)
-            if data.profilePic is not None:
-                updates.append("U_pic_link = ?")
-                params.append(data.profilePic)
-            
-            if not updates:
-                return {"success": True, "message": "No changes to apply"}
-            
-            params.append(user_id)
-            query = f"UPDATE user_info SET {', '.join(updates)} WHERE user_id = ?"
-            conn.execute(query, params)
-            conn.commit()
-            
-            return {"success": True, "message": "Profile updated successfully"}
-            
+        return await run_db(update, write=True)
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -972,54 +1226,57 @@ def update_investor_profile(user_id: int, data: InvestorProfileUpdate):
 
 
 @app.put("/api/company/{company_id}/profile")
-def update_company_profile(company_id: int, data: CompanyProfileUpdate):
+async def update_company_profile(company_id: int, data: CompanyProfileUpdate):
     """Update a company's profile"""
+    def update(conn: sqlite3.Connection):
+        # Check if company exists
+        cursor = conn.execute("SELECT 1 FROM company_info WHERE company_id = ?", (company_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Company not found")
+        
+        # Build update query dynamically
+        updates = []
+        params = []
+        
+        if data.companyName is not None:
+            updates.append("C_name = ?")
+            params.append(data.companyName)
+        if data.description is not None:
+            updates.append("C_desc = ?")
+            params.append(data.description)
+        if data.country is not None:
+            updates.append("C_place = ?")
+            params.append(data.country)
+        if data.fundingStage is not None:
+            updates.append("C_funding_stage = ?")
+            params.append(data.fundingStage)
+        if data.industry is not None:
+            updates.append("C_industry = ?")
+            params.append(data.industry)
+        if data.fundingAmount is not None:
+            updates.append("C_fund_size = ?")
+            params.append(data.fundingAmount)
+        if data.website is not None:
+            updates.append("C_link = ?")
+            params.append(data.website)
+        if data.logoUrl is not None:
+            updates.append("C_img = ?")
+            params.append(data.logoUrl)
+        
+        if not updates:
+            return {"success": True, "message": "No changes to apply"}
+        
+        params.append(company_id)
+        query = f"UPDATE company_info SET {', '.join(updates)} WHERE company_id = ?"
+        conn.execute(query, params)
+        conn.commit()
+        notify_profile_change("company", company_id)
+        
+        return {"success": True, "message": "Profile updated successfully"}
+    
     try:
-        with get_db() as conn:
-            # Check if company exists
-            cursor = conn.execute("SELECT 1 FROM company_info WHERE company_id = ?", (company_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Company not found")
-            
-            # Build update query dynamically
-            updates = []
-            params = []
-            
-            if data.companyName is not None:
-                updates.append("C_name = ?")
-                params.append(data.companyName)
-            if data.description is not None:
-                updates.append("C_desc = ?")
-                params.append(data.description)
-            if data.country is not None:
-                updates.append("C_place = ?")
-                params.append(data.country)
-            if data.fundingStage is not None:
-                updates.append("C_funding_stage = ?")
-                params.append(data.fundingStage)
-            if data.industry is not None:
-                updates.append("C_industry = ?")
-                params.append(data.industry)
-            if data.fundingAmount is not None:
-                updates.append("C_fund_size = ?")
-                params.append(data.fundingAmount)
-            if data.website is not None:
-                updates.append("C_link = ?")
-                params.append(data.website)
-            if data.logoUrl is not None:
-                updates.append("C_img = ?")
-                params.append(data.logoUrl)
-            
-            if not updates:
-                return {"success": True, "message": "No changes to apply"}
-            
-            params.append(company_id)
-            query = f"UPDATE company_info SET {', '.join(updates)} WHERE company_id = ?"
-            conn.execute(query, params)
-            conn.commit()
-            
-            return {"success": True, "message": "Profile updated successfully"}
-            
+        return await run_db(update, write=True)
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -1029,91 +1286,43 @@ def update_company_profile(company_id: int, data: CompanyProfileUpdate):
 # --- Search Endpoints ---
 
 @app.get("/api/search/investors")
-def search_investors(q: str = "", limit: int = 20):
-    """Search investors by name or description"""
+async def search_investors(q: str = "", limit: int = 20):
+    """Search investors by name, description or industry (best matches first)"""
     try:
-        with get_db() as conn:
-            if q:
-                cursor = conn.execute(
-                    """SELECT user_id, U_name, U_invest_requirements, U_places, U_industry, U_pic_link
-                       FROM user_info 
-                       WHERE user_id != 1 AND (
-                           U_name LIKE ? OR 
-                           U_invest_requirements LIKE ? OR 
-                           U_industry LIKE ?
-                       )
-                       LIMIT ?""",
-                    (f"%{q}%", f"%{q}%", f"%{q}%", limit)
-                )
-            else:
-                cursor = conn.execute(
-                    """SELECT user_id, U_name, U_invest_requirements, U_places, U_industry, U_pic_link
-                       FROM user_info 
-                       WHERE user_id != 1
-                       LIMIT ?""",
-                    (limit,)
-                )
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    "id": row[0],
-                    "name": row[1].strip() if row[1] else "",
-                    "description": (row[2][:150] + "..." if row[2] and len(row[2]) > 150 else row[2]) if row[2] else None,
-                    "place": row[3],
-                    "industry": row[4],
-                    "img": row[5]
-                })
-            
-            return {"results": results, "count": len(results)}
-            
+        rows = await run_db(_search, "user_info", q, limit, ("U_places", "U_industry", "U_pic_link"))
+        return search_results(rows)
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/search/companies")
-def search_companies(q: str = "", limit: int = 20):
-    """Search companies by name or description"""
+async def search_companies(q: str = "", limit: int = 20):
+    """Search companies by name, description or industry (best matches first)"""
     try:
-        with get_db() as conn:
-            if q:
-                cursor = conn.execute(
-                    """SELECT company_id, C_name, C_desc, C_place, C_industry, C_img
-                       FROM company_info 
-                       WHERE company_id != 1 AND (
-                           C_name LIKE ? OR 
-                           C_desc LIKE ? OR 
-                           C_industry LIKE ?
-                       )
-                       LIMIT ?""",
-                    (f"%{q}%", f"%{q}%", f"%{q}%", limit)
-                )
-            else:
-                cursor = conn.execute(
-                    """SELECT company_id, C_name, C_desc, C_place, C_industry, C_img
-                       FROM company_info 
-                       WHERE company_id != 1
-                       LIMIT ?""",
-                    (limit,)
-                )
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    "id": row[0],
-                    "name": row[1].strip() if row[1] else "",
-                    "description": (row[2][:150] + "..." if row[2] and len(row[2]) > 150 else row[2]) if row[2] else None,
-                    "place": row[3],
-                    "industry": row[4],
-                    "img": row[5]
-                })
-            
-            return {"results": results, "count": len(results)}
-            
+        rows = await run_db(_search, "company_info", q, limit, ("C_place", "C_industry", "C_img"))
+        return search_results(rows)
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def search_results(rows: list) -> dict:
+    """Search rows (id, name, description snippet, place, industry, img) as the API returns them"""
+    results = []
+    for row in rows:
+        results.append({
+            "id": row[0],
+            "name": row[1].strip() if row[1] else "",
+            "description": row[2] or None,
+            "place": row[3],
+            "industry": row[4],
+            "img": row[5]
+        })
+    
+    return {"results": results, "count": len(results)}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
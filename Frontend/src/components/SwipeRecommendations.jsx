@@ -17,23 +17,30 @@ export default function SwipeRecommendations({ type, userId, accentColor = "viol
   const [swiping, setSwiping] = useState(null); // "left" | "right" | null
   const [noMore, setNoMore] = useState(false);
   const [error, setError] = useState(null);
+  const [cursor, setCursor] = useState(null); // next page of the server-side stream (null: start a new one)
 
   const isInvestor = type === "investor";
   const colors = accentColor === "violet" 
     ? { bg: "bg-violet-600", hover: "hover:bg-violet-700", light: "bg-violet-50", border: "border-violet-200", text: "text-violet-600" }
     : { bg: "bg-orange-500", hover: "hover:bg-orange-600", light: "bg-orange-50", border: "border-orange-200", text: "text-orange-600" };
 
-  // Fetch recommendations
-  const fetchRecommendations = async () => {
+  // Fetch recommendations (pass the cursor from the previous page to continue the stream)
+  const fetchRecommendations = async (pageCursor = null) => {
     setLoading(true);
     setError(null);
     try {
-      const endpoint = isInvestor
+      const base = isInvestor
         ? `http://localhost:8000/api/recommendations/investor/${userId}?num=5`
         : `http://localhost:8000/api/recommendations/company/${userId}?num=5`;
+      const endpoint = pageCursor ? `${base}&cursor=${encodeURIComponent(pageCursor)}` : base;
       
       const response = await fetch(endpoint);
+      if (response.status === 410 && pageCursor) {
+        // Stream expired or was reset (e.g. profile edited) - start a new one
+        return fetchRecommendations(null);
+      }
       const data = await response.json();
+      setCursor(data.cursor ?? null);
       
       if (data.recommendations && data.recommendations.length > 0) {
         setRecommendations(data.recommendations);
@@ -52,6 +59,7 @@ export default function SwipeRecommendations({ type, userId, accentColor = "viol
 
   useEffect(() => {
     if (userId) {
+      setCursor(null);
       fetchRecommendations();
     }
   }, [userId, type]);
@@ -117,7 +125,7 @@ export default function SwipeRecommendations({ type, userId, accentColor = "viol
           You've reviewed all current recommendations.
         </p>
         <button
-          onClick={fetchRecommendations}
+          onClick={() => fetchRecommendations(cursor)}
           className={`mt-4 px-4 py-2 rounded-xl ${colors.bg} ${colors.hover} text-white text-sm font-medium transition-colors`}
         >
           Load More
@@ -132,7 +140,7 @@ export default function SwipeRecommendations({ type, userId, accentColor = "viol
       <div className="flex flex-col items-center justify-center py-16 text-center">
         <p className="text-red-500">{error}</p>
         <button
-          onClick={fetchRecommendations}
+          onClick={() => fetchRecommendations()}
           className="mt-4 px-4 py-2 rounded-xl bg-slate-100 hover:bg-slate-200 text-slate-700 text-sm font-medium"
         >
           Try Again
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Ann_Index.py
+
+Approximate nearest-neighbour index (IVF, inverted file) over normalized
+description embeddings, in pure numpy.
+
+- train():  spherical k-means picks `n_lists` centroids from a sample
+- add():    each vector goes to the list of its closest centroid; lists are
+            growable arrays (capacity doubling), so new registrations are
+            cheap incremental inserts. Re-adding an id moves/updates it.
+- search(): score the query against the centroids, scan only the
+            `n_probe` closest lists, return the top k by cosine similarity
+- to_arrays() / from_arrays(): flat arrays for the engine snapshot; lists
+            restored from read-only (mapped) arrays are copied on first edit
+
+An index built from no vectors (empty catalog) is untrained: search()
+returns nothing and the first add() trains on the vectors it inserts.
+
+Recall/latency against exact search is measured by `Benchmarks.py ann`.
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_N_PROBE = 8
+KMEANS_ITERS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_BLOCK = 65536  # rows per centroid-assignment matmul
+
+
+def default_n_lists(n: int) -> int:
+    """Roughly sqrt(N) lists, the usual IVF trade-off."""
+    return max(1, int(np.sqrt(max(n, 1))))
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+class IVFIndex:
+    """Inverted-file cosine index with incremental inserts."""
+
+    def __init__(self, dim: int, n_lists: int, n_probe: int = DEFAULT_N_PROBE, seed: int = 42):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None  # [L, D]
+        self._clear()
+
+    def _clear(self):
+        self._vecs = [np.zeros((0, self.dim), dtype=np.float32) for _ in range(self.n_lists)]
+        self._ids = [np.zeros(0, dtype=np.int64) for _ in range(self.n_lists)]
+        self._count = np.zeros(self.n_lists, dtype=np.int64)
+        self._where: Dict[int, Tuple[int, int]] = {}  # id -> (list, position)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, pid: int) -> bool:
+        return pid in self._where
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[int],
+        vectors: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_probe: int = DEFAULT_N_PROBE,
+    ) -> "IVFIndex":
+        """Train on `vectors` and add them all (untrained if there are none)."""
+        if vectors is None or len(vectors) == 0:
+            return cls(vectors.shape[1] if vectors is not None and np.ndim(vectors) == 2 else 0, 1, n_probe)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        index = cls(vectors.shape[1], n_lists or default_n_lists(len(vectors)), n_probe)
+        index.train(vectors)
+        index.add(ids, vectors)
+        return index
+
+    # -----------------------------
+    # Training / assignment
+    # -----------------------------
+
+    def train(self, vectors: np.ndarray):
+        """Spherical k-means on a sample of the vectors."""
+        rng = np.random.default_rng(self.seed)
+        x = _normalize(vectors)
+        if len(x) > self.n_lists * KMEANS_SAMPLE_PER_LIST:
+            x = x[rng.choice(len(x), self.n_lists * KMEANS_SAMPLE_PER_LIST, replace=False)]
+        if len(x) < self.n_lists:
+            # Too few points: pad with random directions so every list has a centroid
+            pad = _normalize(rng.standard_normal((self.n_lists - len(x), self.dim)))
+            x = np.vstack([x, pad])
+
+        centroids = x[rng.choice(len(x), self.n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERS):
+            assign = np.argmax(x @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, x)
+            empty = np.bincount(assign, minlength=self.n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        self.centroids = centroids
+
+    def _assign(self, x: np.ndarray) -> np.ndarray:
+        out = np.empty(len(x), dtype=np.int64)
+        for start in range(0, len(x), ASSIGN_BLOCK):
+            out[start:start + ASSIGN_BLOCK] = np.argmax(x[start:start + ASSIGN_BLOCK] @ self.centroids.T, axis=1)
+        return out
+
+    # -----------------------------
+    # Inserts / removals
+    # -----------------------------
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray):
+        """Insert (or update) vectors; amortized O(1) per row per list."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        if self.centroids is None:
+            # Built empty: train on the first vectors inserted (their width sets dim)
+            self.dim = int(np.shape(vectors)[-1])
+            self._clear()
+            self.train(vectors)
+        x = _normalize(vectors).reshape(len(ids), self.dim)
+        for pid in ids:
+            if int(pid) in self._where:
+                self.remove(int(pid))
+
+        lists = self._assign(x)
+        order = np.argsort(lists, kind="stable")
+        bounds = np.searchsorted(lists[order], np.arange(self.n_lists + 1))
+        for li in np.flatnonzero(np.diff(bounds)):
+            rows = order[bounds[li]:bounds[li + 1]]
+            self._append(int(li), ids[rows], x[rows])
+
+    def _writable(self, li: int):
+        # Lists restored from a snapshot are read-only views until edited
+        if not self._ids[li].flags.writeable:
+            self._vecs[li] = self._vecs[li].copy()
+            self._ids[li] = self._ids[li].copy()
+
+    def _append(self, li: int, ids: np.ndarray, x: np.ndarray):
+        n, need = self._count[li], self._count[li] + len(ids)
+        if need <= len(self._ids[li]):
+            self._writable(li)
+        else:
+            cap = max(need, 2 * len(self._ids[li]), 16)
+            vecs = np.zeros((cap, self.dim), dtype=np.float32)
+            vecs[:n] = self._vecs[li][:n]
+            pids = np.zeros(cap, dtype=np.int64)
+            pids[:n] = self._ids[li][:n]
+            self._vecs[li], self._ids[li] = vecs, pids
+        self._vecs[li][n:need] = x
+        self._ids[li][n:need] = ids
+        self._count[li] = need
+        for pos, pid in enumerate(ids.tolist(), start=n):
+            self._where[pid] = (li, pos)
+
+    def remove(self, pid: int):
+        """Remove an id (swap-with-last inside its list)."""
+        li, pos = self._where.pop(pid)
+        self._writable(li)
+        last = self._count[li] - 1
+        if pos != last:
+            moved = int(self._ids[li][last])
+            self._vecs[li][pos] = self._vecs[li][last]
+            self._ids[li][pos] = moved
+            self._where[moved] = (li, pos)
+        self._count[li] = last
+
+    # -----------------------------
+    # Snapshot (de)serialization
+    # -----------------------------
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Centroids plus all lists packed back to back (offsets delimit them)."""
+        counts = self._count.copy()
+        return {
+            "centroids": self.centroids if self.centroids is not None else np.zeros((0, self.dim), dtype=np.float32),
+            "offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            "ids": np.concatenate([self._ids[li][:n] for li, n in enumerate(counts)]),
+            "vectors": np.concatenate([self._vecs[li][:n] for li, n in enumerate(counts)]).reshape(-1, self.dim)
+            if self.dim else np.zeros((0, 0), dtype=np.float32),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], n_probe: int = DEFAULT_N_PROBE) -> "IVFIndex":
+        """Inverse of to_arrays(); lists are views into the given arrays (no copy)."""
+        centroids, offsets = arrays["centroids"], arrays["offsets"]
+        if not len(centroids):
+            return cls(centroids.shape[1], 1, n_probe)
+        index = cls(centroids.shape[1], len(centroids), n_probe)
+        index.centroids = centroids
+        for li, (a, b) in enumerate(zip(offsets[:-1].tolist(), offsets[1:].tolist())):
+            index._vecs[li] = arrays["vectors"][a:b]
+            index._ids[li] = arrays["ids"][a:b]
+            index._count[li] = b - a
+            index._where.update((pid, (li, pos)) for pos, pid in enumerate(index._ids[li].tolist()))
+        return index
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+
+    def search(self, query: np.ndarray, k: int, n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (ids, cosine scores) for one query vector, best first."""
+        if self.centroids is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        q = _normalize(query).reshape(self.dim)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        coarse = self.centroids @ q
+        probe = np.argpartition(-coarse, n_probe - 1)[:n_probe] if n_probe < self.n_lists else np.arange(self.n_lists)
+
+        ids, scores = [], []
+        for li in probe:
+            n = self._count[li]
+            if n:
+                ids.append(self._ids[li][:n])
+                scores.append(self._vecs[li][:n] @ q)
+        if not ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        ids = np.concatenate(ids)
+        scores = np.concatenate(scores)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return ids[top], scores[top]
@@ -0,0 +1,1322 @@
+#!/usr/bin/env python3
+"""
+Benchmarks.py
+
+Performance benchmarks for the recommendation stack. Each subcommand
+prints a small table; nothing is written to disk apart from the cached
+ONNX export used by the `onnx` encoder backend.
+
+  python3 Benchmarks.py ann --sizes 10000 100000 1000000 --dim 384
+      IVF index (Ann_Index.py) recall@k and latency vs exact cosine search
+      on synthetic clustered profiles.
+
+  python3 Benchmarks.py encoder --backends eager int8 torchscript onnx
+      Encoder backend cosine vs float32 eager embeddings of the company
+      descriptions, and throughput for single-text and batched calls
+      (tests/test_encoder_backends.py asserts the parity).
+
+  python3 Benchmarks.py batching --clients 1 8 32 --wait-ms 0 2 5
+      Concurrent encode_text/encode_texts callers with and without the
+      shared micro-batching queue (Encoder_Batcher.py): throughput, caller
+      p95 latency, batch fill rate and queueing delay.
+
+  python3 Benchmarks.py bulk --texts 862 5000 --bucket-size 64
+      Bulk encoding: the single padded call vs length-bucketed encoding
+      (Bulk_Encoder.py). Reports wall time, peak RSS growth and parity.
+
+  python3 Benchmarks.py fullcatalog --requesters 100
+      Full-catalog scoring (top_n=None) vs the 30-candidate prefilter path:
+      per-request latency on both sides, and how often the model's top-5
+      differs between the two paths.
+
+  python3 Benchmarks.py load --scales 1 10 100
+      Engine cold load of profiles + interactions: CSV loaders (iterrows)
+      vs the SQLite column loader (Profile_Loader.py), on copies of
+      invest.sqlite with every table replicated `scale` times. Reports load
+      time and RSS growth.
+
+  python3 Benchmarks.py interactions --interactions 10000000
+      Interaction store (Interaction_Store.py, CSR int32 arrays) vs
+      Dict[int, set] on synthetic swipes: build time, memory held, per-request
+      exclusion mask latency, batched masks and append throughput.
+
+  python3 Benchmarks.py concurrency --threads 1 2 4 8 --seconds 5
+      Multithreaded stress test of one RecommendationEngine: reader threads
+      score random investors/companies while a writer applies profile
+      upserts (apply_changes) and toggles swipes. Reports read throughput
+      and speedup per thread count, p95 latency, writes applied and any
+      exceptions (tests/test_concurrency.py asserts there are none).
+
+  python3 Benchmarks.py sampler --sizes 1000 100000 1000000
+      Gumbel-top-k sampling (Gumbel_Sampler.py) vs np.random.choice:
+      latency of one page and of several pages at each candidate count.
+
+  python3 Benchmarks.py startup --port 8765
+      API cold start. Import-time breakdown (python -X importtime, self time
+      summed per top-level package) for the API module and for the engine
+      module it loads in the background, then a real uvicorn process:
+      time until /health answers, time until /ready reports ready, and the
+      load time of each engine component.
+
+  python3 Benchmarks.py enrichment --nums 5 50 500
+      Recommendation card enrichment as the API endpoints do it: one
+      SELECT per recommended id (the old loop) vs main.fetch_rows_by_id
+      (one IN (...) query), both including the connection open, on a
+      scaled copy of invest.sqlite. Checks both return the same rows.
+
+  python3 Benchmarks.py dbpool --clients 32 --seconds 10
+      GET /api/investor/{id} on a real uvicorn process (engine warm-up
+      off) from concurrent keep-alive clients, with a fresh SQLite
+      connection per request (INVESTLINK_DB_POOL=0) vs the pooled, tuned
+      connections (Sqlite_Pool.py): throughput, p50/p99 latency, errors and
+      the pool's check-out waits from /api/metrics.
+
+  python3 Benchmarks.py mixed --rec-clients 0 16 --search-clients 8
+      Mixed load on a real uvicorn process: clients requesting first
+      recommendation pages for random requesters (CPU-heavy scoring) while
+      other clients call /api/search/*. Reports search p50/p99,
+      recommendation throughput/p99, 503s and the recommendation executor's
+      peak queue depth from /api/metrics.
+
+  python3 Benchmarks.py logins --login-clients 16 --other-clients 6
+      Login storm on a real uvicorn process over a copy of invest.sqlite
+      with --accounts PBKDF2-hashed investor logins: login clients vs
+      clients reading profiles, searching and fetching recommendations.
+      PBKDF2 in the request path (INVESTLINK_KDF_WORKERS=0) vs the bounded
+      hashing process pool: login throughput/p99, 503s, p99 per other
+      endpoint and the pool's latency histogram.
+
+  python3 Benchmarks.py search --sizes 1000 100000 1000000
+      Profile search as /api/search/companies runs it (Search_Index.py):
+      the old LIKE '%q%' scan vs the FTS5 index, on synthetic company_info
+      tables whose names and descriptions are drawn from the word
+      frequencies of invest.sqlite. p50/p99 per query kind: common words,
+      a word typed one letter at a time, rare words and a word that
+      matches nothing; plus index build time and size.
+
+  python3 Benchmarks.py workers --workers 4 8 --scale 30
+      Engine memory across worker processes, as with `uvicorn --workers N`:
+      N engines on a scaled copy of invest.sqlite, each loaded privately
+      vs mapping the shared engine snapshot (Engine_Snapshot.py). Reports
+      per-worker load time, RSS, PSS (shared pages split between the
+      processes that map them) and private memory, plus the PSS total.
+"""
+
+import argparse
+import gc
+import http.client
+import os
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from Ann_Index import IVFIndex, default_n_lists
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def synthetic_embeddings(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Normalized vectors drawn around ~sqrt(n) random topic centres."""
+    rng = np.random.default_rng(seed)
+    n_topics = max(1, int(np.sqrt(n)))
+    centres = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    x = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 65536):
+        stop = min(n, start + 65536)
+        topic = rng.integers(0, n_topics, stop - start)
+        x[start:stop] = centres[topic] + 0.8 * rng.standard_normal((stop - start, dim)).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    return x
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def peak_rss(fn, interval: float = 0.005):
+    """(result, seconds, peak RSS growth in MB) of fn(), sampling RSS in a thread."""
+    base, peak, done = rss_mb(), [0.0], threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], rss_mb() - base)
+            time.sleep(interval)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        out, seconds = timed(fn)
+    finally:
+        done.set()
+        sampler.join()
+    return out, seconds, max(peak[0], rss_mb() - base)
+
+
+def timed(fn, repeat: int = 1):
+    """(result of last call, mean seconds per call)"""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - t0) / repeat
+
+
+# -----------------------------
+# ann
+# -----------------------------
+
+def bench_ann(args):
+    print(f"{'N':>9} {'lists':>6} {'probe':>6} {'recall@' + str(args.k):>10} {'ann ms':>8} {'exact ms':>9} {'build s':>8}")
+    for n in args.sizes:
+        x = synthetic_embeddings(n, args.dim)
+        ids = np.arange(n)
+        index, build_s = timed(lambda: IVFIndex.build(ids, x, n_lists=default_n_lists(n)))
+
+        rng = np.random.default_rng(1)
+        queries = x[rng.choice(n, args.queries, replace=False)]
+        queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+
+        truth, exact_s = [], 0.0
+        for q in queries:
+            t0 = time.perf_counter()
+            scores = x @ q
+            top = np.argpartition(-scores, args.k)[:args.k]
+            exact_s += time.perf_counter() - t0
+            truth.append(set(top.tolist()))
+
+        for n_probe in args.probes:
+            hits, ann_s = 0, 0.0
+            for q, true_top in zip(queries, truth):
+                t0 = time.perf_counter()
+                found, _ = index.search(q, args.k, n_probe=n_probe)
+                ann_s += time.perf_counter() - t0
+                hits += len(true_top & set(found.tolist()))
+            print(
+                f"{n:>9} {index.n_lists:>6} {n_probe:>6} {hits / (args.k * len(queries)):>10.3f} "
+                f"{1e3 * ann_s / len(queries):>8.3f} {1e3 * exact_s / len(queries):>9.3f} {build_s:>8.2f}"
+            )
+        del x, index
+
+
+# -----------------------------
+# encoder
+# -----------------------------
+
+def bench_encoder(args):
+    import Model_Reccomendation as mr
+
+    texts = [c.desc for c in mr.load_companies_from_csv(mr.COMPANY_CSV).values()][:args.texts]
+    reference = mr.encode_texts(texts, backend="eager")
+
+    print(f"{'backend':>12} {'min cos':>8} {'mean cos':>9} {'load s':>7} {'single/s':>9} {'batch' + str(args.batch) + '/s':>10}")
+    for backend in args.backends:
+        try:
+            _, load_s = timed(lambda: mr._get_encoder(backend))
+        except ImportError as e:
+            print(f"{backend:>12} skipped ({e})")
+            continue
+        emb = mr.encode_texts(texts, backend=backend)
+        cos = (emb * reference).sum(dim=1)
+
+        singles = texts[:args.single]
+        _, single_s = timed(lambda: [mr.encode_text(t, backend=backend) for t in singles])
+        _, batch_s = timed(lambda: [
+            mr.encode_texts(texts[i:i + args.batch], backend=backend)
+            for i in range(0, len(texts), args.batch)
+        ])
+        print(
+            f"{backend:>12} {cos.min().item():>8.4f} {cos.mean().item():>9.4f} {load_s:>7.2f} "
+            f"{len(singles) / single_s:>9.1f} {len(texts) / batch_s:>10.1f}"
+        )
+
+
+# -----------------------------
+# batching
+# -----------------------------
+
+def bench_batching(args):
+    import Model_Reccomendation as mr
+    from Encoder_Batcher import EncoderBatcher
+
+    texts = [c.desc for c in mr.load_companies_from_csv(mr.COMPANY_CSV).values()]
+    mr._encode(texts[:2])  # load the model outside the timings
+
+    def run(encode, clients: int):
+        """Each client alternates single-text and --request-size calls."""
+        latencies, lock = [], threading.Lock()
+
+        def client(c: int):
+            rng = np.random.default_rng(c)
+            for r in range(args.requests):
+                size = 1 if r % 2 == 0 else args.request_size
+                batch = [texts[i] for i in rng.integers(0, len(texts), size)]
+                t0 = time.perf_counter()
+                encode(batch)
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+
+        threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - t0, np.array(latencies)
+
+    print(f"{'clients':>7} {'mode':>12} {'req/s':>8} {'p95 ms':>8} {'fill':>6} {'queue ms':>9}")
+    for clients in args.clients:
+        wall, lat = run(mr._encode, clients)
+        print(f"{clients:>7} {'unbatched':>12} {len(lat) / wall:>8.1f} {1e3 * np.percentile(lat, 95):>8.1f} {'-':>6} {'-':>9}")
+        for wait_ms in args.wait_ms:
+            batcher = EncoderBatcher(mr._encode, args.max_batch, wait_ms)
+            wall, lat = run(batcher.encode, clients)
+            st = batcher.stats()
+            print(
+                f"{clients:>7} {'wait=' + format(wait_ms, 'g') + 'ms':>12} {len(lat) / wall:>8.1f} "
+                f"{1e3 * np.percentile(lat, 95):>8.1f} {st['fill_rate']:>6.2f} {st['queue_delay_ms_mean']:>9.2f}"
+            )
+
+
+# -----------------------------
+# bulk
+# -----------------------------
+
+def bench_bulk(args):
+    import Model_Reccomendation as mr
+
+    descs = [c.desc for c in mr.load_companies_from_csv(mr.COMPANY_CSV).values()]
+    mr._encode(descs[:2])  # load the model outside the measurements
+
+    # Bucketed runs first: memory freed by the padded call stays with the
+    # allocator and would hide the bucketed run's own peak.
+    print(f"{'texts':>7} {'method':>9} {'seconds':>8} {'texts/s':>8} {'peak MB':>8}")
+    for n in args.texts:
+        texts = [descs[i % len(descs)] for i in range(n)]
+        results = {}
+        for method in sorted(args.methods):
+            if method == "padded":
+                fn = lambda: mr._encode(texts).numpy()
+            else:
+                fn = lambda: mr.encode_texts_bulk(texts, bucket_size=args.bucket_size, max_length=args.max_length).numpy()
+            gc.collect()
+            results[method], seconds, peak = peak_rss(fn)
+            print(f"{n:>7} {method:>9} {seconds:>8.2f} {n / seconds:>8.1f} {peak:>8.1f}")
+        if len(results) == 2:
+            cos = (results["padded"] * results["bucketed"]).sum(axis=1)
+            print(f"{n:>7} parity: min cosine bucketed vs padded {cos.min():.5f}")
+        del results
+
+
+# -----------------------------
+# fullcatalog
+# -----------------------------
+
+def bench_fullcatalog(args):
+    import Model_Reccomendation as mr
+
+    engine = mr.RecommendationEngine()
+    engine.load()
+    sides = [
+        ("investor", engine.investors, mr.recommend_companies_for_user, engine.user_interactions,
+         engine.user_model, engine.company_index),
+        ("company", engine.companies, mr.recommend_users_for_company, engine.company_interactions,
+         engine.company_model, engine.investor_index),
+    ]
+
+    print(f"{'side':>9} {'top_n':>6} {'scored':>7} {'ms/req':>7} {'p95 ms':>7} {'top5 changed':>13} {'mean overlap':>13}")
+    for side, requesters, recommend, interactions, model, index in sides:
+        rng = np.random.default_rng(0)
+        ids = rng.choice(list(requesters), min(args.requesters, len(requesters)), replace=False).tolist()
+
+        def call(rid, top_n, num):
+            return recommend(
+                rid, engine.investors, engine.companies, interactions, model,
+                num_recommendations=num, top_n=top_n,
+                investor_embeddings=engine.investor_embeddings,
+                company_embeddings=engine.company_embeddings,
+                profile_columns=engine.profile_columns,
+                candidate_index=index,
+            )
+
+        ranked = {}
+        for top_n in (args.top_n, None):
+            latencies = []
+            for rid in ids:
+                t0 = time.perf_counter()
+                call(rid, top_n, mr.NUM_RECOMMENDATIONS)
+                latencies.append(time.perf_counter() - t0)
+            # num >= candidates: sampling returns every scored candidate, sorted by probability
+            ranked[top_n] = {rid: call(rid, top_n, 10**9) for rid in ids}
+            scored = np.mean([len(r) for r in ranked[top_n].values()])
+            label = "all" if top_n is None else str(top_n)
+            if top_n is None:
+                top5 = [
+                    ({c for c, _, _ in ranked[args.top_n][rid][:5]}, {c for c, _, _ in ranked[None][rid][:5]})
+                    for rid in ids
+                ]
+                changed = np.mean([a != b for a, b in top5])
+                overlap = np.mean([len(a & b) / max(len(b), 1) for a, b in top5])
+                extra = f"{changed:>13.1%} {overlap:>13.2f}"
+            else:
+                extra = f"{'-':>13} {'-':>13}"
+            print(
+                f"{side:>9} {label:>6} {scored:>7.0f} {1e3 * np.mean(latencies):>7.2f} "
+                f"{1e3 * np.percentile(latencies, 95):>7.2f} {extra}"
+            )
+
+
+# -----------------------------
+# load
+# -----------------------------
+
+def scaled_database(src: Path, dst: Path, scale: int):
+    """Copy profile + interaction tables, replicated `scale` times with shifted ids."""
+    from Make_Database import CUI, DB_COMPANY_INFO, DB_USER_INFO, DDL_CHANGELOG, DDL_CORE, UCI
+
+    conn = sqlite3.connect(dst)
+    conn.executescript(DDL_CORE + DDL_CHANGELOG)
+    conn.execute("ATTACH DATABASE ? AS src", (str(src),))
+    max_u = conn.execute(f"SELECT MAX(user_id) FROM src.{DB_USER_INFO}").fetchone()[0]
+    max_c = conn.execute(f"SELECT MAX(company_id) FROM src.{DB_COMPANY_INFO}").fetchone()[0]
+    for k in range(scale):
+        du, dc = k * max_u, k * max_c
+        conn.execute(
+            f"INSERT INTO {DB_USER_INFO} SELECT user_id + {du}, U_name, U_invest_requirements, U_places, "
+            f"U_fund_stage, U_industry, U_check_size_max, U_check_size_min, U_website, U_pic_link "
+            f"FROM src.{DB_USER_INFO}"
+        )
+        conn.execute(
+            f"INSERT INTO {DB_COMPANY_INFO} SELECT company_id + {dc}, C_name, C_desc, C_place, "
+            f"C_funding_stage, C_industry, C_fund_size, C_link, C_img FROM src.{DB_COMPANY_INFO}"
+        )
+        conn.execute(f"INSERT INTO {UCI} SELECT u_id + {du}, c_id + {dc}, like_or_not, created_at FROM src.{UCI}")
+        conn.execute(f"INSERT INTO {CUI} SELECT c_id + {dc}, u_id + {du}, like_or_not, created_at FROM src.{CUI}")
+    conn.commit()
+    conn.execute(f"DELETE FROM engine_changelog")  # the copy is the baseline
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    conn.close()
+
+
+def export_csvs(db: Path, out: Path):
+    """The CSV files the original loaders read, from a (scaled) database."""
+    import pandas as pd
+
+    conn = sqlite3.connect(db)
+    users = pd.read_sql("SELECT * FROM user_info", conn).rename(columns={
+        "user_id": "U_id", "U_check_size_max": "U_check size max", "U_check_size_min": "U_check size min",
+    })
+    users.to_csv(out / "user_info.csv", index=False)
+    pd.read_sql("SELECT * FROM company_info", conn).rename(columns={"company_id": "C_id"}).to_csv(
+        out / "company_info.csv", index=False
+    )
+    pd.read_sql("SELECT u_id, c_id, like_or_not FROM user_to_company_interact", conn).to_csv(
+        out / "user_to_company_interact.csv", index=False
+    )
+    pd.read_sql("SELECT c_id, u_id, like_or_not FROM company_to_user_interact", conn).to_csv(
+        out / "company_to_user_interact.csv", index=False
+    )
+    conn.close()
+
+
+def bench_load(args):
+    import Model_Reccomendation as mr
+
+    src = mr.ROOT / "Data" / "invest.sqlite"
+    print(f"{'scale':>6} {'investors':>9} {'companies':>9} {'interactions':>12} {'loader':>7} {'seconds':>8} {'RSS MB':>8}")
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            db = tmp / "invest.sqlite"
+            scaled_database(src, db, scale)
+
+            loaders = ["db"]
+            if scale <= args.csv_max_scale:
+                export_csvs(db, tmp)
+                loaders.insert(0, "csv")
+            for loader in loaders:
+                gc.collect()
+                if loader == "csv":
+                    fn = lambda: (
+                        mr.load_investors_from_csv(tmp / "user_info.csv"),
+                        mr.load_companies_from_csv(tmp / "company_info.csv"),
+                        *mr.load_interactions(tmp / "user_to_company_interact.csv", tmp / "company_to_user_interact.csv"),
+                    )
+                else:
+                    fn = lambda: mr.load_from_db(sqlite3.connect(db))[:4]
+                (inv, comp, ui, ci), seconds, peak = peak_rss(fn)
+                n_inter = len(ui) + len(ci)
+                print(
+                    f"{scale:>6} {len(inv):>9} {len(comp):>9} {n_inter:>12} {loader:>7} "
+                    f"{seconds:>8.2f} {peak:>8.1f}"
+                )
+                del inv, comp, ui, ci
+
+
+# -----------------------------
+# interactions
+# -----------------------------
+
+def bench_interactions(args):
+    from Interaction_Store import InteractionStore, pack_pairs
+
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, args.requesters, args.interactions)
+    values = rng.integers(0, args.candidates, args.interactions)
+    candidate_ids = rng.permutation(args.candidates).astype(np.int64)
+    queries = rng.integers(0, args.requesters, args.queries).tolist()
+    batch = rng.integers(0, args.requesters, args.batch).tolist()
+    edits = list(zip(rng.integers(0, args.requesters, args.appends).tolist(),
+                     rng.integers(0, args.candidates, args.appends).tolist()))
+
+    def build_sets():
+        packed = np.unique(pack_pairs(keys, values))
+        owner, cands = (packed >> 32).tolist(), (packed & 0xFFFFFFFF).tolist()
+        rows: dict = {}
+        for k, v in zip(owner, cands):
+            rows.setdefault(k, set()).add(v)
+        return rows
+
+    def sets_mask(rows, key):
+        row = rows.get(key, set())
+        return np.isin(candidate_ids, np.fromiter(row, dtype=np.int64, count=len(row)))
+
+    def sets_masks(rows, ks):
+        return np.stack([sets_mask(rows, k) for k in ks])
+
+    def sets_add(rows):
+        for k, v in edits:
+            rows.setdefault(k, set()).add(v)
+
+    def store_add(store):
+        for k, v in edits:
+            store.add(k, v)
+
+    print(f"{args.interactions} interactions, {args.requesters} requesters, {args.candidates} candidates")
+    print(f"{'store':>10} {'build s':>8} {'held MB':>8} {'mask us':>8} {'batch' + str(args.batch) + ' ms':>11} {'append us':>10}")
+    for name in ("csr", "dict-sets"):
+        gc.collect()
+        before = rss_mb()
+        if name == "csr":
+            store, build = timed(lambda: InteractionStore.from_pairs(keys, values))
+            one = lambda k: store.exclusion_mask(k, candidate_ids)
+            many = lambda ks: store.exclusion_masks(ks, candidate_ids)
+            append = lambda: store_add(store)
+        else:
+            store, build = timed(build_sets)
+            one = lambda k: sets_mask(store, k)
+            many = lambda ks: sets_masks(store, ks)
+            append = lambda: sets_add(store)
+        gc.collect()
+        held = rss_mb() - before
+
+        _, mask_s = timed(lambda: [one(k) for k in queries])
+        _, batch_s = timed(lambda: many(batch))
+        _, append_s = timed(append)
+        print(
+            f"{name:>10} {build:>8.2f} {held:>8.1f} {mask_s / len(queries) * 1e6:>8.1f} "
+            f"{batch_s * 1000:>11.1f} {append_s / len(edits) * 1e6:>10.2f}"
+        )
+        del store, one, many, append
+
+
+# -----------------------------
+# concurrency
+# -----------------------------
+
+def bench_concurrency(args):
+    import Model_Reccomendation as mr
+    from Changelog_Sync import ChangeSet
+
+    engine = mr.RecommendationEngine(db_path=mr.ROOT / "Data" / "invest.sqlite")
+    engine.load()
+    mr.encode_text("warm-up")  # the writer's temporary profiles need the encoder
+    conn = sqlite3.connect(engine.db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    investor_ids, company_ids = list(engine.investors), list(engine.companies)
+
+    def reader(seed: int, stop: threading.Event, latencies: list, errors: list):
+        rng = np.random.default_rng(seed)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                if rng.random() < 0.5:
+                    recs = engine.recommend_for_investor(int(rng.choice(investor_ids)))
+                else:
+                    recs = engine.recommend_for_company(int(rng.choice(company_ids)))
+                assert len({pid for pid, _, _ in recs}) == len(recs)
+            except Exception as e:
+                errors.append(repr(e))
+            latencies.append(time.perf_counter() - start)
+
+    def writer(stop: threading.Event, writes: list, errors: list):
+        rng = np.random.default_rng(1)
+        temp_uid, temp_cid = max(investor_ids) + 1_000_000, max(company_ids) + 1_000_000
+        while not stop.is_set():
+            try:
+                uid, cid = int(rng.choice(investor_ids)), int(rng.choice(company_ids))
+                inv = conn.execute("SELECT * FROM user_info WHERE user_id = ?", (uid,)).fetchone()
+                comp = conn.execute("SELECT * FROM company_info WHERE company_id = ?", (cid,)).fetchone()
+                # Re-apply two existing profiles and add/remove a temporary pair
+                # of profiles, so column arrays and index lists grow and shrink
+                temp = engine.investors.get(temp_uid) is None
+                engine.apply_changes(ChangeSet(
+                    last_id=0,
+                    investors={uid: inv, temp_uid: dict(inv, user_id=temp_uid) if temp else None},
+                    companies={cid: comp, temp_cid: dict(comp, company_id=temp_cid) if temp else None},
+                ))
+                if not engine.user_interactions.has(uid, cid):
+                    engine.record_interaction("investor", uid, cid, True)
+                    engine.record_interaction("investor", uid, cid, False)
+                writes.append(1)
+            except Exception as e:
+                errors.append(repr(e))
+            time.sleep(args.write_interval_ms / 1000.0)
+
+    print(f"{'threads':>7} {'reads/s':>8} {'speedup':>8} {'p95 ms':>7} {'writes':>7} {'errors':>7}")
+    base = None
+    for n in args.threads:
+        stop, latencies, errors, writes = threading.Event(), [], [], []
+        threads = [threading.Thread(target=reader, args=(i, stop, latencies, errors)) for i in range(n)]
+        if args.write_interval_ms >= 0:
+            threads.append(threading.Thread(target=writer, args=(stop, writes, errors)))
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        rate = len(latencies) / args.seconds
+        base = base or rate
+        p95 = np.percentile(latencies, 95) * 1000 if latencies else 0.0
+        print(f"{n:>7} {rate:>8.1f} {rate / base:>8.2f} {p95:>7.1f} {len(writes):>7} {len(errors):>7}")
+        for err in sorted(set(errors))[:5]:
+            print(f"    {err}")
+    print(f"lock stats: {engine.stats()['locks']}")
+
+
+# -----------------------------
+# sampler
+# -----------------------------
+
+def bench_sampler(args):
+    from Gumbel_Sampler import gumbel_top_k, sample_pages
+
+    k, pk = args.page_size, args.page_size * args.pages
+    print(f"sampling latency (ms), k={k}; {args.pages} pages = one sample_pages() call vs choice of {pk}")
+    print(f"{'candidates':>10} {'choice':>8} {'gumbel':>8} {'hashed':>8} {'choice ' + str(pk):>10} {str(args.pages) + ' pages':>8}")
+    rng = np.random.default_rng(1)
+    for n in args.sizes:
+        probs = rng.uniform(0.01, 0.99, n)
+        cand_ids = rng.permutation(n * 4)[:n]
+        row = [
+            timed(lambda: np.random.choice(n, k, replace=False, p=probs / probs.sum()), args.repeat)[1],
+            timed(lambda: gumbel_top_k(probs, k, rng=rng), args.repeat)[1],
+            timed(lambda: gumbel_top_k(probs, k, ids=cand_ids, seed=7), args.repeat)[1],
+            timed(lambda: np.random.choice(n, pk, replace=False, p=probs / probs.sum()), args.repeat)[1],
+            timed(lambda: sample_pages(probs, k, range(args.pages), ids=cand_ids, seed=7), args.repeat)[1],
+        ]
+        print(f"{n:>10} " + " ".join(f"{ms * 1000:>{w}.3f}" for ms, w in zip(row, (8, 8, 8, 10, 8))))
+
+
+# -----------------------------
+# startup
+# -----------------------------
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / "Backend"
+SCRIPTS_DIR = ROOT / "Scripts"
+
+
+def import_breakdown(module: str) -> dict:
+    """{top-level package: self import seconds} for `import module` in a fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(BACKEND_DIR), str(SCRIPTS_DIR)]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    totals: dict = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0.0) + int(self_us) / 1e6
+    return totals
+
+
+def get_json(url: str):
+    """(status code, decoded JSON body) or (None, None) if nothing is listening yet."""
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+    except (urllib.error.URLError, ConnectionError):
+        return None, None
+
+
+def bench_startup(args):
+    for module in ("main", "Model_Reccomendation"):
+        totals = import_breakdown(module)
+        print(f"import {module}: {sum(totals.values()):.2f} s")
+        for package, seconds in sorted(totals.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"  {package:<28} {seconds:>7.3f} s")
+        print()
+
+    base = f"http://127.0.0.1:{args.port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL,
+    )
+    try:
+        health = ready = None
+        body = None
+        while time.perf_counter() - start < args.timeout:
+            if health is None and get_json(base + "/health")[0] == 200:
+                health = time.perf_counter() - start
+            if health is not None:
+                status, body = get_json(base + "/ready")
+                failed = body and any(c["state"] == "failed" for c in body["components"].values())
+                if status == 200 or failed:
+                    ready = time.perf_counter() - start if status == 200 else None
+                    break
+            time.sleep(0.05)
+
+        print(f"{'/health answers':<28} {health:>7.2f} s" if health is not None else "/health: no answer")
+        print(f"{'/ready reports ready':<28} {ready:>7.2f} s" if ready is not None else "/ready: not ready")
+        for name, status in (body or {}).get("components", {}).items():
+            seconds = f"{status['seconds']:>7.3f} s" if status["seconds"] is not None else f"{'-':>9}"
+            print(f"  {name:<26} {seconds}  {status['state']}" + (f" ({status['error']})" if status["error"] else ""))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# -----------------------------
+# enrichment
+# -----------------------------
+
+def bench_enrichment(args):
+    sys.path.insert(0, str(BACKEND_DIR))
+    import main
+
+    src = ROOT / "Data" / "invest.sqlite"
+    sides = (
+        ("company", "company_info", "company_id", main.COMPANY_CARD_COLUMNS),
+        ("investor", "user_info", "user_id", main.INVESTOR_CARD_COLUMNS),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "invest.sqlite"
+        scaled_database(src, db, args.scale)
+        rng = np.random.default_rng(0)
+
+        def per_row(table, key, columns, ids):
+            with closing(sqlite3.connect(db)) as conn:
+                out = {}
+                for pid in ids:
+                    row = conn.execute(f"SELECT {columns} FROM {table} WHERE {key} = ?", (pid,)).fetchone()
+                    if row:
+                        out[pid] = tuple(row)
+                return out
+
+        def batched(table, key, columns, ids):
+            with closing(sqlite3.connect(db)) as conn:
+                return main.fetch_rows_by_id(conn, table, key, columns, ids)
+
+        print(f"{'side':>8} {'num':>5} {'per-row ms':>10} {'batched ms':>10} {'speedup':>8} {'same':>5}")
+        for side, table, key, columns in sides:
+            with closing(sqlite3.connect(db)) as conn:
+                all_ids = [r[0] for r in conn.execute(f"SELECT {key} FROM {table}")]
+            for num in args.nums:
+                ids = [int(i) for i in rng.choice(all_ids, min(num, len(all_ids)), replace=False)]
+                old, old_s = timed(lambda: per_row(table, key, columns, ids), args.repeat)
+                new, new_s = timed(lambda: batched(table, key, columns, ids), args.repeat)
+                print(
+                    f"{side:>8} {num:>5} {1e3 * old_s:>10.3f} {1e3 * new_s:>10.3f} "
+                    f"{old_s / new_s:>7.1f}x {str(old == new):>5}"
+                )
+
+
+# -----------------------------
+# dbpool
+# -----------------------------
+
+def bench_dbpool(args):
+    with closing(sqlite3.connect(ROOT / "Data" / "invest.sqlite")) as conn:
+        user_ids = [r[0] for r in conn.execute("SELECT user_id FROM user_info")]
+    base = f"http://127.0.0.1:{args.port}"
+
+    def client(seed, deadline, latencies, errors):
+        rng = np.random.default_rng(seed)
+        conn = http.client.HTTPConnection("127.0.0.1", args.port, timeout=30)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", f"/api/investor/{rng.choice(user_ids)}")
+                resp = conn.getresponse()
+                resp.read()
+                ok = resp.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(1)
+        conn.close()
+
+    print(f"{'mode':>9} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'waits':>6} {'wait ms':>8}")
+    for mode in args.modes:
+        env = dict(os.environ, INVESTLINK_WARMUP="0", INVESTLINK_DB_POOL="1" if mode == "pooled" else "0")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+        )
+        try:
+            while get_json(base + "/health")[0] != 200:
+                time.sleep(0.05)
+            for clients in args.clients:
+                latencies, errors = [], []
+                deadline = time.perf_counter() + args.seconds
+                threads = [
+                    threading.Thread(target=client, args=(i, deadline, latencies, errors)) for i in range(clients)
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                lat = np.array(latencies) * 1e3
+                db = get_json(base + "/api/metrics")[1]["database"] or {}
+                print(
+                    f"{mode:>9} {clients:>7} {len(lat) / args.seconds:>8.0f} {np.percentile(lat, 50):>8.2f} "
+                    f"{np.percentile(lat, 99):>8.2f} {len(errors):>6} {db.get('waits', '-'):>6} "
+                    f"{db.get('mean_wait_ms', 0.0):>8.3f}"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+# -----------------------------
+# mixed
+# -----------------------------
+
+SEARCH_TERMS = ("ai", "health", "fin", "climate", "data", "seed", "bio", "energy", "robot", "cloud")
+
+
+def bench_mixed(args):
+    with closing(sqlite3.connect(ROOT / "Data" / "invest.sqlite")) as conn:
+        requesters = {
+            "investor": [r[0] for r in conn.execute("SELECT user_id FROM user_info")],
+            "company": [r[0] for r in conn.execute("SELECT company_id FROM company_info")],
+        }
+    base = f"http://127.0.0.1:{args.port}"
+
+    def client(paths, deadline, latencies, statuses):
+        conn = http.client.HTTPConnection("127.0.0.1", args.port, timeout=120)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", paths())
+                resp = conn.getresponse()
+                resp.read()
+                status = resp.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+        conn.close()
+
+    def recommendation_paths(seed):
+        rng = np.random.default_rng(seed)
+
+        def path():
+            side = "investor" if rng.random() < 0.5 else "company"
+            return f"/api/recommendations/{side}/{rng.choice(requesters[side])}?num=5&reciprocal={rng.random() < 0.5}"
+        return path
+
+    def search_paths(seed):
+        rng = np.random.default_rng(seed)
+        return lambda: f"/api/search/{rng.choice(['investors', 'companies'])}?q={rng.choice(SEARCH_TERMS)}"
+
+    env = dict(os.environ, INVESTLINK_WARMUP="1")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        start = time.perf_counter()
+        while get_json(base + "/ready")[0] != 200:
+            if time.perf_counter() - start > args.timeout:
+                raise RuntimeError("API did not become ready")
+            time.sleep(0.2)
+
+        print(
+            f"{'rec clients':>11} {'search/s':>8} {'search p50':>10} {'search p99':>10} "
+            f"{'rec/s':>6} {'rec p99':>8} {'rec 503':>7} {'rec err':>7} {'max queue':>9}"
+        )
+        for n_rec in args.rec_clients:
+            search_lat, search_status, rec_lat, rec_status = [], [], [], []
+            deadline = time.perf_counter() + args.seconds
+            threads = [
+                threading.Thread(target=client, args=(recommendation_paths(i), deadline, rec_lat, rec_status))
+                for i in range(n_rec)
+            ] + [
+                threading.Thread(target=client, args=(search_paths(1000 + i), deadline, search_lat, search_status))
+                for i in range(args.search_clients)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            metrics = get_json(base + "/api/metrics")[1] or {}
+            queue = (metrics.get("executors") or {}).get("recommendation") or {}
+            search_ms = np.array(search_lat) * 1e3
+            rec_ms = np.array(rec_lat) * 1e3 if rec_lat else np.zeros(1)
+            rejected = sum(s == 503 for s in rec_status)
+            print(
+                f"{n_rec:>11} {len(search_ms) / args.seconds:>8.0f} {np.percentile(search_ms, 50):>10.2f} "
+                f"{np.percentile(search_ms, 99):>10.2f} {len(rec_lat) / args.seconds:>6.1f} "
+                f"{np.percentile(rec_ms, 99):>8.1f} {rejected:>7} {len(rec_status) - len(rec_lat) - rejected:>7} "
+                f"{queue.get('max_queue_depth', '-'):>9}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# -----------------------------
+# logins
+# -----------------------------
+
+def bench_logins(args):
+    from Password_Hashing import hash_password
+
+    base = f"http://127.0.0.1:{args.port}"
+
+    def client(request, deadline, results):
+        conn = http.client.HTTPConnection("127.0.0.1", args.port, timeout=120)
+        while time.perf_counter() < deadline:
+            kind, method, path, body = request()
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers={"Content-Type": "application/json"} if body else {})
+                resp = conn.getresponse()
+                resp.read()
+                status = resp.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                status = None
+            results.append((kind, status, time.perf_counter() - start))
+        conn.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "invest.sqlite"
+        with closing(sqlite3.connect(ROOT / "Data" / "invest.sqlite")) as src, closing(sqlite3.connect(db)) as dst:
+            src.backup(dst)
+            user_ids = [r[0] for r in dst.execute("SELECT user_id FROM user_login ORDER BY user_id LIMIT ?", (args.accounts,))]
+            for uid in user_ids:
+                dst.execute("UPDATE user_login SET user_password = ? WHERE user_id = ?", (hash_password(f"pw-{uid}"), uid))
+            accounts = dst.execute("SELECT user_id, user_email FROM user_login WHERE user_id IN (%s)" % ",".join("?" * len(user_ids)), user_ids).fetchall()
+            companies = [r[0] for r in dst.execute("SELECT company_id FROM company_info")]
+            dst.commit()
+
+        def login_request(seed):
+            rng = np.random.default_rng(seed)
+
+            def request():
+                uid, email = accounts[rng.integers(len(accounts))]
+                return "login", "POST", "/api/login/investor", json.dumps({"email": email, "password": f"pw-{uid}"})
+            return request
+
+        def other_request(seed):
+            rng = np.random.default_rng(seed)
+
+            def request():
+                kind = ("profile", "search", "recommendation")[rng.integers(3)]
+                if kind == "profile":
+                    return kind, "GET", f"/api/investor/{accounts[rng.integers(len(accounts))][0]}", None
+                if kind == "search":
+                    return kind, "GET", f"/api/search/companies?q={rng.choice(SEARCH_TERMS)}", None
+                return kind, "GET", f"/api/recommendations/company/{rng.choice(companies)}?num=5", None
+            return request
+
+        print(
+            f"{'mode':>6} {'login/s':>7} {'login p99':>9} {'503':>5} {'profile p99':>11} "
+            f"{'search p99':>10} {'rec p99':>8} {'kdf p50':>8} {'kdf p99':>8}"
+        )
+        for mode in args.modes:
+            env = dict(
+                os.environ, INVESTLINK_DB=str(db), INVESTLINK_SNAPSHOT="0",
+                INVESTLINK_KDF_WORKERS="0" if mode == "inline" else str(args.kdf_workers),
+            )
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+            )
+            try:
+                start = time.perf_counter()
+                while get_json(base + "/ready")[0] != 200:
+                    if time.perf_counter() - start > args.timeout:
+                        raise RuntimeError("API did not become ready")
+                    time.sleep(0.2)
+
+                results = []
+                deadline = time.perf_counter() + args.seconds
+                threads = [
+                    threading.Thread(target=client, args=(login_request(i), deadline, results))
+                    for i in range(args.login_clients)
+                ] + [
+                    threading.Thread(target=client, args=(other_request(1000 + i), deadline, results))
+                    for i in range(args.other_clients)
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+                def p99(kind):
+                    ms = [1e3 * s for k, status, s in results if k == kind and status == 200]
+                    return np.percentile(ms, 99) if ms else float("nan")
+
+                logins = sum(k == "login" and status == 200 for k, status, _ in results)
+                rejected = sum(status == 503 for _, status, _ in results)
+                pool = ((get_json(base + "/api/metrics")[1] or {}).get("executors") or {}).get("password_hashing") or {}
+                hist = pool.get("latency_ms") or {}
+                print(
+                    f"{mode:>6} {logins / args.seconds:>7.1f} {p99('login'):>9.1f} {rejected:>5} {p99('profile'):>11.1f} "
+                    f"{p99('search'):>10.1f} {p99('recommendation'):>8.1f} "
+                    f"{str(hist.get('p50_ms', '-')):>8} {str(hist.get('p99_ms', '-')):>8}"
+                )
+            finally:
+                server.terminate()
+                server.wait()
+
+
+# -----------------------------
+# search
+# -----------------------------
+
+def synthetic_search_table(db: Path, n: int, seed: int = 0):
+    """company_info with n rows of names/descriptions/industries sampled from invest.sqlite's words."""
+    import re
+    from collections import Counter
+    from Make_Database import DB_COMPANY_INFO, DDL_CORE
+
+    with closing(sqlite3.connect(ROOT / "Data" / "invest.sqlite")) as src:
+        texts = src.execute(f"SELECT C_name, C_desc FROM {DB_COMPANY_INFO}").fetchall()
+        industries = [r[0] for r in src.execute(f"SELECT DISTINCT C_industry FROM {DB_COMPANY_INFO} WHERE C_industry != ''")]
+    counts = Counter(w for row in texts for text in row if text for w in re.findall(r"\w+", text.lower()))
+    words = np.array(list(counts))
+    p = np.array(list(counts.values()), dtype=np.float64)
+    p /= p.sum()
+
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(db)
+    conn.executescript(DDL_CORE)
+    for start in range(0, n, 50000):
+        m = min(n, start + 50000) - start
+        lengths = 2 + rng.integers(8, 40, m)  # two name words + description words
+        drawn = words[rng.choice(len(words), int(lengths.sum()), p=p)]
+        ends = np.cumsum(lengths)
+        rows = []
+        for i, (end, length) in enumerate(zip(ends, lengths)):
+            row = drawn[end - length:end]
+            name = " ".join(row[:2]).title()
+            desc = " ".join(row[2:]).capitalize() + "."
+            rows.append((start + i + 1, name, desc, "USA", "Seed", industries[i % len(industries)]))
+        conn.executemany(
+            f"INSERT INTO {DB_COMPANY_INFO} (company_id, C_name, C_desc, C_place, C_funding_stage, C_industry) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+    conn.commit()
+    return conn, words, counts
+
+
+def bench_search(args):
+    from Make_Database import DB_COMPANY_INFO, install_search_index
+    import Search_Index
+
+    columns = ("C_place", "C_industry", "C_img")
+    print(
+        f"{'N':>9} {'build s':>8} {'index MB':>8} {'queries':>8} {'like p50':>9} {'like p99':>9} "
+        f"{'fts p50':>8} {'fts p99':>8} {'p99 speedup':>11}"
+    )
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / "search.sqlite"
+            conn, words, counts = synthetic_search_table(db, n)
+            size = db.stat().st_size
+            _, build_s = timed(lambda: install_search_index(conn))
+            index_mb = (db.stat().st_size - size) / 2**20
+
+            rng = np.random.default_rng(1)
+            rare = [w for w in words if counts[w] == 1 and len(w) > 4]
+            typed = max((w for w in SEARCH_TERMS if len(w) > 4), key=len)
+            kinds = {
+                "common": list(SEARCH_TERMS),
+                "typing": [typed[:k] for k in range(1, len(typed) + 1)],
+                "rare": [str(w) for w in rng.choice(rare, min(10, len(rare)), replace=False)],
+                "none": ["zzqxv"],
+            }
+            for kind, queries in kinds.items():
+                def latencies(fn):
+                    ms = []
+                    for _ in range(args.repeat):
+                        for q in queries:
+                            t0 = time.perf_counter()
+                            fn(conn, DB_COMPANY_INFO, q, args.limit, columns)
+                            ms.append(1e3 * (time.perf_counter() - t0))
+                    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+                like50, like99 = latencies(Search_Index.search_like)
+                fts50, fts99 = latencies(Search_Index.search)
+                print(
+                    f"{n:>9} {build_s:>8.2f} {index_mb:>8.1f} {kind:>8} {like50:>9.3f} {like99:>9.3f} "
+                    f"{fts50:>8.3f} {fts99:>8.3f} {like99 / fts99:>10.1f}x"
+                )
+            conn.close()
+
+
+# -----------------------------
+# workers
+# -----------------------------
+
+def smaps_mb(pid: int) -> dict:
+    """Rss / Pss / Private (clean + dirty) of a process in MB (Linux smaps_rollup)."""
+    out = {"Rss": 0.0, "Pss": 0.0, "Private": 0.0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                out[key] += int(rest.split()[0]) / 1024
+            elif key in ("Private_Clean", "Private_Dirty"):
+                out["Private"] += int(rest.split()[0]) / 1024
+    return out
+
+
+def start_workers(n: int, db: Path, embeddings: Path, snapshot: Optional[Path], requests: int) -> list:
+    """n `Benchmarks.py worker` processes; each prints one JSON line once loaded and warmed."""
+    cmd = [sys.executable, str(Path(__file__).resolve()), "worker", "--db", str(db),
+           "--embeddings", str(embeddings), "--requests", str(requests)]
+    if snapshot is not None:
+        cmd += ["--snapshot", str(snapshot)]
+    return [
+        subprocess.Popen(cmd, cwd=SCRIPTS_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(n)
+    ]
+
+
+def wait_loaded(proc) -> dict:
+    for line in proc.stdout:
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"worker {proc.pid} exited with {proc.wait()}")
+
+
+def stop_workers(procs: list):
+    for proc in procs:
+        proc.stdin.close()
+    for proc in procs:
+        proc.wait()
+
+
+def bench_worker(args):
+    import Model_Reccomendation as mr
+
+    mr.EMBEDDINGS_DIR = Path(args.embeddings)
+    engine = mr.RecommendationEngine(
+        db_path=Path(args.db), snapshot_path=Path(args.snapshot) if args.snapshot else None,
+    )
+    _, seconds = timed(engine.load)
+    rng = np.random.default_rng(os.getpid())
+    for uid in rng.choice(list(engine.investors), args.requests):
+        engine.recommend_for_investor(int(uid))
+    for cid in rng.choice(list(engine.companies), args.requests):
+        engine.recommend_for_company(int(cid))
+    print(json.dumps({"load_seconds": seconds}), flush=True)
+    sys.stdin.read()  # serve until the parent closes stdin
+
+
+def bench_workers(args):
+    src = ROOT / "Data" / "invest.sqlite"
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db, embeddings, snapshot = tmp / "invest.sqlite", tmp / "Embeddings", tmp / "engine.snapshot"
+        scaled_database(src, db, args.scale)
+
+        # Encode the embeddings and write the snapshot once, outside the measurements
+        procs = start_workers(1, db, embeddings, snapshot, 0)
+        wait_loaded(procs[0])
+        stop_workers(procs)
+        print(f"scale {args.scale}: snapshot {snapshot.stat().st_size / 2**20:.1f} MB\n")
+
+        print(f"{'workers':>7} {'mode':>9} {'load s':>7} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>10} {'PSS total':>10}")
+        for n in args.workers:
+            for mode in ("private", "snapshot"):
+                procs = start_workers(n, db, embeddings, snapshot if mode == "snapshot" else None, args.requests)
+                try:
+                    loads = [wait_loaded(proc)["load_seconds"] for proc in procs]
+                    mem = [smaps_mb(proc.pid) for proc in procs]
+                finally:
+                    stop_workers(procs)
+                mean = {k: np.mean([m[k] for m in mem]) for k in mem[0]}
+                print(
+                    f"{n:>7} {mode:>9} {np.mean(loads):>7.2f} {mean['Rss']:>8.1f} {mean['Pss']:>8.1f} "
+                    f"{mean['Private']:>10.1f} {sum(m['Pss'] for m in mem):>10.1f}"
+                )
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
+def main():
+    ap = argparse.ArgumentParser(description="Recommendation stack benchmarks.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("ann", help="IVF index recall/latency vs exact cosine search")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--dim", type=int, default=384)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    p.set_defaults(fn=bench_ann)
+
+    p = sub.add_parser("encoder", help="Encoder backend parity + throughput")
+    p.add_argument("--backends", nargs="+", default=["eager", "int8", "torchscript", "onnx"])
+    p.add_argument("--texts", type=int, default=256, help="company descriptions to encode")
+    p.add_argument("--single", type=int, default=64, help="texts for the single-call throughput")
+    p.add_argument("--batch", type=int, default=32)
+    p.set_defaults(fn=bench_encoder)
+
+    p = sub.add_parser("batching", help="Concurrent encoder calls with/without micro-batching")
+    p.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    p.add_argument("--wait-ms", type=float, nargs="+", default=[0.0, 2.0, 5.0])
+    p.add_argument("--max-batch", type=int, default=32)
+    p.add_argument("--requests", type=int, default=20, help="calls per client")
+    p.add_argument("--request-size", type=int, default=30, help="texts per multi-text call")
+    p.set_defaults(fn=bench_batching)
+
+    p = sub.add_parser("bulk", help="Single padded call vs length-bucketed bulk encoding")
+    p.add_argument("--texts", type=int, nargs="+", default=[862, 5000])
+    p.add_argument("--methods", nargs="+", default=["padded", "bucketed"], choices=["padded", "bucketed"])
+    p.add_argument("--bucket-size", type=int, default=64)
+    p.add_argument("--max-length", type=int, default=256)
+    p.set_defaults(fn=bench_bulk)
+
+    p = sub.add_parser("fullcatalog", help="Full-catalog scoring vs the prefilter cut")
+    p.add_argument("--requesters", type=int, default=100, help="requesters sampled per side")
+    p.add_argument("--top-n", type=int, default=30, help="prefilter cut to compare against")
+    p.set_defaults(fn=bench_fullcatalog)
+
+    p = sub.add_parser("load", help="CSV loaders vs SQLite column loader at scale")
+    p.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    p.add_argument("--csv-max-scale", type=int, default=10, help="skip the (slow) CSV loaders above this scale")
+    p.set_defaults(fn=bench_load)
+
+    p = sub.add_parser("interactions", help="CSR interaction store vs dict-of-sets")
+    p.add_argument("--interactions", type=int, default=10_000_000)
+    p.add_argument("--requesters", type=int, default=100_000)
+    p.add_argument("--candidates", type=int, default=100_000)
+    p.add_argument("--queries", type=int, default=1000, help="single-requester masks timed")
+    p.add_argument("--batch", type=int, default=256, help="requesters per batched mask")
+    p.add_argument("--appends", type=int, default=200_000, help="swipes appended")
+    p.set_defaults(fn=bench_interactions)
+
+    p = sub.add_parser("concurrency", help="Multithreaded engine stress test (readers + writer)")
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--seconds", type=float, default=5.0, help="duration per thread count")
+    p.add_argument("--write-interval-ms", type=float, default=10.0, help="pause between writes (-1: no writer)")
+    p.set_defaults(fn=bench_concurrency)
+
+    p = sub.add_parser("sampler", help="Gumbel-top-k sampler latency")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    p.add_argument("--page-size", type=int, default=5, help="draws per page in the latency table")
+    p.add_argument("--pages", type=int, default=4, help="pages drawn in one sample_pages call")
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(fn=bench_sampler)
+
+    p = sub.add_parser("startup", help="API import-time breakdown, time to /health and /ready")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for /ready")
+    p.add_argument("--top", type=int, default=10, help="packages listed per import breakdown")
+    p.set_defaults(fn=bench_startup)
+
+    p = sub.add_parser("enrichment", help="Per-id SELECTs vs one IN (...) query for recommendation cards")
+    p.add_argument("--nums", type=int, nargs="+", default=[5, 50, 500])
+    p.add_argument("--scale", type=int, default=5, help="invest.sqlite replicated this many times (>= 500 investors)")
+    p.add_argument("--repeat", type=int, default=200)
+    p.set_defaults(fn=bench_enrichment)
+
+    p = sub.add_parser("dbpool", help="Per-request SQLite connections vs the connection pool under concurrent clients")
+    p.add_argument("--clients", type=int, nargs="+", default=[32])
+    p.add_argument("--seconds", type=float, default=10.0, help="duration per client count")
+    p.add_argument("--modes", nargs="+", default=["fresh", "pooled"], choices=["fresh", "pooled"])
+    p.add_argument("--port", type=int, default=8766)
+    p.set_defaults(fn=bench_dbpool)
+
+    p = sub.add_parser("mixed", help="Search latency under concurrent recommendation load")
+    p.add_argument("--rec-clients", type=int, nargs="+", default=[0, 16])
+    p.add_argument("--search-clients", type=int, default=8)
+    p.add_argument("--seconds", type=float, default=20.0, help="duration per recommendation client count")
+    p.add_argument("--port", type=int, default=8767)
+    p.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for /ready")
+    p.set_defaults(fn=bench_mixed)
+
+    p = sub.add_parser("logins", help="Login storm: PBKDF2 in the request path vs the hashing process pool")
+    p.add_argument("--login-clients", type=int, default=16)
+    p.add_argument("--other-clients", type=int, default=6)
+    p.add_argument("--accounts", type=int, default=50, help="investor logins given PBKDF2 hashes")
+    p.add_argument("--modes", nargs="+", default=["inline", "pool"], choices=["inline", "pool"])
+    p.add_argument("--kdf-workers", type=int, default=2)
+    p.add_argument("--seconds", type=float, default=20.0)
+    p.add_argument("--port", type=int, default=8768)
+    p.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for /ready")
+    p.set_defaults(fn=bench_logins)
+
+    p = sub.add_parser("search", help="LIKE '%%q%%' scan vs the FTS5 search index at scale")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--repeat", type=int, default=5, help="passes over each query kind")
+    p.set_defaults(fn=bench_search)
+
+    p = sub.add_parser("workers", help="Per-worker memory with and without the shared engine snapshot")
+    p.add_argument("--workers", type=int, nargs="+", default=[4, 8])
+    p.add_argument("--scale", type=int, default=30, help="invest.sqlite replicated this many times")
+    p.add_argument("--requests", type=int, default=50, help="requests per side each worker serves before measuring")
+    p.set_defaults(fn=bench_workers)
+
+    p = sub.add_parser("worker", help="(used by `workers`) one engine process")
+    p.add_argument("--db", required=True)
+    p.add_argument("--embeddings", required=True)
+    p.add_argument("--snapshot", default=None)
+    p.add_argument("--requests", type=int, default=50)
+    p.set_defaults(fn=bench_worker)
+
+    args = ap.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
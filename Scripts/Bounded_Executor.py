@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Bounded_Executor.py
+
+Awaitable wrapper around a concurrent.futures executor with a bounded
+queue and its own metrics, so one kind of work (recommendation scoring,
+database calls) runs on dedicated workers instead of Starlette's shared
+threadpool, and can't queue without limit.
+
+- at most `workers` calls run at once; up to `max_queue` more wait
+  (max_queue=None: unbounded)
+- a call arriving when the queue is full raises ExecutorFull right away
+  (the API answers 503) instead of adding to everyone's latency
+- stats(): in flight, current / peak queue depth, completed, failed,
+  rejected, and a latency histogram (queue wait + run time, fixed
+  millisecond buckets) with p50/p95/p99 read off it
+
+Works with thread and process pools alike: callables are submitted as-is,
+so for a process pool they must be picklable.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Callable, Dict, Optional, Sequence
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class ExecutorFull(RuntimeError):
+    """The executor's queue is at capacity."""
+
+
+class LatencyHistogram:
+    """Counts of observations per upper bound in ms (last bucket: above the largest bound)."""
+
+    def __init__(self, bounds_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = 1e3 * seconds
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty or above every bound)."""
+        if not self.total:
+            return None
+        rank, seen = q * self.total, 0
+        for bound, count in zip(self.bounds_ms, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def stats(self) -> Dict:
+        return {
+            "buckets": {f"le_{b:g}": c for b, c in zip(self.bounds_ms, self.counts)} | {"inf": self.counts[-1]},
+            "count": self.total,
+            "mean_ms": self.sum_ms / self.total if self.total else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+        }
+
+
+class BoundedExecutor:
+    """`await run(fn, *args)` on `executor`, with admission control."""
+
+    def __init__(self, executor: Executor, workers: int, max_queue: Optional[int] = None, name: str = "executor"):
+        self.executor = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.name = name
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latency = LatencyHistogram()
+
+    async def run(self, fn: Callable, *args):
+        with self._lock:
+            if self.max_queue is not None and self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorFull(f"{self.name} queue is full ({self.max_queue} waiting)")
+            self.in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.in_flight - self.workers)
+        start = time.perf_counter()
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._done(start, ok=False)
+            raise
+        # Counted when the work really ends, even if the awaiting request is cancelled first
+        future.add_done_callback(lambda f: self._done(start, ok=not f.cancelled() and f.exception() is None))
+        return await asyncio.wrap_future(future)
+
+    def _done(self, start: float, ok: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.latency.observe(time.perf_counter() - start)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return max(0, self.in_flight - self.workers)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - self.workers),
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "latency_ms": self.latency.stats(),
+            }
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Bulk_Encoder.py
+
+Length-bucketed, bounded-memory bulk encoding for Sentence-BERT.
+
+Tokenizing a whole catalog with padding=True pads every description to the
+longest one and materializes [N, T, D] activations in one forward pass.
+encode_bulk() instead:
+
+1. measures token lengths (in chunks, capped at `max_length`)
+2. sorts texts by length and cuts the order into buckets of `bucket_size`,
+   so each bucket is padded only to its own longest text
+3. runs one forward pass per bucket and writes the pooled, normalized rows
+   straight into a preallocated [N, D] float32 array at their original
+   positions (so the output keeps the input order)
+
+Peak memory is bounded by one bucket's activations regardless of N.
+Compared against the single padded call by `Benchmarks.py bulk`.
+"""
+
+from typing import Callable, List, Optional
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+BULK_BUCKET_SIZE = 64    # texts per forward pass
+ENCODER_MAX_LENGTH = 256  # token cap for every encode, bulk or live (MiniLM was trained on <= 256 tokens)
+LENGTH_CHUNK = 4096      # texts tokenized at a time when measuring lengths
+
+Forward = Callable[[torch.Tensor, torch.Tensor], torch.Tensor]  # (ids, mask) -> [B, T, D]
+
+
+def token_lengths(texts: List[str], tokenizer, max_length: int = ENCODER_MAX_LENGTH) -> np.ndarray:
+    """Truncated token count per text."""
+    lengths = np.empty(len(texts), dtype=np.int64)
+    for start in range(0, len(texts), LENGTH_CHUNK):
+        enc = tokenizer(texts[start:start + LENGTH_CHUNK], truncation=True, max_length=max_length)
+        lengths[start:start + LENGTH_CHUNK] = [len(ids) for ids in enc["input_ids"]]
+    return lengths
+
+
+def encode_bulk(
+    texts: List[str],
+    tokenizer,
+    forward: Forward,
+    bucket_size: int = BULK_BUCKET_SIZE,
+    max_length: int = ENCODER_MAX_LENGTH,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Mean-pooled, L2-normalized embeddings [N, D] in input order.
+    `out` may be a preallocated (e.g. memory-mapped) float32 array to fill.
+    """
+    order = np.argsort(token_lengths(texts, tokenizer, max_length), kind="stable")
+    for start in range(0, len(order), bucket_size):
+        rows = order[start:start + bucket_size]
+        enc = tokenizer(
+            [texts[i] for i in rows],
+            padding=True,
+            truncation=True,
+            max_length=max_length,
+            return_tensors="pt",
+        )
+        with torch.inference_mode():
+            tokens = forward(enc["input_ids"], enc["attention_mask"])
+            mask = enc["attention_mask"].unsqueeze(-1).to(tokens.dtype)
+            emb = (tokens * mask).sum(1) / torch.clamp(mask.sum(1), min=1e-9)
+            emb = F.normalize(emb, p=2, dim=1)
+        if out is None:
+            out = np.empty((len(texts), emb.shape[1]), dtype=np.float32)
+        out[rows] = emb.numpy()
+    if out is None:
+        out = np.zeros((0, 0), dtype=np.float32)
+    return out
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Changelog_Sync.py
+
+Reads the engine_changelog table (see Make_Database.py) so a running
+recommendation engine picks up registrations, profile edits and swipes
+made through the API, by this process or any other uvicorn worker.
+
+poll() is cheap when nothing changed: `PRAGMA data_version` on a private
+connection only changes when another connection commits. Otherwise it reads
+changelog rows past the last applied id, coalesces them per key and fetches
+the current state of each touched row, so replaying a change twice (or
+after the endpoint already applied it locally) is harmless.
+
+poll() does not move the reader forward: the engine calls mark_applied()
+once a batch is applied, so a batch that fails is read again on the next
+poll instead of being skipped. Each process records its applied id in
+engine_changelog_readers; prune() deletes the rows every live reader has
+applied, keeping those after `keep_after` (the id a snapshot replays from).
+A process registers with its starting id (0 before load), which holds
+pruning back until it knows where it is.
+"""
+
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from Make_Database import CHANGELOG, CHANGELOG_READERS, CUI, DB_COMPANY_INFO, DB_USER_INFO, DDL_CHANGELOG, UCI
+
+FETCH_CHUNK = 500  # ids per IN (...) query
+
+
+@dataclass
+class ChangeSet:
+    """Current state of every row touched since the last poll."""
+    last_id: int
+    data_version: Optional[int] = None  # PRAGMA data_version the batch was read at
+    investors: Dict[int, Optional[sqlite3.Row]] = field(default_factory=dict)  # None = deleted
+    companies: Dict[int, Optional[sqlite3.Row]] = field(default_factory=dict)
+    user_interactions: Dict[Tuple[int, int], bool] = field(default_factory=dict)     # (u_id, c_id) -> interacted
+    company_interactions: Dict[Tuple[int, int], bool] = field(default_factory=dict)  # (c_id, u_id) -> interacted
+
+    def __len__(self) -> int:
+        return len(self.investors) + len(self.companies) + len(self.user_interactions) + len(self.company_interactions)
+
+
+class ChangelogReader:
+    """Incremental reader over engine_changelog for one process."""
+
+    def __init__(self, db_path: Union[str, Path], last_id: int = 0):
+        self.db_path = Path(db_path)
+        self.last_id = last_id
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # Databases built before the changelog existed get it on first attach
+        self.conn.executescript(DDL_CHANGELOG)
+        self.pid = os.getpid()
+        self._record()
+
+    def close(self):
+        with self._lock:
+            self.conn.execute(f"DELETE FROM {CHANGELOG_READERS} WHERE pid = ?", (self.pid,))
+            self.conn.commit()
+        self.conn.close()
+
+    def latest_id(self) -> int:
+        """Id of the newest changelog row ever written (0 if none; pruning keeps it)."""
+        with self._lock:
+            return self.conn.execute(
+                f"""SELECT MAX(COALESCE((SELECT MAX(id) FROM {CHANGELOG}), 0),
+                           COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0))""",
+                (CHANGELOG,),
+            ).fetchone()[0]
+
+    def covers(self, after_id: int) -> bool:
+        """Whether every row after `after_id` is still in the changelog (none pruned)."""
+        with self._lock:
+            first = self.conn.execute(f"SELECT MIN(id) FROM {CHANGELOG}").fetchone()[0]
+        if first is None:
+            return self.latest_id() <= after_id
+        return first <= after_id + 1  # ids are consecutive (AUTOINCREMENT, rows only leave by pruning)
+
+    def _record(self):
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {CHANGELOG_READERS}(pid, last_id, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            (self.pid, self.last_id),
+        )
+        self.conn.commit()
+
+    def mark_applied(self, last_id: int, data_version: Optional[int] = None):
+        """Everything up to last_id is applied (after load, or after apply_changes() of a poll)."""
+        with self._lock:
+            self.last_id = last_id
+            if data_version is not None:
+                self._data_version = data_version
+            self._record()
+
+    def prune(self, keep_after: Optional[int] = None) -> int:
+        """
+        Delete changelog rows applied by every live reader (and <= keep_after).
+        Readers whose process is gone are dropped first. Returns rows deleted.
+        """
+        with self._lock:
+            live = {}
+            for r in self.conn.execute(f"SELECT pid, last_id FROM {CHANGELOG_READERS}").fetchall():
+                if _alive(r["pid"]):
+                    live[r["pid"]] = r["last_id"]
+                else:
+                    self.conn.execute(f"DELETE FROM {CHANGELOG_READERS} WHERE pid = ?", (r["pid"],))
+            bound = min(list(live.values()) + [self.last_id])
+            if keep_after is not None:
+                bound = min(bound, keep_after)
+            deleted = self.conn.execute(f"DELETE FROM {CHANGELOG} WHERE id <= ?", (bound,)).rowcount
+            self.conn.commit()
+            return deleted
+
+    def poll(self) -> Optional[ChangeSet]:
+        """Changes since the last applied batch, or None if the database is unchanged."""
+        with self._lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return None
+
+            rows = self.conn.execute(
+                f"SELECT id, table_name, key1, key2 FROM {CHANGELOG} WHERE id > ? ORDER BY id",
+                (self.last_id,),
+            ).fetchall()
+            if not rows:
+                self._data_version = version
+                return None
+
+            changes = ChangeSet(last_id=rows[-1]["id"], data_version=version)
+            touched: Dict[str, set] = {DB_USER_INFO: set(), DB_COMPANY_INFO: set(), UCI: set(), CUI: set()}
+            for row in rows:
+                key = row["key1"] if row["key2"] is None else (row["key1"], row["key2"])
+                touched.setdefault(row["table_name"], set()).add(key)
+
+            changes.investors = self._fetch_profiles(DB_USER_INFO, "user_id", touched[DB_USER_INFO])
+            changes.companies = self._fetch_profiles(DB_COMPANY_INFO, "company_id", touched[DB_COMPANY_INFO])
+            changes.user_interactions = self._fetch_interactions(UCI, "u_id", "c_id", touched[UCI])
+            changes.company_interactions = self._fetch_interactions(CUI, "c_id", "u_id", touched[CUI])
+            return changes
+
+    def _fetch_profiles(self, table: str, key: str, ids: set) -> Dict[int, Optional[sqlite3.Row]]:
+        out: Dict[int, Optional[sqlite3.Row]] = {pid: None for pid in ids}
+        ids = sorted(ids)
+        for start in range(0, len(ids), FETCH_CHUNK):
+            chunk = ids[start:start + FETCH_CHUNK]
+            marks = ",".join("?" for _ in chunk)
+            for row in self.conn.execute(f"SELECT * FROM {table} WHERE {key} IN ({marks})", chunk):
+                out[row[key]] = row
+        return out
+
+    def _fetch_interactions(self, table: str, k1: str, k2: str, pairs: set) -> Dict[Tuple[int, int], bool]:
+        """(k1, k2) -> True if the pair has an actual interaction (like_or_not 0/1)."""
+        out: Dict[Tuple[int, int], bool] = {}
+        by_first: Dict[int, List[int]] = {}
+        for a, b in pairs:
+            by_first.setdefault(a, []).append(b)
+            out[(a, b)] = False
+        for a, bs in by_first.items():
+            for start in range(0, len(bs), FETCH_CHUNK):
+                chunk = bs[start:start + FETCH_CHUNK]
+                marks = ",".join("?" for _ in chunk)
+                for row in self.conn.execute(
+                    f"SELECT {k2}, like_or_not FROM {table} WHERE {k1} = ? AND {k2} IN ({marks})",
+                    [a] + chunk,
+                ):
+                    out[(a, row[k2])] = row["like_or_not"] != -1
+        return out
+
+
+def _alive(pid: int) -> bool:
+    """Whether a process with this pid exists (readers share one host with the database)."""
+    if os.name == "nt":
+        return True  # no cheap check; never prune past a Windows reader
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Cursor_Store.py
+
+Server-side ranked lists behind opaque pagination cursors.
+
+The first page of a recommendation stream scores the candidates once and
+stores the ranked list here; the response carries a cursor token
+(session id + offset, base64url). Following pages only slice the stored
+list, so a swipe session is one scoring pass plus cheap page reads.
+
+- a session belongs to one owner (side, requester, mode); a token presented
+  by anyone else is rejected like an unknown one
+- an owner has at most one session: opening a new one replaces it, and
+  close() drops it (its tokens are rejected from then on)
+- a session's list only grows (extend() appends to it), so offsets stay
+  valid; `complete` marks a list that has nothing left to append
+- sessions expire `ttl` seconds after their last read and the store keeps
+  at most `max_sessions` sessions and `max_items` items in total (least
+  recently read dropped first)
+- offsets live in the token, not the session, so retrying a request with
+  the same cursor returns the same page
+"""
+
+import base64
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Tuple
+
+CURSOR_TTL_SECONDS = 900.0
+CURSOR_MAX_SESSIONS = 50_000
+CURSOR_MAX_ITEMS = 500_000
+
+
+class CursorError(LookupError):
+    """Unknown, expired, malformed or foreign cursor."""
+
+
+class _Session:
+    __slots__ = ("owner", "items", "complete", "expires")
+
+    def __init__(self, owner: Hashable, items: List, complete: bool, expires: float):
+        self.owner = owner
+        self.items = items
+        self.complete = complete
+        self.expires = expires
+
+
+class CursorStore:
+    """TTL + LRU map of session id -> (owner, ranked items)."""
+
+    def __init__(
+        self,
+        ttl: float = CURSOR_TTL_SECONDS,
+        max_sessions: int = CURSOR_MAX_SESSIONS,
+        max_items: int = CURSOR_MAX_ITEMS,
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_items = max_items
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._owned: Dict[Hashable, str] = {}  # owner -> its session id
+        self._items = 0
+        self._lock = threading.Lock()
+
+        self.opened = 0
+        self.reads = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def open(self, owner: Hashable, items: List, complete: bool = False) -> str:
+        """Store a ranked list for `owner`, replacing its previous one; returns the session id."""
+        sid = secrets.token_urlsafe(12)
+        with self._lock:
+            previous = self._owned.get(owner)
+            if previous is not None:
+                self._drop(previous)
+            self._sessions[sid] = _Session(owner, list(items), complete, time.monotonic() + self.ttl)
+            self._owned[owner] = sid
+            self._items += len(items)
+            self.opened += 1
+            while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_sessions or self._items > self.max_items
+            ):
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+        return sid
+
+    def read(self, token: str, owner: Hashable) -> Tuple[str, int, List, bool]:
+        """(session id, offset, items, complete) for a cursor token; refreshes the session's TTL."""
+        sid, offset = decode_cursor(token)
+        with self._lock:
+            session = self._live(sid)
+            if session is None or session.owner != owner or offset > len(session.items):
+                raise CursorError("cursor is unknown or has expired")
+            session.expires = time.monotonic() + self.ttl
+            self._sessions.move_to_end(sid)
+            self.reads += 1
+            return sid, offset, session.items, session.complete
+
+    def items(self, sid: str) -> Tuple[List, bool]:
+        """(items, complete) of a live session, without counting as a read."""
+        with self._lock:
+            session = self._live(sid)
+            if session is None:
+                raise CursorError("cursor is unknown or has expired")
+            return session.items, session.complete
+
+    def extend(self, sid: str, held: int, items: List, complete: bool) -> bool:
+        """
+        Append items to a session that still holds exactly `held` items.
+        False (nothing changed) if the session is gone or was extended by
+        someone else in the meantime.
+        """
+        with self._lock:
+            session = self._live(sid)
+            if session is None or len(session.items) != held:
+                return False
+            # New list rather than in place: readers keep slicing the one they got
+            session.items = session.items + list(items)
+            session.complete = complete
+            self._items += len(items)
+            while len(self._sessions) > 1 and self._items > self.max_items:
+                victim = next(iter(self._sessions))
+                if victim == sid:
+                    self._sessions.move_to_end(sid)
+                    continue
+                self._drop(victim)
+                self.evictions += 1
+            return True
+
+    def close(self, owner: Hashable):
+        """Drop the owner's session, if any."""
+        with self._lock:
+            sid = self._owned.get(owner)
+            if sid is not None:
+                self._drop(sid)
+
+    def _live(self, sid: str):
+        session = self._sessions.get(sid)
+        if session is not None and session.expires <= time.monotonic():
+            self._drop(sid)
+            self.expired += 1
+            session = None
+        return session
+
+    def _drop(self, sid: str):
+        session = self._sessions.pop(sid)
+        self._items -= len(session.items)
+        if self._owned.get(session.owner) == sid:
+            del self._owned[session.owner]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "items": self._items,
+                "opened": self.opened,
+                "reads": self.reads,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+def encode_cursor(sid: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{sid}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        sid, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except ValueError as e:  # bad base64 / utf-8 / layout all raise ValueError subclasses
+        raise CursorError("malformed cursor") from e
+    if offset < 0:
+        raise CursorError("malformed cursor")
+    return sid, offset
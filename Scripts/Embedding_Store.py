@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Embedding_Store.py
+
+Persistent, memory-mapped embedding matrix for profile descriptions.
+
+Each store is a pair of files in Data/Embeddings/:
+- <name>.npy  : float32 [N, D] matrix of L2-normalized description embeddings
+- <name>.json : {"model": ..., "dim": D, "ids": [...], "hashes": [...]}
+
+Rows are keyed by profile id plus a content hash of the description, so
+sync() only re-encodes profiles whose description changed. Serving code
+reads rows from the memory-mapped matrix instead of running the encoder.
+
+upsert() / remove() apply live profile changes without rewriting the file:
+changed rows go to an in-memory overlay that shadows the matrix, and are
+persisted by the next sync().
+
+Several processes (uvicorn workers) may share a store: open() and sync()
+hold a file lock next to the matrix (Engine_Snapshot.snapshot_lock), so a
+reader never pairs a matrix with another writer's metadata, and a worker
+that waited for another's sync finds the store already up to date. Temp
+files are per process.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from Engine_Snapshot import snapshot_lock
+
+ENCODE_BATCH_SIZE = 64  # texts per encoder call while (re)building a store
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a description, used to detect edits."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """On-disk embedding matrix keyed by profile id and description hash."""
+
+    def __init__(self, directory: Path, name: str, model_name: str):
+        self.directory = Path(directory)
+        self.npy_path = self.directory / f"{name}.npy"
+        self.meta_path = self.directory / f"{name}.json"
+        self.model_name = model_name
+        self.ids: List[int] = []
+        self.hashes: List[str] = []
+        self.matrix: Optional[np.ndarray] = None
+        self._row: Dict[int, int] = {}
+        self._overlay: Dict[int, np.ndarray] = {}  # live upserts shadowing the matrix
+        self._overlay_hash: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._row) + len(self._overlay)
+
+    def __contains__(self, pid: int) -> bool:
+        return pid in self._row or pid in self._overlay
+
+    @property
+    def dim(self) -> int:
+        if self.matrix is None:
+            return len(next(iter(self._overlay.values()))) if self._overlay else 0
+        return int(self.matrix.shape[1])
+
+    def open(self) -> bool:
+        """
+        Memory-map an existing store. Returns False (and leaves the store
+        empty) if the files are missing, inconsistent or from another model.
+        """
+        with snapshot_lock(self.npy_path):
+            return self._open()
+
+    def _open(self) -> bool:
+        self.ids, self.hashes, self.matrix, self._row = [], [], None, {}
+        self._overlay, self._overlay_hash = {}, {}
+        if not (self.npy_path.exists() and self.meta_path.exists()):
+            return False
+        try:
+            meta = json.loads(self.meta_path.read_text())
+            matrix = np.load(self.npy_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return False
+        if meta.get("model") != self.model_name or matrix.shape[0] != len(meta["ids"]):
+            return False
+
+        self.ids = [int(i) for i in meta["ids"]]
+        self.hashes = list(meta["hashes"])
+        self.matrix = matrix
+        self._row = {pid: i for i, pid in enumerate(self.ids)}
+        return True
+
+    def sync(
+        self,
+        texts: Dict[int, str],
+        encode_fn: Callable[[List[str]], object],
+        batch_size: Optional[int] = ENCODE_BATCH_SIZE,
+    ) -> int:
+        """
+        Make the store match `texts` ({profile_id: description}).
+
+        Only new profiles and profiles whose description hash changed are
+        passed to `encode_fn`, `batch_size` at a time (None: all in one call,
+        for encoders that bucket internally); everything else is copied from
+        the existing matrix. Returns the number of re-encoded descriptions.
+        """
+        with snapshot_lock(self.npy_path):
+            return self._sync(texts, encode_fn, batch_size)
+
+    def _sync(self, texts: Dict[int, str], encode_fn: Callable[[List[str]], object], batch_size: Optional[int]) -> int:
+        if self.matrix is None:
+            self._open()
+
+        ids = list(texts.keys())
+        hashes = [content_hash(texts[pid]) for pid in ids]
+        stale = [
+            i for i, (pid, h) in enumerate(zip(ids, hashes))
+            if pid not in self._row or self.hashes[self._row[pid]] != h
+        ]
+        if not stale and ids == self.ids:
+            return 0
+
+        fresh: Dict[int, np.ndarray] = {}
+        step = batch_size or max(len(stale), 1)
+        for start in range(0, len(stale), step):
+            chunk = stale[start:start + step]
+            embs = np.asarray(encode_fn([texts[ids[i]] for i in chunk]), dtype=np.float32)
+            for i, emb in zip(chunk, embs):
+                fresh[i] = emb
+
+        dim = self.dim or (len(next(iter(fresh.values()))) if fresh else 0)
+        stale_set = set(stale)
+        self._write(ids, hashes, dim, lambda i: fresh[i] if i in stale_set else self.matrix[self._row[ids[i]]])
+        self._open()
+        return len(stale)
+
+    def _write(self, ids: List[int], hashes: List[str], dim: int, row_fn: Callable[[int], np.ndarray]):
+        """Write matrix + metadata to temp files and swap them in (caller holds the lock)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_npy = self.npy_path.with_name(f"{self.npy_path.name}.{os.getpid()}.tmp")
+        tmp_meta = self.meta_path.with_name(f"{self.meta_path.name}.{os.getpid()}.tmp")
+
+        out = np.lib.format.open_memmap(tmp_npy, mode="w+", dtype=np.float32, shape=(len(ids), dim))
+        for i in range(len(ids)):
+            out[i] = row_fn(i)
+        out.flush()
+        del out
+
+        tmp_meta.write_text(json.dumps({
+            "model": self.model_name,
+            "dim": dim,
+            "ids": ids,
+            "hashes": hashes,
+        }))
+        os.replace(tmp_npy, self.npy_path)
+        os.replace(tmp_meta, self.meta_path)
+
+    def upsert(self, texts: Dict[int, str], encode_fn: Callable[[List[str]], object]) -> int:
+        """
+        Live update: encode new/changed descriptions into the overlay.
+        Returns the number of re-encoded descriptions.
+        """
+        stale = []
+        for pid, text in texts.items():
+            h = content_hash(text)
+            if pid in self._overlay:
+                current = self._overlay_hash[pid]
+            else:
+                current = self.hashes[self._row[pid]] if pid in self._row else None
+            if current != h:
+                stale.append((pid, h))
+        if not stale:
+            return 0
+
+        embs = np.asarray(encode_fn([texts[pid] for pid, _ in stale]), dtype=np.float32)
+        for (pid, h), emb in zip(stale, embs):
+            self._row.pop(pid, None)
+            self._overlay[pid] = emb
+            self._overlay_hash[pid] = h
+        return len(stale)
+
+    def remove(self, pids: Sequence[int]):
+        """Live delete: the ids disappear from lookups (and from the next sync)."""
+        for pid in pids:
+            self._row.pop(pid, None)
+            self._overlay.pop(pid, None)
+            self._overlay_hash.pop(pid, None)
+
+    def vector(self, pid: int) -> np.ndarray:
+        """Embedding row for one profile id (copied out of the mmap)."""
+        if pid in self._overlay:
+            return self._overlay[pid].copy()
+        return np.array(self.matrix[self._row[pid]])
+
+    def vectors(self, pids: Sequence[int]) -> np.ndarray:
+        """Embedding rows for many profile ids, [len(pids), D]."""
+        if not len(pids):
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if not self._overlay:
+            rows = np.fromiter((self._row[pid] for pid in pids), dtype=np.int64, count=len(pids))
+            return self.matrix[rows]
+        rows = np.fromiter((self._row.get(pid, -1) for pid in pids), dtype=np.int64, count=len(pids))
+        out = self.matrix[np.maximum(rows, 0)] if self.matrix is not None else np.zeros((len(pids), self.dim), dtype=np.float32)
+        for i in np.flatnonzero(rows < 0):
+            out[i] = self._overlay[pids[i]]
+        return out
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Encoder_Batcher.py
+
+In-process micro-batching for the text encoder.
+
+Concurrent recommendation requests each want a few embeddings (batch size 1
+for the requester, a handful for new candidates). Running each call as its
+own forward pass makes them contend for torch's intra-op threads. Instead,
+callers enqueue their texts and block; one worker thread collects pending
+texts until `max_batch_size` texts are queued or `max_wait_ms` has passed
+since the first one arrived, runs a single padded forward pass and hands
+every caller its rows.
+
+A request larger than max_batch_size runs as its own batch; requests are
+never split.
+
+stats() reports batch fill rate (texts per batch / max_batch_size) and the
+queueing delay between submit and the start of the forward pass.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 5.0
+STATS_WINDOW = 2048  # recent batches/requests kept for percentiles
+
+
+class _Request:
+    __slots__ = ("texts", "submitted", "done", "result", "error")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class EncoderBatcher:
+    """Collects texts from concurrent callers into shared forward passes."""
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], object],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._pending: "queue.Queue[_Request]" = queue.Queue()
+        self._carry: Optional[_Request] = None
+        self._worker = None
+        self._lock = threading.Lock()
+
+        self._batches = 0
+        self._texts = 0
+        self._fill = deque(maxlen=STATS_WINDOW)
+        self._delays = deque(maxlen=STATS_WINDOW)
+
+    def encode(self, texts: List[str]):
+        """Embeddings for `texts` ([N, D]), computed in a shared batch."""
+        if not texts:
+            return self.encode_fn(texts)
+        req = _Request(list(texts))
+        self._ensure_worker()
+        self._pending.put(req)
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="encoder-batcher", daemon=True)
+                    self._worker.start()
+
+    def _collect(self) -> List[_Request]:
+        first = self._carry or self._pending.get()
+        self._carry = None
+        batch, n = [first], len(first.texts)
+        deadline = time.perf_counter() + self.max_wait
+        while n < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                req = self._pending.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if n + len(req.texts) > self.max_batch_size:
+                self._carry = req  # starts the next batch
+                break
+            batch.append(req)
+            n += len(req.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [t for req in batch for t in req.texts]
+            start = time.perf_counter()
+            try:
+                out = self.encode_fn(texts)
+                offset = 0
+                for req in batch:
+                    req.result = out[offset:offset + len(req.texts)]
+                    offset += len(req.texts)
+            except BaseException as e:
+                for req in batch:
+                    req.error = e
+            with self._lock:
+                self._batches += 1
+                self._texts += len(texts)
+                self._fill.append(min(1.0, len(texts) / self.max_batch_size))
+                self._delays.extend(start - req.submitted for req in batch)
+            for req in batch:
+                req.done.set()
+
+    def stats(self) -> Dict[str, float]:
+        """Batch fill rate and queueing delay over the recent window."""
+        with self._lock:
+            delays = np.array(self._delays) * 1000.0
+            fill = np.array(self._fill)
+            batches, texts = self._batches, self._texts
+        return {
+            "batches": batches,
+            "texts": texts,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "mean_batch_size": texts / batches if batches else 0.0,
+            "fill_rate": float(fill.mean()) if len(fill) else 0.0,
+            "queue_delay_ms_mean": float(delays.mean()) if len(delays) else 0.0,
+            "queue_delay_ms_p50": float(np.percentile(delays, 50)) if len(delays) else 0.0,
+            "queue_delay_ms_p95": float(np.percentile(delays, 95)) if len(delays) else 0.0,
+        }
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Engine_Snapshot.py
+
+Single-file snapshot of the engine's numeric arrays, opened read-only with
+mmap so every uvicorn worker shares the same physical pages (OS page cache)
+instead of holding a private copy.
+
+Layout:
+- 8-byte magic + 8-byte little-endian header length
+- JSON header: {"format", "meta", "arrays": {name: {"dtype", "shape", "offset"}}}
+- raw C-order array data, each array starting on a 64-byte boundary
+
+open_snapshot() returns zero-copy, read-only numpy views into the mapping;
+nothing is read from disk until a page is touched. Snapshots are written to
+a temp file and swapped in with os.replace, so readers never see a partial
+file, and snapshot_lock() lets one worker build while the others wait.
+
+Code that edits snapshot arrays copies them first (copy-on-write at the
+array level); see Profile_Columns.py, Ann_Index.py and Interaction_Store.py.
+"""
+
+import json
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, workers may build concurrently
+    fcntl = None
+
+MAGIC = b"INVLSNAP"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_snapshot(path: Path, arrays: Dict[str, np.ndarray], meta: Dict):
+    """Write `arrays` (+ JSON-serializable `meta`) to `path` atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    entries, offset = {}, 0
+    for name, a in arrays.items():
+        entries[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset = _aligned(offset + a.nbytes)
+    header = json.dumps({"format": FORMAT_VERSION, "meta": meta, "arrays": entries}).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, a in arrays.items():
+            f.seek(data_start + entries[name]["offset"])
+            f.write(a.data if a.nbytes else b"")
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Snapshot:
+    """Read-only mapping of a snapshot file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not an engine snapshot")
+        (header_len,) = struct.unpack("<Q", self._mm[len(MAGIC):len(MAGIC) + 8])
+        header = json.loads(self._mm[len(MAGIC) + 8:len(MAGIC) + 8 + header_len])
+        if header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported snapshot format {header.get('format')}")
+        self.meta: Dict = header["meta"]
+        self._entries: Dict[str, Dict] = header["arrays"]
+        self._data_start = _aligned(len(MAGIC) + 8 + header_len)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        e = self._entries[name]
+        dtype = np.dtype(e["dtype"])
+        count = int(np.prod(e["shape"], dtype=np.int64))
+        if not count:
+            return np.zeros(e["shape"], dtype=dtype)
+        a = np.frombuffer(self._mm, dtype=dtype, count=count, offset=self._data_start + e["offset"])
+        return a.reshape(e["shape"])
+
+    def arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        """All arrays named '<prefix><key>', as {key: array}."""
+        return {name[len(prefix):]: self[name] for name in self._entries if name.startswith(prefix)}
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mm)
+
+
+def open_snapshot(path: Path) -> Optional[Snapshot]:
+    """Map a snapshot, or None if it is missing or unreadable."""
+    try:
+        return Snapshot(path)
+    except (OSError, ValueError, KeyError) as e:
+        if Path(path).exists():
+            print(f"Ignoring engine snapshot {path}: {e}")
+        return None
+
+
+@contextmanager
+def snapshot_lock(path: Path):
+    """Exclusive cross-process lock next to the snapshot (held while building)."""
+    path = Path(path)
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
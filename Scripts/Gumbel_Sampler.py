@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Gumbel_Sampler.py
+
+Weighted sampling without replacement in one vectorized pass (Gumbel-top-k).
+
+Adding independent Gumbel(0, 1) noise to log(p_i) and keeping the k largest
+keys draws k items with exactly the distribution of sequential sampling
+without replacement proportional to p (what
+np.random.choice(n, k, replace=False, p=p) does), in the order they would
+have been drawn. It is computed here in its equivalent exponential-race
+form: the k smallest E_i / p_i with E_i ~ Exp(1) (E_i = exp(-G_i)), which
+needs no logarithms. One noise draw, one divide and one argpartition over
+the candidates replace k renormalizing passes.
+
+- temperature T samples from p^(1/T): T < 1 sharpens towards the top
+  scores, T > 1 flattens towards uniform
+- hashed_exponential(ids, seed) derives the noise from (seed, candidate id), so
+  a requester seeded with requester_seed() gets the same order on every
+  call (stable, cacheable), and a candidate keeps its key when others are
+  added or swiped away
+- pages are consecutive slices of one key order: sample_pages() returns
+  any set of pages from a single pass, pages never overlap, and page p is a
+  function of (requester, p) only
+
+tests/test_gumbel_sampler.py checks the ordered draws against the exact
+sequential-without-replacement probabilities; speed against
+np.random.choice at 1k/100k/1M candidates is measured by
+`Benchmarks.py sampler`.
+"""
+
+import zlib
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def requester_seed(side: str, requester_id: int, base: int = 0) -> int:
+    """Stable 64-bit sampling seed for one requester (independent of PYTHONHASHSEED)."""
+    key = zlib.crc32(side.encode()) << 32 | (int(requester_id) & 0xFFFFFFFF)
+    return (key ^ base * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    # In place on a uint64 copy; the arithmetic wraps, which the mixer relies on
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def hashed_exponential(ids: np.ndarray, seed: int) -> np.ndarray:
+    """Exp(1) noise that is a pure function of (seed, id)."""
+    x = np.asarray(ids).astype(np.uint64) ^ _splitmix64(np.array([seed & 0xFFFFFFFFFFFFFFFF], dtype=np.uint64))
+    x = _splitmix64(x) >> np.uint64(11)
+    u = (x.astype(np.float64) + 0.5) * (1.0 / (1 << 53))  # uniform on (0, 1)
+    return -np.log(u)
+
+
+def race_keys(
+    probs: np.ndarray,
+    temperature: float = 1.0,
+    rng: Optional[np.random.Generator] = None,
+    ids: Optional[np.ndarray] = None,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    E / p ** (1 / T); the smallest keys are drawn first. Noise comes from
+    hashed_exponential(ids, seed) when both are given, else from rng (a
+    fresh Generator if None).
+    """
+    weights = np.asarray(probs, dtype=np.float64)
+    if temperature != 1.0:
+        weights = weights ** (1.0 / temperature)
+    if ids is not None and seed is not None:
+        noise = hashed_exponential(ids, seed)
+    else:
+        noise = (rng or np.random.default_rng()).standard_exponential(len(weights))
+    with np.errstate(divide="ignore"):
+        noise /= weights  # zero weights -> inf, never drawn before positive ones
+    return noise
+
+
+def bottom_k_by_key(keys: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k smallest keys, smallest first."""
+    k = min(k, len(keys))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(keys, k - 1)[:k] if k < len(keys) else np.arange(len(keys))
+    return top[np.argsort(keys[top], kind="stable")]
+
+
+def gumbel_top_k(probs: np.ndarray, k: int, temperature: float = 1.0, **noise) -> np.ndarray:
+    """
+    k indices drawn without replacement proportional to probs ** (1 / T),
+    in draw order. `noise` is passed to race_keys (rng, or ids + seed).
+    """
+    return bottom_k_by_key(race_keys(probs, temperature, **noise), k)
+
+
+def sample_pages(
+    probs: np.ndarray,
+    page_size: int,
+    pages: Sequence[int],
+    temperature: float = 1.0,
+    **noise,
+) -> List[np.ndarray]:
+    """
+    Pages (0-based) of one draw order, from a single pass: page p holds
+    draws [p * page_size, (p + 1) * page_size). Pages past the end are empty.
+    """
+    if not pages:
+        return []
+    order = gumbel_top_k(probs, (max(pages) + 1) * page_size, temperature, **noise)
+    return [order[p * page_size:(p + 1) * page_size] for p in pages]
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Interaction_Store.py
+
+Compact store of "requester already interacted with candidate" pairs
+(investor -> companies, company -> investors), replacing Dict[int, set].
+
+- CSR layout: a sorted int64 array of requester ids, int64 row offsets and
+  one flat int32 array of candidate ids, sorted within each row
+  (~4 bytes per interaction instead of ~70 for a set entry + int object)
+- add() / discard() (swipes, reverted swipes) replace the requester's row
+  in a small overlay of "dirty" rows (sorted arrays, O(row) per edit);
+  once the overlay holds more than
+  max(COMPACT_MIN, nnz / COMPACT_FRACTION) edits it is merged back into
+  the arrays in one sort, so appends are amortized O(log nnz)
+- exclusion_mask() / exclusion_masks() mark already-interacted candidates
+  of one or many requesters over a candidate id array in one numpy call
+  (isin / searchsorted), no Python loop over candidates
+- the CSR arrays are never written in place, so a store can sit directly
+  on read-only arrays mapped from an engine snapshot (from_arrays)
+
+Memory and latency against dict-of-sets are measured by
+`Benchmarks.py interactions`; tests/test_interaction_store.py checks the
+masks against the dict-of-sets baseline.
+"""
+
+import threading
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+COMPACT_MIN = 4096     # overlay edits always allowed before merging
+COMPACT_FRACTION = 8   # ... or nnz / COMPACT_FRACTION, whichever is larger
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+def pack_pairs(keys, values) -> np.ndarray:
+    """(key << 32 | value) int64s; values must fit in int32."""
+    keys = np.asarray(keys, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    if len(values) and (values.min() < 0 or values.max() > np.iinfo(np.int32).max):
+        raise ValueError("candidate ids must be non-negative int32 values")
+    return (keys << 32) | values
+
+
+class InteractionStore:
+    """requester id -> sorted candidate ids, as CSR arrays plus an edit overlay."""
+
+    def __init__(self, keys: np.ndarray, indptr: np.ndarray, indices: np.ndarray):
+        # Swapped as one tuple on compaction so readers never see a mix
+        self._csr: Tuple[np.ndarray, np.ndarray, np.ndarray] = (keys, indptr, indices)
+        self._dirty: Dict[int, np.ndarray] = {}  # requester id -> full current row
+        self._edits = 0
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Construction
+    # -----------------------------
+
+    @classmethod
+    def from_packed(cls, packed: np.ndarray) -> "InteractionStore":
+        """Build from (key << 32 | value) int64s (duplicates allowed)."""
+        packed = np.sort(np.asarray(packed, dtype=np.int64))  # by key, then value
+        if len(packed) > 1:
+            packed = packed[np.r_[True, packed[1:] != packed[:-1]]]
+        keys_all = packed >> 32
+        starts = np.flatnonzero(np.r_[True, keys_all[1:] != keys_all[:-1]]) if len(packed) else np.zeros(0, dtype=np.int64)
+        keys = keys_all[starts]
+        del keys_all
+        indptr = np.append(starts, len(packed)).astype(np.int64)
+        return cls(keys, indptr, (packed & 0xFFFFFFFF).astype(np.int32))
+
+    @classmethod
+    def from_pairs(cls, keys: Sequence[int], values: Sequence[int]) -> "InteractionStore":
+        return cls.from_packed(pack_pairs(keys, values))
+
+    @classmethod
+    def from_dict(cls, rows: Dict[int, Iterable[int]]) -> "InteractionStore":
+        """Build from {requester id: candidate ids} (e.g. the CSV loaders)."""
+        keys = [k for k, vs in rows.items() for _ in vs]
+        values = [v for vs in rows.values() for v in vs]
+        return cls.from_pairs(keys, values)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "InteractionStore":
+        """Inverse of to_arrays(); the arrays are used as-is (no copy)."""
+        return cls(arrays["keys"], arrays["indptr"], arrays["indices"])
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Pending edits merged, then the CSR arrays."""
+        with self._lock:
+            self._compact()
+            keys, indptr, indices = self._csr
+        return {"keys": keys, "indptr": indptr, "indices": indices}
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+
+    def _base_row(self, key: int) -> np.ndarray:
+        keys, indptr, indices = self._csr
+        i = int(np.searchsorted(keys, key))
+        if i < len(keys) and keys[i] == key:
+            return indices[indptr[i]:indptr[i + 1]]
+        return _EMPTY
+
+    def get(self, key: int) -> np.ndarray:
+        """Sorted int32 candidate ids the requester interacted with (read-only)."""
+        # Overlay first: compaction swaps the arrays before clearing it
+        row = self._dirty.get(key)
+        return row if row is not None else self._base_row(key)
+
+    def has(self, key: int, value: int) -> bool:
+        row = self.get(key)
+        i = int(np.searchsorted(row, value))
+        return i < len(row) and row[i] == value
+
+    def count(self, key: int) -> int:
+        return len(self.get(key))
+
+    def __len__(self) -> int:
+        """Total number of interactions."""
+        with self._lock:
+            return int(self._csr[1][-1]) + sum(len(row) - len(self._base_row(k)) for k, row in self._dirty.items())
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the CSR arrays (overlay excluded)."""
+        return sum(a.nbytes for a in self._csr)
+
+    def exclusion_mask(self, key: int, candidate_ids: np.ndarray) -> np.ndarray:
+        """Boolean mask over candidate_ids: True where the requester already interacted."""
+        row = self.get(key)
+        if not len(row):
+            return np.zeros(len(candidate_ids), dtype=bool)
+        return np.isin(candidate_ids, row)
+
+    def exclusion_masks(self, keys: Sequence[int], candidate_ids: np.ndarray) -> np.ndarray:
+        """[len(keys), len(candidate_ids)] masks for many requesters at once."""
+        rows = [self.get(k) for k in keys]
+        out = np.zeros((len(rows), len(candidate_ids)), dtype=bool)
+        lengths = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+        if not lengths.sum() or not len(candidate_ids):
+            return out
+        values = np.concatenate(rows)
+        owner = np.repeat(np.arange(len(rows)), lengths)
+
+        # Locate each interacted id among the (unsorted) candidate ids
+        order = np.argsort(candidate_ids, kind="stable")
+        sorted_ids = candidate_ids[order]
+        pos = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+        hit = sorted_ids[pos] == values
+        out[owner[hit], order[pos[hit]]] = True
+        return out
+
+    # -----------------------------
+    # Edits
+    # -----------------------------
+
+    def add(self, key: int, value: int):
+        self._edit(key, value, True)
+
+    def discard(self, key: int, value: int):
+        self._edit(key, value, False)
+
+    def _edit(self, key: int, value: int, present: bool):
+        with self._lock:
+            row = self.get(key)
+            i = int(np.searchsorted(row, value))
+            found = i < len(row) and row[i] == value
+            if found == present:
+                return
+            self._dirty[key] = np.insert(row, i, value) if present else np.delete(row, i)
+            self._edits += 1
+            if self._edits > max(COMPACT_MIN, int(self._csr[1][-1]) // COMPACT_FRACTION):
+                self._compact()
+
+    def compact(self):
+        """Merge pending edits into the CSR arrays."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        keys, indptr, indices = self._csr
+        if self._dirty:
+            owner = np.repeat(keys, np.diff(indptr))
+            dirty_keys = np.fromiter(self._dirty, dtype=np.int64, count=len(self._dirty))
+            clean = ~np.isin(owner, dirty_keys)
+            rows = list(self._dirty.values())
+            extra_keys = np.repeat(dirty_keys, [len(r) for r in rows])
+            packed = np.concatenate([
+                pack_pairs(owner[clean], indices[clean]),
+                pack_pairs(extra_keys, np.concatenate(rows) if rows else _EMPTY),
+            ])
+            merged = InteractionStore.from_packed(packed)
+            self._csr = merged._csr
+        self._dirty = {}
+        self._edits = 0
+
+    def to_dict(self) -> Dict[int, set]:
+        """{requester id: set of candidate ids} (debugging / comparisons)."""
+        self.compact()
+        keys, indptr, indices = self._csr
+        return {int(k): set(indices[a:b].tolist()) for k, a, b in zip(keys, indptr[:-1], indptr[1:])}
@@ -45,6 +45,8 @@ import lightgbm as lgb
 from sklearn.model_selection import train_test_split
 from pathlib import Path
 
+from Bulk_Encoder import encode_bulk
+
 # -----------------------------
 # Paths / Config
 # -----------------------------
@@ -106,19 +108,10 @@ _tokenizer = AutoTokenizer.from_pretrained(_MODEL_NAME)
 _model = AutoModel.from_pretrained(_MODEL_NAME)
 
 
-def _mean_pooling(model_output, attention_mask):
-    token_embeddings = model_output[0]
-    input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
-    return (token_embeddings * input_mask_expanded).sum(1) / torch.clamp(input_mask_expanded.sum(1), min=1e-9)
-
-
 def encode_texts(texts: List[str]) -> torch.Tensor:
-    enc = _tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
-    with torch.no_grad():
-        out = _model(**enc)
-    emb = _mean_pooling(out, enc["attention_mask"])
-    emb = F.normalize(emb, p=2, dim=1)
-    return emb  # [N, D]
+    # Length-sorted buckets instead of one batch padded to the longest text
+    forward = lambda ids, mask: _model(input_ids=ids, attention_mask=mask)[0]
+    return torch.from_numpy(encode_bulk(texts, _tokenizer, forward))  # [N, D]
 
 
 # -----------------------------
@@ -15,6 +15,16 @@ Optional:
 - --enforce-fk     : PRAGMA foreign_keys=ON
 - --with-history   : create *_history tables + triggers for interactions
 
+Always (after the CSV import):
+- engine_changelog table + triggers on user_info, company_info and both
+  interaction tables; the recommendation engine polls it to pick up
+  registrations, profile edits and swipes incrementally.
+  engine_changelog_readers holds the id each engine process has applied;
+  rows every reader (and the engine snapshot) is past are pruned
+- user_info_fts / company_info_fts: FTS5 indexes over the searchable
+  profile columns (name, description, industry), kept in sync by
+  triggers; /api/search/* queries them with BM25 ranking
+
 Example:
 
   python3 Make_Database.py invest.sqlite \
@@ -45,6 +55,9 @@ UCI = "user_to_company_interact"
 CUI = "company_to_user_interact"
 UCI_HIST = "user_to_company_interact_history"
 CUI_HIST = "company_to_user_interact_history"
+CHANGELOG = "engine_changelog"
+CHANGELOG_READERS = "engine_changelog_readers"
+FTS_SUFFIX = "_fts"
 
 DDL_CORE = f"""
 CREATE TABLE IF NOT EXISTS {DB_COMPANY_INFO} (
@@ -149,6 +162,138 @@ BEGIN
 END;
 """
 
+# table -> key columns recorded in the changelog
+CHANGELOG_KEYS = {
+    DB_USER_INFO: ("user_id",),
+    DB_COMPANY_INFO: ("company_id",),
+    UCI: ("u_id", "c_id"),
+    CUI: ("c_id", "u_id"),
+}
+
+
+def changelog_ddl():
+    """
+    engine_changelog + AFTER INSERT/UPDATE/DELETE triggers, and the table of
+    readers' applied ids. Rows only carry keys; readers fetch the current
+    row state themselves.
+    """
+    ddl = f"""
+CREATE TABLE IF NOT EXISTS {CHANGELOG} (
+  id         INTEGER PRIMARY KEY AUTOINCREMENT,
+  table_name TEXT NOT NULL,
+  op         TEXT NOT NULL,    -- 'I' insert, 'U' update, 'D' delete
+  key1       INTEGER NOT NULL, -- user_id / company_id / first key of interactions
+  key2       INTEGER,          -- second key of interactions
+  changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS {CHANGELOG_READERS} (
+  pid        INTEGER PRIMARY KEY, -- engine process following the changelog
+  last_id    INTEGER NOT NULL,    -- highest changelog id it has applied
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+"""
+    for table, keys in CHANGELOG_KEYS.items():
+        for op, event, ref in (("I", "INSERT", "NEW"), ("U", "UPDATE", "NEW"), ("D", "DELETE", "OLD")):
+            key2 = f"{ref}.{keys[1]}" if len(keys) > 1 else "NULL"
+            ddl += f"""
+CREATE TRIGGER IF NOT EXISTS trg_{table}_{op.lower()}_log
+AFTER {event} ON {table}
+BEGIN
+  INSERT INTO {CHANGELOG}(table_name, op, key1, key2)
+  VALUES ('{table}', '{op}', {ref}.{keys[0]}, {key2});
+END;
+"""
+    return ddl
+
+
+DDL_CHANGELOG = changelog_ddl()
+
+# table -> (key column, indexed text columns) for the full-text search indexes
+SEARCH_INDEXES = {
+    DB_USER_INFO: ("user_id", ("U_name", "U_invest_requirements", "U_industry")),
+    DB_COMPANY_INFO: ("company_id", ("C_name", "C_desc", "C_industry")),
+}
+
+
+def search_ddl():
+    """
+    External-content FTS5 table per profile table (the text lives only in
+    the profile table, the index holds tokens) + triggers keeping it in sync.
+    prefix='1 2 3': the short prefixes typed first ("h"*, "he"*, "hea"*) read
+    one index entry instead of merging every token that starts with them.
+    """
+    ddl = ""
+    for table, (key, columns) in SEARCH_INDEXES.items():
+        fts = table + FTS_SUFFIX
+        cols = ", ".join(columns)
+        new = ", ".join(f"NEW.{c}" for c in columns)
+        old = ", ".join(f"OLD.{c}" for c in columns)
+        ddl += f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+  {cols},
+  content='{table}', content_rowid='{key}',
+  tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_{table}_ai_fts
+AFTER INSERT ON {table}
+BEGIN
+  INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.{key}, {new});
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_{table}_ad_fts
+AFTER DELETE ON {table}
+BEGIN
+  INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', OLD.{key}, {old});
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_{table}_au_fts
+AFTER UPDATE OF {key}, {cols} ON {table}
+BEGIN
+  INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', OLD.{key}, {old});
+  INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.{key}, {new});
+END;
+"""
+    return ddl
+
+
+def drop_search_ddl():
+    """Drop the search indexes and their triggers (bulk loads rebuild them afterwards)."""
+    ddl = ""
+    for table in SEARCH_INDEXES:
+        ddl += f"DROP TABLE IF EXISTS {table}{FTS_SUFFIX};\n"
+        for trigger in ("ai", "ad", "au"):
+            ddl += f"DROP TRIGGER IF EXISTS trg_{table}_{trigger}_fts;\n"
+    return ddl
+
+
+DDL_SEARCH = search_ddl()
+DROP_SEARCH = drop_search_ddl()
+
+
+def install_search_index(conn):
+    """
+    Create the search indexes if missing and index the existing rows.
+    Returns True if they were created. Safe to call on every start.
+    """
+    existing = {
+        name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name IN (%s)" % ",".join("?" * len(SEARCH_INDEXES)),
+            [table + FTS_SUFFIX for table in SEARCH_INDEXES],
+        )
+    }
+    conn.executescript(DDL_SEARCH)  # also restores any dropped trigger
+    created = False
+    for table in SEARCH_INDEXES:
+        fts = table + FTS_SUFFIX
+        if fts not in existing:
+            conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            created = True
+    conn.commit()
+    return created
+
+
 def import_company_info(conn, path):
     """
     company_info.csv:
@@ -343,8 +488,9 @@ def main():
         if args.enforce_fk:
             conn.execute("PRAGMA foreign_keys = ON;")
 
-        # core schema
+        # core schema (search triggers off during the import, rebuilt below)
         conn.executescript(DDL_CORE)
+        conn.executescript(DROP_SEARCH)
 
         # main data
         n_comp = import_company_info(conn, args.company_info)
@@ -372,6 +518,13 @@ def main():
             conn.executescript(DDL_HISTORY)
             print("History tables + triggers installed.")
 
+        # installed after the import: the CSVs are the engine's baseline
+        conn.executescript(f"DROP TABLE IF EXISTS {CHANGELOG}; DROP TABLE IF EXISTS {CHANGELOG_READERS};" + DDL_CHANGELOG)
+        print("Changelog table + triggers installed.")
+
+        install_search_index(conn)
+        print("Search indexes + triggers installed.")
+
         # show tables
         rows = conn.execute(
             "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;"
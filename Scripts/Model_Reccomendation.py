@@ -6,23 +6,53 @@ Recommendation algorithm:
 1. For a user/company, compute industry/stage/place/check_fit against all candidates
    (excluding those already interacted with)
 2. Filter candidates passing a threshold on these cheap features
-3. Compute text similarity on remaining candidates
-4. Run LightGBM model for final probability scores
+   (scored for all candidates at once over columnar arrays, see Profile_Columns.py),
+   unioned with the semantically closest candidates from the ANN index (Ann_Index.py)
+3. Compute text similarity on remaining candidates (embeddings are read from
+   the precomputed on-disk store, see Embedding_Store.py)
+4. Run LightGBM model for final probability scores (trees flattened into
+   numpy arrays, see Tree_Scorer.py)
 5. Probabilistically sample from results
 6. Return top 5 recommendations
 """
 
-import random
+import gc
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Union
 from pathlib import Path
 
-import pandas as pd
 import numpy as np
 import torch
 import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModel
-import lightgbm as lgb
+
+# transformers, lightgbm and pandas are imported on the code paths that use
+# them (encoder load, Booster models, CSV loaders) to keep import time down
+if TYPE_CHECKING:
+    import lightgbm as lgb
+
+from Ann_Index import IVFIndex
+from Bulk_Encoder import BULK_BUCKET_SIZE, ENCODER_MAX_LENGTH, encode_bulk
+from Changelog_Sync import ChangeSet, ChangelogReader
+from Embedding_Store import EmbeddingStore
+from Engine_Snapshot import Snapshot, open_snapshot, snapshot_lock, write_snapshot
+from Encoder_Batcher import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, EncoderBatcher
+from Gumbel_Sampler import requester_seed, sample_pages
+from Interaction_Store import InteractionStore
+from Recommendation_Queue import RecommendationQueues
+from Result_Cache import VersionedCache
+from Read_Write_Lock import ReadWriteLock
+from Profile_Columns import (
+    ProfileColumns, build_profile_columns, columns_from_arrays, columns_to_arrays, pair_features, prefilter_scores,
+    remove_profiles, top_n_indices, upsert_profiles,
+)
+from Tree_Scorer import CompiledTreeModel
 
 # -----------------------------
 # Paths / Config
@@ -33,6 +63,8 @@ DATA_ROOT = ROOT / "Data"
 DATA_INIT = DATA_ROOT / "Initialization"
 MODELS_DIR = ROOT / "Models"
 DB_PATH = DATA_ROOT / "invest.sqlite"
+EMBEDDINGS_DIR = DATA_ROOT / "Embeddings"
+SNAPSHOT_PATH = DATA_ROOT / "Snapshots" / "engine.snapshot"
 
 USER_CSV = DATA_INIT / "user_info.csv"
 COMPANY_CSV = DATA_INIT / "company_info.csv"
@@ -43,18 +75,28 @@ USER_MODEL_PATH = MODELS_DIR / "lgbm_user_model.txt"
 COMPANY_MODEL_PATH = MODELS_DIR / "lgbm_company_model.txt"
 
 # Thresholds
-PREFILTER_TOP_N = 30  # Take top N candidates after pre-filtering (for speed)
+PREFILTER_TOP_N = 30  # Take top N candidates after pre-filtering (for speed); None = full catalog
+SEMANTIC_TOP_M = 10   # Add the M semantically closest candidates (ANN over embeddings)
+# Engine default; INVESTLINK_PREFILTER_TOP_N=all serves in full-catalog mode
+_ENV_TOP_N = os.environ.get("INVESTLINK_PREFILTER_TOP_N", "")
+ENGINE_TOP_N: Optional[int] = None if _ENV_TOP_N == "all" else int(_ENV_TOP_N or PREFILTER_TOP_N)
 NUM_RECOMMENDATIONS = 5
-RANDOM_SEED = 42
-
-random.seed(RANDOM_SEED)
-np.random.seed(RANDOM_SEED)
+MAX_PAGE_SIZE = 50   # hard cap on recommendations per page / request
+BATCH_CHUNK_PAIRS = 1 << 18  # requester x candidate pairs scored per block in recommend_batch
+RANDOM_SEED = 42  # base of the per-requester sampling seeds used by RecommendationEngine
+SAMPLING_TEMPERATURE = 1.0  # < 1 favours the highest probabilities, > 1 explores more
+# Engine snapshot shared by uvicorn workers (see Engine_Snapshot.py);
+# INVESTLINK_SNAPSHOT=0 disables it, any other value is the file to use
+_ENV_SNAPSHOT = os.environ.get("INVESTLINK_SNAPSHOT", "")
+ENGINE_SNAPSHOT: Optional[Path] = None if _ENV_SNAPSHOT == "0" else Path(_ENV_SNAPSHOT or SNAPSHOT_PATH)
+SNAPSHOT_MAX_LAG = 10_000  # changelog rows replayed on top of a snapshot before it is rewritten
+CHANGELOG_PRUNE_SECONDS = 300.0  # how often a worker prunes changelog rows every reader has applied
 
 # -----------------------------
 # Data classes
 # -----------------------------
 
-@dataclass
+@dataclass(slots=True)
 class CompanyProfile:
     id: int
     name: str
@@ -65,7 +107,7 @@ class CompanyProfile:
     fund_size: Optional[float]
 
 
-@dataclass
+@dataclass(slots=True)
 class InvestorProfile:
     id: int
     name: str
@@ -82,47 +124,174 @@ class InvestorProfile:
 # -----------------------------
 
 _MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-_tokenizer = None
-_model = None
+
+# Encoder backend (override with INVESTLINK_ENCODER):
+#   eager       - float32 PyTorch model (reference)
+#   int8        - dynamically quantized Linear layers (int8 weights)
+#   torchscript - traced, frozen and optimized TorchScript graph
+#   onnx        - ONNX Runtime with full graph optimizations (needs onnxruntime)
+ENCODER_BACKENDS = ("eager", "int8", "torchscript", "onnx")
+ENCODER_BACKEND = os.environ.get("INVESTLINK_ENCODER", "eager")
+ONNX_DIR = MODELS_DIR / "onnx"
+
+_encoders: Dict[str, Tuple] = {}  # backend -> (tokenizer, forward)
+_encoders_lock = threading.Lock()
 
 
-def _get_encoder():
-    """Lazy load the encoder model."""
-    global _tokenizer, _model
-    if _tokenizer is None:
-        _tokenizer = AutoTokenizer.from_pretrained(_MODEL_NAME)
-        _model = AutoModel.from_pretrained(_MODEL_NAME)
-    return _tokenizer, _model
+def _load_encoder(backend: str):
+    """
+    Build (tokenizer, forward) for a backend, where
+    forward(input_ids, attention_mask) -> token embeddings [N, T, D].
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}, expected one of {ENCODER_BACKENDS}")
+    from transformers import AutoTokenizer, AutoModel
+    
+    tokenizer = AutoTokenizer.from_pretrained(_MODEL_NAME)
+    model = AutoModel.from_pretrained(_MODEL_NAME).eval()
+    
+    if backend == "eager":
+        return tokenizer, lambda ids, mask: model(input_ids=ids, attention_mask=mask)[0]
+    
+    if backend == "int8":
+        qmodel = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return tokenizer, lambda ids, mask: qmodel(input_ids=ids, attention_mask=mask)[0]
+    
+    example = tokenizer(["example text"], return_tensors="pt")
+    example = (example["input_ids"], example["attention_mask"])
+    wrapped = _TokenEmbeddings(model)
+    
+    if backend == "torchscript":
+        with torch.inference_mode(False), torch.no_grad():
+            traced = torch.jit.trace(wrapped, example, check_trace=False)
+            traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+        return tokenizer, traced
+    
+    # onnx
+    import onnxruntime as ort
+    path = ONNX_DIR / (_MODEL_NAME.replace("/", "__") + ".onnx")
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with torch.no_grad():
+            torch.onnx.export(
+                wrapped, example, str(path),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["token_embeddings"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "tokens"},
+                    "attention_mask": {0: "batch", 1: "tokens"},
+                    "token_embeddings": {0: "batch", 1: "tokens"},
+                },
+                dynamo=False,
+            )
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+    
+    def forward(ids, mask):
+        out = session.run(None, {"input_ids": ids.numpy(), "attention_mask": mask.numpy()})[0]
+        return torch.from_numpy(out)
+    
+    return tokenizer, forward
 
 
-def _mean_pooling(model_output, attention_mask):
-    token_embeddings = model_output[0]
+class _TokenEmbeddings(torch.nn.Module):
+    """Positional-argument wrapper for tracing/export: returns last_hidden_state."""
+    
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+    
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+
+def _get_encoder(backend: Optional[str] = None):
+    """Lazy load the encoder (tokenizer, forward) for a backend."""
+    backend = backend or ENCODER_BACKEND
+    if backend not in _encoders:
+        with _encoders_lock:
+            if backend not in _encoders:
+                _encoders[backend] = _load_encoder(backend)
+    return _encoders[backend]
+
+
+def encoder_id(backend: Optional[str] = None) -> str:
+    """Identifies the embedding space (model + backend) for stored embeddings."""
+    backend = backend or ENCODER_BACKEND
+    name = _MODEL_NAME if backend == "eager" else f"{_MODEL_NAME}@{backend}"
+    return f"{name}/{ENCODER_MAX_LENGTH}"  # stores encoded with another token cap are re-encoded
+
+
+def _mean_pooling(token_embeddings, attention_mask):
     input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
     return (token_embeddings * input_mask_expanded).sum(1) / torch.clamp(input_mask_expanded.sum(1), min=1e-9)
 
 
-def encode_text(text: str) -> torch.Tensor:
+def _encode(texts: List[str], backend: Optional[str] = None) -> torch.Tensor:
+    tokenizer, forward = _get_encoder(backend)
+    # Same cap as encode_texts_bulk, so a stored embedding doesn't depend on the path that wrote it
+    enc = tokenizer(texts, padding=True, truncation=True, max_length=ENCODER_MAX_LENGTH, return_tensors="pt")
+    with torch.inference_mode():
+        out = forward(enc["input_ids"], enc["attention_mask"])
+        emb = _mean_pooling(out, enc["attention_mask"])
+        emb = F.normalize(emb, p=2, dim=1)
+    return emb
+
+
+# Serving-time encodes with the default backend go through one shared
+# micro-batching queue (see Encoder_Batcher.py), so concurrent requests share
+# a padded forward pass. INVESTLINK_ENCODER_BATCH=0 disables batching.
+ENCODER_MAX_BATCH = int(os.environ.get("INVESTLINK_ENCODER_BATCH", DEFAULT_MAX_BATCH_SIZE))
+ENCODER_MAX_WAIT_MS = float(os.environ.get("INVESTLINK_ENCODER_WAIT_MS", DEFAULT_MAX_WAIT_MS))
+_batcher = EncoderBatcher(_encode, ENCODER_MAX_BATCH, ENCODER_MAX_WAIT_MS) if ENCODER_MAX_BATCH > 0 else None
+
+
+def encode_text(text: str, backend: Optional[str] = None) -> torch.Tensor:
     """Encode a single text to embedding."""
-    tokenizer, model = _get_encoder()
-    enc = tokenizer([text], padding=True, truncation=True, return_tensors="pt")
-    with torch.no_grad():
-        out = model(**enc)
-    emb = _mean_pooling(out, enc["attention_mask"])
-    emb = F.normalize(emb, p=2, dim=1)
-    return emb[0]  # [D]
+    if backend is None and _batcher is not None:
+        return _batcher.encode([text])[0]
+    return _encode([text], backend)[0]  # [D]
 
 
-def encode_texts(texts: List[str]) -> torch.Tensor:
+def encode_texts(texts: List[str], backend: Optional[str] = None) -> torch.Tensor:
     """Encode multiple texts to embeddings."""
     if not texts:
         return torch.tensor([])
-    tokenizer, model = _get_encoder()
-    enc = tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
-    with torch.no_grad():
-        out = model(**enc)
-    emb = _mean_pooling(out, enc["attention_mask"])
-    emb = F.normalize(emb, p=2, dim=1)
-    return emb  # [N, D]
+    if backend is None and _batcher is not None:
+        return _batcher.encode(texts)
+    return _encode(texts, backend)  # [N, D]
+
+
+def encode_texts_bulk(
+    texts: List[str],
+    backend: Optional[str] = None,
+    bucket_size: int = BULK_BUCKET_SIZE,
+    max_length: int = ENCODER_MAX_LENGTH,
+) -> torch.Tensor:
+    """Encode a large list in length-sorted buckets (see Bulk_Encoder.py)."""
+    tokenizer, forward = _get_encoder(backend)
+    return torch.from_numpy(encode_bulk(texts, tokenizer, forward, bucket_size, max_length))
+
+
+def encoder_batching_stats() -> Optional[Dict[str, float]]:
+    """Batch fill rate / queueing delay of the shared encoder queue."""
+    return _batcher.stats() if _batcher is not None else None
+
+
+def embed_profiles(profiles: List, store: Optional[EmbeddingStore] = None) -> torch.Tensor:
+    """
+    Embeddings for a list of profiles.
+    Reads rows from the precomputed store; only profiles it does not hold
+    yet are encoded, and are upserted into it for later calls. Without a
+    store, everything is encoded.
+    """
+    if store is None:
+        return encode_texts([p.desc for p in profiles])
+    missing = {p.id: p.desc for p in profiles if p.id not in store}
+    if missing:
+        store.upsert(missing, encode_texts)
+    return torch.from_numpy(store.vectors([p.id for p in profiles]))
 
 
 # -----------------------------
@@ -131,7 +300,7 @@ def encode_texts(texts: List[str]) -> torch.Tensor:
 
 def parse_money(x) -> Optional[float]:
     """Parse strings like '$150k', '$3m', '200000' -> float (dollars)."""
-    if x is None or pd.isna(x):
+    if x is None or (isinstance(x, float) and x != x):  # missing / NaN
         return None
     s = str(x).strip()
     if not s:
@@ -244,6 +413,8 @@ def compute_full_features(
 
 def load_investors_from_csv(path: Path) -> Dict[int, InvestorProfile]:
     """Load investors from user_info.csv."""
+    import pandas as pd
+    
     df = pd.read_csv(path)
     investors: Dict[int, InvestorProfile] = {}
     for _, row in df.iterrows():
@@ -270,6 +441,8 @@ def load_investors_from_csv(path: Path) -> Dict[int, InvestorProfile]:
 
 def load_companies_from_csv(path: Path) -> Dict[int, CompanyProfile]:
     """Load companies from company_info.csv."""
+    import pandas as pd
+    
     df = pd.read_csv(path)
     companies: Dict[int, CompanyProfile] = {}
     for _, row in df.iterrows():
@@ -289,6 +462,83 @@ def load_companies_from_csv(path: Path) -> Dict[int, CompanyProfile]:
     return companies
 
 
+def _split_list(value) -> List[str]:
+    return [s.strip() for s in str(value or "").split(",") if s.strip()]
+
+
+def investor_from_row(row) -> InvestorProfile:
+    """InvestorProfile from a user_info database row."""
+    uid = int(row["user_id"])
+    return InvestorProfile(
+        id=uid,
+        name=str(row["U_name"] or uid),
+        desc=str(row["U_invest_requirements"] or ""),
+        industries=_split_list(row["U_industry"]),
+        stages=_split_list(row["U_fund_stage"]),
+        places=_split_list(row["U_places"]),
+        check_min=parse_money(row["U_check_size_min"]),
+        check_max=parse_money(row["U_check_size_max"]),
+    )
+
+
+def company_from_row(row) -> CompanyProfile:
+    """CompanyProfile from a company_info database row."""
+    cid = int(row["company_id"])
+    return CompanyProfile(
+        id=cid,
+        name=str(row["C_name"] or cid),
+        desc=str(row["C_desc"] or ""),
+        industries=_split_list(row["C_industry"]),
+        stage=str(row["C_funding_stage"] or ""),
+        place=str(row["C_place"] or ""),
+        fund_size=parse_money(row["C_fund_size"]),
+    )
+
+
+def _optional(values: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in values.tolist()]  # NaN -> None
+
+
+def load_from_db(
+    conn,
+    interactions: bool = True,
+) -> Tuple[Dict[int, InvestorProfile], Dict[int, CompanyProfile], Optional[InteractionStore], Optional[InteractionStore], int]:
+    """
+    Profiles and interactions straight from invest.sqlite (see Profile_Loader.py).
+    interactions=False skips the interaction tables (both come back as None).
+    
+    Returns:
+        investors, companies, user_interactions, company_interactions,
+        and the changelog id the snapshot corresponds to
+    """
+    from Profile_Loader import read_snapshot  # pandas
+    
+    # Only acyclic objects are created here; skip the cyclic GC passes that
+    # millions of allocations (profiles, category lists) would trigger
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        inv, comp, user_interactions, company_interactions, changelog_id = read_snapshot(conn, interactions)
+        investors = {
+            uid: InvestorProfile(uid, str(name or uid), str(desc or ""), ind, stages, places, cmin, cmax)
+            for uid, name, desc, ind, stages, places, cmin, cmax in zip(
+                inv["id"], inv["name"], inv["desc"], inv["industries"], inv["stages"], inv["places"],
+                _optional(inv["check_min"]), _optional(inv["check_max"]),
+            )
+        }
+        companies = {
+            cid: CompanyProfile(cid, str(name or cid), str(desc or ""), ind, stage, place, fund)
+            for cid, name, desc, ind, stage, place, fund in zip(
+                comp["id"], comp["name"], comp["desc"], comp["industries"], comp["stage"], comp["place"],
+                _optional(comp["fund_size"]),
+            )
+        }
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return investors, companies, user_interactions, company_interactions, changelog_id
+
+
 def load_interactions(user_to_company_path: Path, company_to_user_path: Path):
     """
     Load interaction data.
@@ -298,9 +548,11 @@ def load_interactions(user_to_company_path: Path, company_to_user_path: Path):
     be candidates for recommendation.
     
     Returns:
-        user_interactions: Dict[user_id, Set[company_id]] - companies user has actually interacted with (0 or 1)
-        company_interactions: Dict[company_id, Set[user_id]] - users company has actually interacted with (0 or 1)
+        user_interactions: InteractionStore user_id -> company_ids user has actually interacted with (0 or 1)
+        company_interactions: InteractionStore company_id -> user_ids company has actually interacted with (0 or 1)
     """
+    import pandas as pd
+    
     user_interactions: Dict[int, set] = {}
     company_interactions: Dict[int, set] = {}
     
@@ -329,32 +581,114 @@ def load_interactions(user_to_company_path: Path, company_to_user_path: Path):
                     company_interactions[cid] = set()
                 company_interactions[cid].add(uid)
     
-    return user_interactions, company_interactions
+    return InteractionStore.from_dict(user_interactions), InteractionStore.from_dict(company_interactions)
 
 
 # -----------------------------
 # Load LightGBM models
 # -----------------------------
 
-def load_models():
-    """Load trained LightGBM models."""
+def load_models(compiled: bool = True):
+    """
+    Load trained LightGBM models.
+    By default the model files are flattened into CompiledTreeModel scorers
+    (numpy, no pandas/Booster overhead); compiled=False returns lgb.Boosters.
+    """
     user_model = None
     company_model = None
+    if compiled:
+        load = CompiledTreeModel.from_file
+    else:
+        import lightgbm as lgb
+        load = lambda p: lgb.Booster(model_file=str(p))
     
     if USER_MODEL_PATH.exists():
-        user_model = lgb.Booster(model_file=str(USER_MODEL_PATH))
+        user_model = load(USER_MODEL_PATH)
     if COMPANY_MODEL_PATH.exists():
-        company_model = lgb.Booster(model_file=str(COMPANY_MODEL_PATH))
+        company_model = load(COMPANY_MODEL_PATH)
     
     return user_model, company_model
 
 
+def model_version() -> Tuple:
+    """Identifies the encoder and model files in use (part of the result cache version)."""
+    files = tuple(
+        (p.stat().st_mtime_ns, p.stat().st_size) if p.exists() else None
+        for p in (USER_MODEL_PATH, COMPANY_MODEL_PATH)
+    )
+    return (encoder_id(),) + files
+
+
 # -----------------------------
 # Recommendation functions
 # -----------------------------
 
 FEATURE_COLS = ["text_similarity", "industry_overlap", "stage_fit", "place_fit", "check_fit"]
 
+# Weighted feature scores used when a model file is missing (same order as FEATURE_COLS)
+USER_FALLBACK_WEIGHTS = np.array([0.35, 0.25, 0.15, 0.10, 0.15])
+COMPANY_FALLBACK_WEIGHTS = np.array([0.30, 0.25, 0.15, 0.10, 0.20])
+
+ScoringModel = Union[CompiledTreeModel, "lgb.Booster"]
+
+
+def pair_feature_matrix(
+    cols: ProfileColumns,
+    inv_rows: np.ndarray,
+    comp_rows: np.ndarray,
+    text_similarity: np.ndarray,
+) -> np.ndarray:
+    """
+    [N, len(FEATURE_COLS)] matrix for row-aligned (investor, company) pairs,
+    given their text similarities. Vectorized compute_full_features().
+    """
+    feats = pair_features(cols, inv_rows, comp_rows)
+    sim = np.asarray(text_similarity, dtype=np.float64).ravel()
+    return np.column_stack([sim] + [np.broadcast_to(feats[c], sim.shape) for c in FEATURE_COLS[1:]])
+
+
+def fallback_scores(X: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weighted feature score for when no trained model is available."""
+    return X @ weights
+
+
+def reciprocal_probabilities(own: np.ndarray, other: np.ndarray) -> np.ndarray:
+    """
+    Harmonic mean of the requester's and the candidate's like probabilities
+    (each clipped like the one-sided scores): high only when both sides are.
+    """
+    own = np.clip(own, 0.01, 0.99)
+    other = np.clip(other, 0.01, 0.99)
+    return 2.0 * own * other / (own + other)
+
+
+def union_semantic_rows(
+    top_rows: np.ndarray,
+    candidate_mask: np.ndarray,
+    row_of: Dict[int, int],
+    index: IVFIndex,
+    query: torch.Tensor,
+    m: int,
+) -> np.ndarray:
+    """
+    Append the m nearest eligible candidates (by description embedding)
+    that are not already in top_rows.
+    """
+    # Over-fetch: some neighbours are already interacted with or prefiltered
+    ids, _ = index.search(query.numpy(), m + len(top_rows) + 16)
+    seen = set(top_rows.tolist())
+    extra = []
+    for pid in ids.tolist():
+        row = row_of.get(pid)
+        if row is None or row in seen or not candidate_mask[row]:
+            continue
+        extra.append(row)
+        seen.add(row)
+        if len(extra) == m:
+            break
+    return np.concatenate([top_rows, np.array(extra, dtype=top_rows.dtype)])
+
+
 # Demo account IDs to exclude from recommendations (but they can still receive recommendations)
 DEMO_INVESTOR_ID = 1
 DEMO_COMPANY_ID = 1
@@ -364,14 +698,34 @@ def recommend_companies_for_user(
     user_id: int,
     investors: Dict[int, InvestorProfile],
     companies: Dict[int, CompanyProfile],
-    user_interactions: Dict[int, set],
-    user_model: lgb.Booster,
+    user_interactions: InteractionStore,
+    user_model: Optional[ScoringModel],
     num_recommendations: int = NUM_RECOMMENDATIONS,
-    top_n: int = PREFILTER_TOP_N,
+    top_n: Optional[int] = PREFILTER_TOP_N,
+    investor_embeddings: Optional[EmbeddingStore] = None,
+    company_embeddings: Optional[EmbeddingStore] = None,
+    profile_columns: Optional[ProfileColumns] = None,
+    candidate_index: Optional[IVFIndex] = None,
+    semantic_top_m: int = SEMANTIC_TOP_M,
+    seed: Optional[int] = None,
+    page: int = 0,
+    temperature: float = SAMPLING_TEMPERATURE,
+    company_model: Optional[ScoringModel] = None,
+    reciprocal: bool = False,
+    sort: bool = True,
 ) -> List[Tuple[int, str, float]]:
     """
     Recommend companies for a given investor.
     
+    top_n=None skips the prefilter cut and sends every eligible company
+    through the full features and the model (full-catalog mode).
+    Sampling is Gumbel-top-k (Gumbel_Sampler.py). A seed (requester_seed())
+    makes the draw order repeatable; page picks consecutive, non-overlapping
+    slices of num_recommendations from it. seed=None draws fresh noise.
+    reciprocal=True also scores the same feature matrix with company_model
+    (P(company likes investor)) and ranks by the harmonic mean of the two.
+    sort=False returns the page in draw order instead of by probability.
+    
     Returns:
         List of (company_id, company_name, probability) tuples
     """
@@ -379,81 +733,68 @@ def recommend_companies_for_user(
         return []
     
     investor = investors[user_id]
-    interacted = user_interactions.get(user_id, set())
+    
+    cols = profile_columns or build_profile_columns(investors, companies)
+    comp_ids = cols.companies.ids
     
     # Step 1: Get candidates (companies not yet interacted with, excluding demo company)
-    candidates = [c for cid, c in companies.items() if cid not in interacted and cid != DEMO_COMPANY_ID]
+    mask = (comp_ids != DEMO_COMPANY_ID) & ~user_interactions.exclusion_mask(user_id, comp_ids)
+    cand_rows = np.flatnonzero(mask)
     
-    if not candidates:
+    if not len(cand_rows):
         return []
     
-    # Step 2: Pre-filter using cheap features - take top N only
-    prefilter_scores = []
-    for comp in candidates:
-        score = compute_prefilter_score(investor, comp)
-        prefilter_scores.append((comp, score))
-    
-    # Sort by score and take top N
-    prefilter_scores.sort(key=lambda x: x[1], reverse=True)
-    filtered = prefilter_scores[:top_n]
+    inv_emb = embed_profiles([investor], investor_embeddings)[0]
+    if top_n is None:
+        # Full-catalog mode: every candidate is scored by the model
+        top_rows = cand_rows
+    else:
+        # Step 2: Pre-filter using cheap features (one vectorized pass) - take top N only
+        scores = prefilter_scores(cols, cols.investor_row[user_id], cand_rows)
+        top_rows = cand_rows[top_n_indices(scores, top_n)]
+        
+        # Step 2b: Add the semantically closest candidates the prefilter missed
+        if candidate_index is not None and semantic_top_m > 0:
+            top_rows = union_semantic_rows(top_rows, mask, cols.company_row, candidate_index, inv_emb, semantic_top_m)
+    filtered = [companies[int(cid)] for cid in comp_ids[top_rows]]
     
     # Step 3: Compute text similarity for filtered candidates
-    inv_emb = encode_text(investor.desc)
-    comp_descs = [c.desc for c, _ in filtered]
-    comp_embs = encode_texts(comp_descs)
-    
-    # Step 4: Compute full features and run LightGBM
-    feature_rows = []
-    for i, (comp, _) in enumerate(filtered):
-        feats = compute_full_features(investor, comp, inv_emb, comp_embs[i])
-        feature_rows.append({
-            "company": comp,
-            **feats
-        })
-    
-    if not feature_rows:
-        return []
+    comp_embs = embed_profiles(filtered, company_embeddings)
     
-    # Create feature matrix for LightGBM
-    X = pd.DataFrame(feature_rows)[FEATURE_COLS]
+    # Step 4: Compute full features (one vectorized pass; embeddings are normalized) and run LightGBM
+    sim = comp_embs.numpy() @ inv_emb.numpy()
+    X = pair_feature_matrix(cols, cols.investor_row[user_id], top_rows, sim)
     
     # Get probabilities from model
     if user_model is not None:
         probs = user_model.predict(X)
     else:
         # Fallback: use weighted feature score
-        probs = (
-            0.35 * X["text_similarity"] +
-            0.25 * X["industry_overlap"] +
-            0.15 * X["stage_fit"] +
-            0.10 * X["place_fit"] +
-            0.15 * X["check_fit"]
-        ).values
+        probs = fallback_scores(X, USER_FALLBACK_WEIGHTS)
+    
+    if reciprocal:
+        # The five pair features are symmetric, so the other side's model scores the same X
+        back = company_model.predict(X) if company_model is not None else fallback_scores(X, COMPANY_FALLBACK_WEIGHTS)
+        probs = reciprocal_probabilities(probs, back)
     
     # Step 5: Probabilistic sampling
-    # Normalize probabilities for sampling
     probs = np.array(probs)
     probs = np.clip(probs, 0.01, 0.99)  # Avoid zero probabilities
-    probs_normalized = probs / probs.sum()
-    
-    # Sample without replacement
-    n_samples = min(num_recommendations, len(feature_rows))
-    indices = np.random.choice(
-        len(feature_rows),
-        size=n_samples,
-        replace=False,
-        p=probs_normalized
-    )
+    
+    # Sample without replacement (Gumbel-top-k, proportional to probs)
+    cand_ids = np.array([comp.id for comp in filtered])
+    indices = sample_pages(probs, num_recommendations, [page], temperature, ids=cand_ids, seed=seed)[0]
     
     # Step 6: Return recommendations
     recommendations = []
     for idx in indices:
-        comp = feature_rows[idx]["company"]
+        comp = filtered[idx]
         prob = probs[idx]
         recommendations.append((comp.id, comp.name, float(prob)))
     
-    # Sort by probability descending
-    recommendations.sort(key=lambda x: x[2], reverse=True)
+    # Sort by probability descending (sort=False: keep the draw order)
+    if sort:
+        recommendations.sort(key=lambda x: x[2], reverse=True)
     
     return recommendations
 
@@ -462,14 +803,34 @@ def recommend_users_for_company(
     company_id: int,
     investors: Dict[int, InvestorProfile],
     companies: Dict[int, CompanyProfile],
-    company_interactions: Dict[int, set],
-    company_model: lgb.Booster,
+    company_interactions: InteractionStore,
+    company_model: Optional[ScoringModel],
     num_recommendations: int = NUM_RECOMMENDATIONS,
-    top_n: int = PREFILTER_TOP_N,
+    top_n: Optional[int] = PREFILTER_TOP_N,
+    investor_embeddings: Optional[EmbeddingStore] = None,
+    company_embeddings: Optional[EmbeddingStore] = None,
+    profile_columns: Optional[ProfileColumns] = None,
+    candidate_index: Optional[IVFIndex] = None,
+    semantic_top_m: int = SEMANTIC_TOP_M,
+    seed: Optional[int] = None,
+    page: int = 0,
+    temperature: float = SAMPLING_TEMPERATURE,
+    user_model: Optional[ScoringModel] = None,
+    reciprocal: bool = False,
+    sort: bool = True,
 ) -> List[Tuple[int, str, float]]:
     """
     Recommend investors for a given company.
     
+    top_n=None skips the prefilter cut and sends every eligible investor
+    through the full features and the model (full-catalog mode).
+    Sampling is Gumbel-top-k (Gumbel_Sampler.py). A seed (requester_seed())
+    makes the draw order repeatable; page picks consecutive, non-overlapping
+    slices of num_recommendations from it. seed=None draws fresh noise.
+    reciprocal=True also scores the same feature matrix with user_model
+    (P(investor likes company)) and ranks by the harmonic mean of the two.
+    sort=False returns the page in draw order instead of by probability.
+    
     Returns:
         List of (user_id, user_name, probability) tuples
     """
@@ -477,137 +838,436 @@ def recommend_users_for_company(
         return []
     
     company = companies[company_id]
-    interacted = company_interactions.get(company_id, set())
+    
+    cols = profile_columns or build_profile_columns(investors, companies)
+    inv_ids = cols.investors.ids
     
     # Step 1: Get candidates (investors not yet interacted with, excluding demo investor)
-    candidates = [inv for uid, inv in investors.items() if uid not in interacted and uid != DEMO_INVESTOR_ID]
+    mask = (inv_ids != DEMO_INVESTOR_ID) & ~company_interactions.exclusion_mask(company_id, inv_ids)
+    cand_rows = np.flatnonzero(mask)
     
-    if not candidates:
+    if not len(cand_rows):
         return []
     
-    # Step 2: Pre-filter using cheap features - take top N only
-    prefilter_scores = []
-    for inv in candidates:
-        score = compute_prefilter_score(inv, company)
-        prefilter_scores.append((inv, score))
-    
-    # Sort by score and take top N
-    prefilter_scores.sort(key=lambda x: x[1], reverse=True)
-    filtered = prefilter_scores[:top_n]
+    comp_emb = embed_profiles([company], company_embeddings)[0]
+    if top_n is None:
+        # Full-catalog mode: every candidate is scored by the model
+        top_rows = cand_rows
+    else:
+        # Step 2: Pre-filter using cheap features (one vectorized pass) - take top N only
+        scores = prefilter_scores(cols, cand_rows, cols.company_row[company_id])
+        top_rows = cand_rows[top_n_indices(scores, top_n)]
+        
+        # Step 2b: Add the semantically closest candidates the prefilter missed
+        if candidate_index is not None and semantic_top_m > 0:
+            top_rows = union_semantic_rows(top_rows, mask, cols.investor_row, candidate_index, comp_emb, semantic_top_m)
+    filtered = [investors[int(uid)] for uid in inv_ids[top_rows]]
     
     # Step 3: Compute text similarity for filtered candidates
-    comp_emb = encode_text(company.desc)
-    inv_descs = [inv.desc for inv, _ in filtered]
-    inv_embs = encode_texts(inv_descs)
-    
-    # Step 4: Compute full features and run LightGBM
-    feature_rows = []
-    for i, (inv, _) in enumerate(filtered):
-        feats = compute_full_features(inv, company, inv_embs[i], comp_emb)
-        feature_rows.append({
-            "investor": inv,
-            **feats
-        })
+    inv_embs = embed_profiles(filtered, investor_embeddings)
     
-    if not feature_rows:
-        return []
-    
-    # Create feature matrix for LightGBM
-    X = pd.DataFrame(feature_rows)[FEATURE_COLS]
+    # Step 4: Compute full features (one vectorized pass; embeddings are normalized) and run LightGBM
+    sim = inv_embs.numpy() @ comp_emb.numpy()
+    X = pair_feature_matrix(cols, top_rows, cols.company_row[company_id], sim)
     
     # Get probabilities from model
     if company_model is not None:
         probs = company_model.predict(X)
     else:
         # Fallback: use weighted feature score
-        probs = (
-            0.30 * X["text_similarity"] +
-            0.25 * X["industry_overlap"] +
-            0.15 * X["stage_fit"] +
-            0.10 * X["place_fit"] +
-            0.20 * X["check_fit"]
-        ).values
+        probs = fallback_scores(X, COMPANY_FALLBACK_WEIGHTS)
+    
+    if reciprocal:
+        # The five pair features are symmetric, so the other side's model scores the same X
+        back = user_model.predict(X) if user_model is not None else fallback_scores(X, USER_FALLBACK_WEIGHTS)
+        probs = reciprocal_probabilities(probs, back)
     
     # Step 5: Probabilistic sampling
     probs = np.array(probs)
     probs = np.clip(probs, 0.01, 0.99)
-    probs_normalized = probs / probs.sum()
-    
-    n_samples = min(num_recommendations, len(feature_rows))
-    indices = np.random.choice(
-        len(feature_rows),
-        size=n_samples,
-        replace=False,
-        p=probs_normalized
-    )
+    
+    cand_ids = np.array([inv.id for inv in filtered])
+    indices = sample_pages(probs, num_recommendations, [page], temperature, ids=cand_ids, seed=seed)[0]
     
     # Step 6: Return recommendations
     recommendations = []
     for idx in indices:
-        inv = feature_rows[idx]["investor"]
+        inv = filtered[idx]
         prob = probs[idx]
         recommendations.append((inv.id, inv.name, float(prob)))
     
-    recommendations.sort(key=lambda x: x[2], reverse=True)
+    if sort:
+        recommendations.sort(key=lambda x: x[2], reverse=True)
     
     return recommendations
 
 
+def recommend_batch(
+    ids: List[int],
+    side: str,
+    investors: Dict[int, InvestorProfile],
+    companies: Dict[int, CompanyProfile],
+    interactions: InteractionStore,
+    model: Optional[ScoringModel],
+    profile_columns: ProfileColumns,
+    investor_embeddings: Optional[EmbeddingStore] = None,
+    company_embeddings: Optional[EmbeddingStore] = None,
+    k: int = NUM_RECOMMENDATIONS,
+    chunk_pairs: int = BATCH_CHUNK_PAIRS,
+    reverse_model: Optional[ScoringModel] = None,
+    reciprocal: bool = False,
+) -> Dict[int, List[Tuple[int, str, float]]]:
+    """
+    Score many requesters against the whole candidate catalog at once.
+    
+    side="investor": ids are investor ids, candidates are companies.
+    side="company":  ids are company ids, candidates are investors.
+    
+    Text similarity for every requester x candidate pair is one matrix
+    multiply of normalized embeddings; categorical features and the model
+    run over flat [pairs, 5] blocks. Requesters are processed in chunks of
+    about `chunk_pairs` pairs so memory stays bounded. reciprocal=True
+    also scores each block with reverse_model (the candidates' side) and
+    ranks by the harmonic mean of both probabilities.
+    
+    Returns:
+        {requester_id: [(candidate_id, candidate_name, probability), ...]}
+        with the top k by probability (deterministic, no sampling).
+    """
+    if side == "investor":
+        req_profiles, cand_profiles = investors, companies
+        req_row, cand_ids = profile_columns.investor_row, profile_columns.companies.ids
+        req_store, cand_store = investor_embeddings, company_embeddings
+        demo_id, weights, reverse_weights = DEMO_COMPANY_ID, USER_FALLBACK_WEIGHTS, COMPANY_FALLBACK_WEIGHTS
+    elif side == "company":
+        req_profiles, cand_profiles = companies, investors
+        req_row, cand_ids = profile_columns.company_row, profile_columns.investors.ids
+        req_store, cand_store = company_embeddings, investor_embeddings
+        demo_id, weights, reverse_weights = DEMO_INVESTOR_ID, COMPANY_FALLBACK_WEIGHTS, USER_FALLBACK_WEIGHTS
+    else:
+        raise ValueError(f"side must be 'investor' or 'company', got {side!r}")
+    
+    results: Dict[int, List[Tuple[int, str, float]]] = {rid: [] for rid in ids}
+    valid = [rid for rid in ids if rid in req_row]
+    if not valid or not len(cand_ids):
+        return results
+    
+    cand_embs = embed_profiles([cand_profiles[int(c)] for c in cand_ids], cand_store).numpy()
+    cand_rows = np.arange(len(cand_ids))
+    per_chunk = max(1, chunk_pairs // len(cand_ids))
+    
+    for start in range(0, len(valid), per_chunk):
+        chunk = valid[start:start + per_chunk]
+        rows = np.array([req_row[rid] for rid in chunk])
+        
+        # Text similarity for all pairs: [R, D] @ [D, C]
+        req_embs = embed_profiles([req_profiles[rid] for rid in chunk], req_store).numpy()
+        sim = req_embs @ cand_embs.T
+        
+        # Categorical features over flattened (requester, candidate) pairs
+        pair_req = np.repeat(rows, len(cand_rows))
+        pair_cand = np.tile(cand_rows, len(rows))
+        if side == "investor":
+            X = pair_feature_matrix(profile_columns, pair_req, pair_cand, sim)
+        else:
+            X = pair_feature_matrix(profile_columns, pair_cand, pair_req, sim)
+        
+        probs = model.predict(X) if model is not None else fallback_scores(X, weights)
+        if reciprocal:
+            back = reverse_model.predict(X) if reverse_model is not None else fallback_scores(X, reverse_weights)
+            probs = reciprocal_probabilities(probs, back)
+        probs = probs.reshape(len(rows), len(cand_rows))
+        keep = ~(interactions.exclusion_masks(chunk, cand_ids) | (cand_ids == demo_id))
+        
+        for i, rid in enumerate(chunk):
+            cand_idx = np.flatnonzero(keep[i])
+            best = cand_idx[top_n_indices(probs[i, cand_idx], k)]
+            results[rid] = [
+                (int(cand_ids[j]), cand_profiles[int(cand_ids[j])].name, float(probs[i, j]))
+                for j in best
+            ]
+    
+    return results
+
+
 # -----------------------------
 # Main API class
 # -----------------------------
 
+# Load phases reported by RecommendationEngine.readiness()
+ENGINE_COMPONENTS = ("profiles", "embeddings", "index", "models")
+
+
 class RecommendationEngine:
     """Main recommendation engine class."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        prefilter_top_n: Optional[int] = ENGINE_TOP_N,
+        db_path: Optional[Path] = None,
+        snapshot_path: Optional[Path] = None,
+    ):
+        self.prefilter_top_n = prefilter_top_n  # None: score the full catalog
+        self.db_path = db_path  # follow this database's changelog after load()
+        self.snapshot_path = snapshot_path if db_path is not None else None  # share arrays across workers
+        self.changelog = None
+        self._sync_lock = threading.Lock()
+        self._snapshot_changelog_id = None  # changelog id the current snapshot replays from
+        self._pruned_at = 0.0
         self.investors = None
         self.companies = None
         self.user_interactions = None
         self.company_interactions = None
+        self.investor_embeddings = None
+        self.company_embeddings = None
+        self.profile_columns = None
+        self.investor_index = None
+        self.company_index = None
         self.user_model = None
         self.company_model = None
+        # Per-requester queues behind the recommendation cursors
+        self.queues = RecommendationQueues(self._fill_queue)
+        # Result cache: entries carry the versions below and go stale when one moves
+        self.results = VersionedCache()
+        self._versions = itertools.count(1)  # shared counter, so versions never repeat
+        self._catalog_versions = {"investor": 0, "company": 0}
+        self._profile_versions: Dict[Tuple[str, int], int] = {}
+        self._interaction_versions: Dict[Tuple[str, int], int] = {}
+        self.model_version = None
+        # Scoring reads under the shared lock; apply_changes() writes exclusively
+        self._rw = ReadWriteLock()
+        self.status = {name: {"state": "pending", "seconds": None, "error": None} for name in ENGINE_COMPONENTS}
+        self._load_lock = threading.Lock()
         self._loaded = False
     
     def load(self):
-        """Load all data and models."""
+        """
+        Load all data and models. Safe to call from several threads: one
+        loads, the others wait for it (see readiness() for progress).
+        """
         if self._loaded:
             return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+    
+    def _load(self):
+        snapshot = self._open_snapshot()
+        if snapshot is None and self.snapshot_path is not None:
+            # One worker builds and writes the snapshot; the others wait and map it
+            with snapshot_lock(self.snapshot_path):
+                snapshot = self._open_snapshot()
+                if snapshot is None:
+                    self._build()
+                    try:
+                        self._write_snapshot()
+                    except OSError as e:
+                        print(f"  Could not write engine snapshot: {e}")
+        if snapshot is not None:
+            self._load_from_snapshot(snapshot)
+        elif self.snapshot_path is None:
+            self._build()
         
-        print("Loading investors...")
-        self.investors = load_investors_from_csv(USER_CSV)
-        print(f"  Loaded {len(self.investors)} investors")
+        if self.changelog is not None:
+            # Changes committed while the embeddings/index were being built
+            # (or since the snapshot was written)
+            start_id = self.changelog.last_id
+            changes = self.changelog.poll()
+            if changes:
+                self.apply_changes(changes)
+            print(f"  Changelog id {self.changelog.last_id} ({len(changes) if changes else 0} rows applied after load)")
+            if snapshot is not None and self.changelog.last_id - start_id > SNAPSHOT_MAX_LAG:
+                with snapshot_lock(self.snapshot_path):
+                    self._write_snapshot()
+            self._prune_changelog()
         
-        print("Loading companies...")
-        self.companies = load_companies_from_csv(COMPANY_CSV)
-        print(f"  Loaded {len(self.companies)} companies")
+        self._loaded = True
+        print("Recommendation engine ready!")
+    
+    def _build(self):
+        with self._component("profiles"):
+            if self.db_path is not None:
+                print("Loading profiles and interactions from database...")
+                if self.changelog is None:
+                    self.changelog = ChangelogReader(self.db_path)
+                (self.investors, self.companies, self.user_interactions, self.company_interactions,
+                 last_id) = load_from_db(self.changelog.conn)
+                self.changelog.mark_applied(last_id)
+                print(f"  Loaded {len(self.investors)} investors, {len(self.companies)} companies")
+            else:
+                print("Loading investors...")
+                self.investors = load_investors_from_csv(USER_CSV)
+                print(f"  Loaded {len(self.investors)} investors")
+                
+                print("Loading companies...")
+                self.companies = load_companies_from_csv(COMPANY_CSV)
+                print(f"  Loaded {len(self.companies)} companies")
+                
+                print("Loading interactions...")
+                self.user_interactions, self.company_interactions = load_interactions(
+                    USER_TO_COMPANY_INTERACT, COMPANY_TO_USER_INTERACT
+                )
+            print(f"  User interactions: {len(self.user_interactions)} total")
+            print(f"  Company interactions: {len(self.company_interactions)} total")
+            
+            self.profile_columns = build_profile_columns(self.investors, self.companies)
         
-        print("Loading interactions...")
-        self.user_interactions, self.company_interactions = load_interactions(
-            USER_TO_COMPANY_INTERACT, COMPANY_TO_USER_INTERACT
-        )
-        print(f"  User interactions: {sum(len(v) for v in self.user_interactions.values())} total")
-        print(f"  Company interactions: {sum(len(v) for v in self.company_interactions.values())} total")
+        with self._component("embeddings"):
+            print("Loading embeddings...")
+            self.investor_embeddings = EmbeddingStore(EMBEDDINGS_DIR, "investor_embeddings", encoder_id())
+            n_inv = self.investor_embeddings.sync({uid: inv.desc for uid, inv in self.investors.items()}, encode_texts_bulk, batch_size=None)
+            self.company_embeddings = EmbeddingStore(EMBEDDINGS_DIR, "company_embeddings", encoder_id())
+            n_comp = self.company_embeddings.sync({cid: c.desc for cid, c in self.companies.items()}, encode_texts_bulk, batch_size=None)
+            print(f"  Investor embeddings: {len(self.investor_embeddings)} rows ({n_inv} encoded)")
+            print(f"  Company embeddings: {len(self.company_embeddings)} rows ({n_comp} encoded)")
         
-        print("Loading models...")
-        self.user_model, self.company_model = load_models()
-        print(f"  User model: {'loaded' if self.user_model else 'not found'}")
-        print(f"  Company model: {'loaded' if self.company_model else 'not found'}")
+        with self._component("index"):
+            print("Building ANN indexes...")
+            self.investor_index = IVFIndex.build(self.investor_embeddings.ids, self.investor_embeddings.matrix)
+            self.company_index = IVFIndex.build(self.company_embeddings.ids, self.company_embeddings.matrix)
+            print(f"  Investor index: {len(self.investor_index)} vectors in {self.investor_index.n_lists} lists")
+            print(f"  Company index: {len(self.company_index)} vectors in {self.company_index.n_lists} lists")
         
-        self._loaded = True
-        print("Recommendation engine ready!")
+        with self._component("models"):
+            print("Loading models...")
+            self.user_model, self.company_model = load_models()
+            print(f"  User model: {'loaded' if self.user_model else 'not found'}")
+            print(f"  Company model: {'loaded' if self.company_model else 'not found'}")
+            self.model_version = model_version()
+    
+    # -----------------------------
+    # Snapshot
+    # -----------------------------
+    
+    def _snapshot_key(self) -> Dict:
+        """What a snapshot must match to be reused: database file, encoder, model files."""
+        st = os.stat(self.db_path)
+        return json.loads(json.dumps({
+            "database": [st.st_dev, st.st_ino],
+            "models": model_version(),  # includes the encoder id
+        }))
+    
+    def _open_snapshot(self) -> Optional[Snapshot]:
+        if self.snapshot_path is None:
+            return None
+        snapshot = open_snapshot(self.snapshot_path)
+        if snapshot is None:
+            return None
+        if self.changelog is None:
+            self.changelog = ChangelogReader(self.db_path)
+        meta = snapshot.meta
+        if (meta.get("key") != self._snapshot_key() or meta["changelog_id"] > self.changelog.latest_id()
+                or not self.changelog.covers(meta["changelog_id"])):
+            print(f"Engine snapshot {self.snapshot_path} is out of date, rebuilding")
+            return None
+        return snapshot
+    
+    def _write_snapshot(self):
+        """Write columns, interactions and indexes to the snapshot and switch to the mapped copies."""
+        arrays, vocabs = columns_to_arrays(self.profile_columns)
+        arrays = {f"columns.{name}": a for name, a in arrays.items()}
+        for prefix, part in (
+            ("user_interactions.", self.user_interactions.to_arrays()),
+            ("company_interactions.", self.company_interactions.to_arrays()),
+            ("investor_index.", self.investor_index.to_arrays()),
+            ("company_index.", self.company_index.to_arrays()),
+        ):
+            arrays.update((prefix + name, a) for name, a in part.items())
+        
+        start = time.perf_counter()
+        write_snapshot(self.snapshot_path, arrays, {
+            "key": self._snapshot_key(),
+            "changelog_id": self.changelog.last_id,
+            "vocabs": vocabs,
+            "n_probe": [self.investor_index.n_probe, self.company_index.n_probe],
+        })
+        snapshot = open_snapshot(self.snapshot_path)
+        print(f"  Wrote engine snapshot {self.snapshot_path} ({snapshot.nbytes / 1e6:.1f} MB, "
+              f"{time.perf_counter() - start:.2f}s)")
+        self._attach_snapshot(snapshot)
+    
+    def _attach_snapshot(self, snapshot: Snapshot):
+        meta = snapshot.meta
+        self._snapshot_changelog_id = meta["changelog_id"]
+        self.profile_columns = columns_from_arrays(snapshot.arrays("columns."), meta["vocabs"])
+        self.user_interactions = InteractionStore.from_arrays(snapshot.arrays("user_interactions."))
+        self.company_interactions = InteractionStore.from_arrays(snapshot.arrays("company_interactions."))
+        self.investor_index = IVFIndex.from_arrays(snapshot.arrays("investor_index."), meta["n_probe"][0])
+        self.company_index = IVFIndex.from_arrays(snapshot.arrays("company_index."), meta["n_probe"][1])
+    
+    def _load_from_snapshot(self, snapshot: Snapshot):
+        """Profiles from the database; columns, interactions and indexes mapped from the snapshot."""
+        with self._component("profiles"):
+            print(f"Loading profiles from database, arrays from snapshot {self.snapshot_path}...")
+            self.investors, self.companies, _, _, _ = load_from_db(self.changelog.conn, interactions=False)
+            # Replay the changelog from the snapshot's state
+            self.changelog.mark_applied(snapshot.meta["changelog_id"])
+            self._attach_snapshot(snapshot)
+            print(f"  Loaded {len(self.investors)} investors, {len(self.companies)} companies")
+            print(f"  User interactions: {len(self.user_interactions)} total")
+            print(f"  Company interactions: {len(self.company_interactions)} total")
+        
+        with self._component("embeddings"):
+            self.investor_embeddings = EmbeddingStore(EMBEDDINGS_DIR, "investor_embeddings", encoder_id())
+            self.company_embeddings = EmbeddingStore(EMBEDDINGS_DIR, "company_embeddings", encoder_id())
+            for store, profiles in ((self.investor_embeddings, self.investors), (self.company_embeddings, self.companies)):
+                if not store.open():
+                    store.sync({pid: p.desc for pid, p in profiles.items()}, encode_texts_bulk, batch_size=None)
+            print(f"  Investor embeddings: {len(self.investor_embeddings)} rows")
+            print(f"  Company embeddings: {len(self.company_embeddings)} rows")
+        
+        with self._component("index"):
+            print(f"  Investor index: {len(self.investor_index)} vectors in {self.investor_index.n_lists} lists")
+            print(f"  Company index: {len(self.company_index)} vectors in {self.company_index.n_lists} lists")
+        
+        with self._component("models"):
+            self.user_model, self.company_model = load_models()
+            self.model_version = model_version()
+    
+    @contextmanager
+    def _component(self, name: str):
+        """Track state and load time of one component for readiness()."""
+        status = self.status[name]
+        status.update(state="loading", error=None)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            status.update(state="failed", seconds=round(time.perf_counter() - start, 3), error=str(e))
+            raise
+        status.update(state="ready", seconds=round(time.perf_counter() - start, 3))
+    
+    def readiness(self) -> Dict[str, object]:
+        """
+        Per-component load state: {"ready": bool, "components": {name:
+        {"state": pending|loading|ready|failed, "seconds", "error"}}}.
+        """
+        return {
+            "ready": self._loaded,
+            "components": {name: dict(status) for name, status in self.status.items()},
+        }
     
     def recommend_for_investor(
         self,
         user_id: int,
         num_recommendations: int = NUM_RECOMMENDATIONS,
+        page: int = 0,
+        reciprocal: bool = False,
+        min_candidates: int = 0,
+        sort: bool = True,
     ) -> List[Tuple[int, str, float]]:
         """
         Get company recommendations for an investor.
+        Sampling is seeded per investor, so the same state gives the same pages.
         
         Args:
             user_id: The investor's ID
             num_recommendations: Number of recommendations to return
+            page: Which page of num_recommendations to return (pages don't overlap)
+            reciprocal: Rank by the harmonic mean of P(investor likes company)
+                and P(company likes investor) instead of the first alone
+            min_candidates: Keep at least this many candidates after the prefilter
+            sort: Order the page by probability (False: sampled draw order)
             
         Returns:
             List of (company_id, company_name, match_probability) tuples
@@ -615,26 +1275,47 @@ class RecommendationEngine:
         if not self._loaded:
             self.load()
         
-        return recommend_companies_for_user(
-            user_id=user_id,
-            investors=self.investors,
-            companies=self.companies,
-            user_interactions=self.user_interactions,
-            user_model=self.user_model,
-            num_recommendations=num_recommendations,
-        )
+        with self._rw.read():
+            return recommend_companies_for_user(
+                user_id=user_id,
+                investors=self.investors,
+                companies=self.companies,
+                user_interactions=self.user_interactions,
+                user_model=self.user_model,
+                num_recommendations=num_recommendations,
+                top_n=self._top_n(min_candidates),
+                investor_embeddings=self.investor_embeddings,
+                company_embeddings=self.company_embeddings,
+                profile_columns=self.profile_columns,
+                candidate_index=self.company_index,
+                seed=requester_seed("investor", user_id, RANDOM_SEED),
+                page=page,
+                company_model=self.company_model,
+                reciprocal=reciprocal,
+                sort=sort,
+            )
     
     def recommend_for_company(
         self,
         company_id: int,
         num_recommendations: int = NUM_RECOMMENDATIONS,
+        page: int = 0,
+        reciprocal: bool = False,
+        min_candidates: int = 0,
+        sort: bool = True,
     ) -> List[Tuple[int, str, float]]:
         """
         Get investor recommendations for a company.
+        Sampling is seeded per company, so the same state gives the same pages.
         
         Args:
             company_id: The company's ID
             num_recommendations: Number of recommendations to return
+            page: Which page of num_recommendations to return (pages don't overlap)
+            reciprocal: Rank by the harmonic mean of P(company likes investor)
+                and P(investor likes company) instead of the first alone
+            min_candidates: Keep at least this many candidates after the prefilter
+            sort: Order the page by probability (False: sampled draw order)
             
         Returns:
             List of (user_id, user_name, match_probability) tuples
@@ -642,14 +1323,329 @@ class RecommendationEngine:
         if not self._loaded:
             self.load()
         
-        return recommend_users_for_company(
-            company_id=company_id,
-            investors=self.investors,
-            companies=self.companies,
-            company_interactions=self.company_interactions,
-            company_model=self.company_model,
-            num_recommendations=num_recommendations,
+        with self._rw.read():
+            return recommend_users_for_company(
+                company_id=company_id,
+                investors=self.investors,
+                companies=self.companies,
+                company_interactions=self.company_interactions,
+                company_model=self.company_model,
+                num_recommendations=num_recommendations,
+                top_n=self._top_n(min_candidates),
+                investor_embeddings=self.investor_embeddings,
+                company_embeddings=self.company_embeddings,
+                profile_columns=self.profile_columns,
+                candidate_index=self.investor_index,
+                seed=requester_seed("company", company_id, RANDOM_SEED),
+                page=page,
+                user_model=self.user_model,
+                reciprocal=reciprocal,
+                sort=sort,
+            )
+    
+    def _top_n(self, min_candidates: int) -> Optional[int]:
+        return None if self.prefilter_top_n is None else max(self.prefilter_top_n, min_candidates)
+    
+    def recommend_batch(
+        self,
+        ids: List[int],
+        side: str,
+        k: int = NUM_RECOMMENDATIONS,
+        reciprocal: bool = False,
+    ) -> Dict[int, List[Tuple[int, str, float]]]:
+        """
+        Top-k recommendations for many requesters in one pass
+        (nightly digests, cache warming).
+        
+        Args:
+            ids: Investor ids (side="investor") or company ids (side="company")
+            side: Which side the requesters are on
+            k: Number of recommendations per requester
+            reciprocal: Rank by the harmonic mean of both sides' like probabilities
+            
+        Returns:
+            {requester_id: [(candidate_id, candidate_name, match_probability), ...]}
+        """
+        if not self._loaded:
+            self.load()
+        self.sync_changes()
+        
+        investor_side = side == "investor"
+        with self._rw.read():
+            return recommend_batch(
+                ids=ids,
+                side=side,
+                investors=self.investors,
+                companies=self.companies,
+                interactions=self.user_interactions if investor_side else self.company_interactions,
+                model=self.user_model if investor_side else self.company_model,
+                reverse_model=self.company_model if investor_side else self.user_model,
+                reciprocal=reciprocal,
+                profile_columns=self.profile_columns,
+                investor_embeddings=self.investor_embeddings,
+                company_embeddings=self.company_embeddings,
+                k=k,
+            )
+    
+    # -----------------------------
+    # Result cache
+    # -----------------------------
+    
+    def recommendations(
+        self,
+        side: str,
+        requester_id: int,
+        num_recommendations: int = NUM_RECOMMENDATIONS,
+        reciprocal: bool = False,
+    ) -> List[Tuple[int, str, float]]:
+        """
+        Recommendations through the versioned result cache (the first page
+        of recommendation_page). Entries are keyed by requester, page size
+        and scoring mode, and versioned by (catalog, requester profile,
+        requester interactions, models). Sampling is seeded per requester,
+        so an entry is exactly what recomputing would return until one of
+        those versions changes. A stale entry is served (minus candidates
+        swiped or deleted since) while it is recomputed in the background.
+        
+        Args:
+            side: "investor" (recommend companies) or "company" (recommend investors)
+            requester_id: The investor's or company's ID
+            num_recommendations: Number of recommendations to return
+            reciprocal: Two-sided scoring (see recommend_for_investor)
+        """
+        if not self._loaded:
+            self.load()
+        self.sync_changes()
+        
+        recommend = self.recommend_for_investor if side == "investor" else self.recommend_for_company
+        return self.results.get(
+            (side, requester_id, num_recommendations, reciprocal),
+            self.result_version(side, requester_id),  # read before computing
+            lambda: recommend(
+                requester_id, num_recommendations, reciprocal=reciprocal, min_candidates=num_recommendations
+            ),
+            lambda recs: self._still_valid(side, requester_id, recs),
+        )
+    
+    def result_version(self, side: str, requester_id: int) -> Tuple:
+        """(candidate catalog, requester profile, requester interactions, models) versions."""
+        key = (side, requester_id)
+        return (
+            self._catalog_versions["company" if side == "investor" else "investor"],
+            self._profile_versions.get(key, 0),
+            self._interaction_versions.get(key, 0),
+            self.model_version,
         )
+    
+    def _still_valid(self, side: str, requester_id: int, recs: List[Tuple[int, str, float]]):
+        # Stale entries never show a candidate the requester has swiped since or that was deleted
+        return self._unseen(side, requester_id, recs) or None
+    
+    def _unseen(self, side: str, requester_id: int, recs: List[Tuple[int, str, float]]) -> List[Tuple[int, str, float]]:
+        if side == "investor":
+            interactions, candidates = self.user_interactions, self.companies
+        else:
+            interactions, candidates = self.company_interactions, self.investors
+        return [r for r in recs if r[0] in candidates and not interactions.has(requester_id, r[0])]
+    
+    def recommendation_page(
+        self,
+        side: str,
+        requester_id: int,
+        num_recommendations: int = NUM_RECOMMENDATIONS,
+        cursor: Optional[str] = None,
+        reciprocal: bool = False,
+    ) -> Tuple[List[Tuple[int, str, float]], Optional[str]]:
+        """
+        One page of a recommendation stream, plus the cursor for the next
+        page (None when the stream is exhausted).
+        
+        Without a cursor, the page comes from recommendations() (the result
+        cache over recommend_for_investor / recommend_for_company): the
+        first draws from the configured prefilter pool, widened only
+        when the page is larger than the pool. A full page opens the
+        requester's queue (see Recommendation_Queue.py) and returns its
+        cursor; with a cursor, the page is popped from that queue, which
+        scores deeper pools only as later pages need them and skips
+        candidates swiped or deleted since it was filled. Pages are
+        consecutive slices of the Gumbel-top-k draw order (so each one is a
+        probability-proportional sample, not the exact top-k), shown by
+        probability, and hold at most MAX_PAGE_SIZE items.
+        
+        Args:
+            side: "investor" (recommend companies) or "company" (recommend investors)
+            requester_id: The investor's or company's ID
+            num_recommendations: Page size (capped at MAX_PAGE_SIZE)
+            cursor: Token returned with the previous page
+            reciprocal: Two-sided scoring (see recommend_for_investor)
+        
+        Raises:
+            CursorError: the cursor is malformed, expired or not this requester's
+        """
+        num = max(1, min(num_recommendations, MAX_PAGE_SIZE))
+        owner = (side, requester_id, reciprocal)
+        if cursor is None:
+            page = self.recommendations(side, requester_id, num, reciprocal)
+            # Only a full page can have a next one; the queue starts after what was served
+            return page, self.queues.start(owner, page, len(page)) if len(page) == num else None
+        
+        if not self._loaded:
+            self.load()
+        self.sync_changes()
+        page, cursor = self.queues.pop(cursor, owner, num, lambda items: self._unseen(side, requester_id, items))
+        page.sort(key=lambda r: r[2], reverse=True)
+        return page, cursor
+    
+    def _bump(self, versions: Dict[Tuple[str, int], int], side: str, requester_id: int):
+        versions[(side, requester_id)] = next(self._versions)
+    
+    # -----------------------------
+    # Swipe queues
+    # -----------------------------
+    
+    def _fill_queue(self, owner: Tuple[str, int, bool], depth: int) -> List[Tuple[int, str, float]]:
+        """First `depth` recommendations of a requester's draw order (a deeper pool as depth grows)."""
+        side, requester_id, reciprocal = owner
+        recommend = self.recommend_for_investor if side == "investor" else self.recommend_for_company
+        return recommend(requester_id, depth, reciprocal=reciprocal, min_candidates=depth, sort=False)
+    
+    def record_interaction(self, side: str, requester_id: int, candidate_id: int, interacted: bool):
+        """
+        Track a swipe (interacted=True) or a reverted interaction
+        (interacted=False), invalidate the requester's cached results and
+        keep its queue consistent. Needs no engine lock: the interaction
+        store and the queues lock themselves.
+        """
+        if not self._loaded:
+            return
+        self._set_interaction(side, requester_id, candidate_id, interacted)
+    
+    def _set_interaction(self, side: str, requester_id: int, candidate_id: int, interacted: bool):
+        interactions = self.user_interactions if side == "investor" else self.company_interactions
+        self._bump(self._interaction_versions, side, requester_id)
+        if interacted:
+            interactions.add(requester_id, candidate_id)  # skipped when the queue is read
+        else:
+            interactions.discard(requester_id, candidate_id)
+            self.queues.invalidate(side, requester_id)  # the candidate is eligible again
+    
+    def invalidate(self, side: str, requester_id: int):
+        """Drop cached recommendations and the queue for a requester (e.g. profile edited)."""
+        self._bump(self._profile_versions, side, requester_id)
+        self.queues.invalidate(side, requester_id)
+    
+    # -----------------------------
+    # Database changelog
+    # -----------------------------
+    
+    def sync_changes(self) -> int:
+        """
+        Apply rows changed in the database since the last poll (any worker's
+        registrations, profile edits, swipes). Returns the number applied.
+        Cheap when nothing changed; skipped if another thread is applying.
+        """
+        if self.changelog is None or not self._sync_lock.acquire(blocking=False):
+            return 0
+        try:
+            changes = self.changelog.poll()
+            if not changes:
+                return 0
+            self.apply_changes(changes)
+            self._prune_changelog()
+            return len(changes)
+        except Exception as e:
+            print(f"Changelog sync failed (retried on the next poll): {e}")
+            return 0
+        finally:
+            self._sync_lock.release()
+    
+    def apply_changes(self, changes: ChangeSet):
+        """
+        Incrementally upsert/delete profiles, embeddings, index rows and
+        interactions. Runs under the exclusive lock, so no request scores
+        against a half-applied batch. A batch read from the changelog is only
+        marked applied once it went through completely.
+        """
+        with self._rw.write():
+            self._apply_changes(changes)
+        if self.changelog is not None and changes.last_id > self.changelog.last_id:
+            self.changelog.mark_applied(changes.last_id, changes.data_version)
+    
+    def _prune_changelog(self):
+        """Every CHANGELOG_PRUNE_SECONDS: drop changelog rows all workers (and the snapshot) are past."""
+        if time.monotonic() - self._pruned_at < CHANGELOG_PRUNE_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        try:
+            self.changelog.prune(keep_after=self._snapshot_changelog_id)
+        except sqlite3.Error as e:
+            print(f"Changelog prune failed: {e}")
+    
+    def _apply_changes(self, changes: ChangeSet):
+        inv_up = {uid: investor_from_row(row) for uid, row in changes.investors.items() if row is not None}
+        # Deletes are checked against the columns too: after a snapshot load the
+        # profiles are newer than the arrays the changelog is replayed onto
+        inv_del = [
+            uid for uid, row in changes.investors.items()
+            if row is None and (uid in self.investors or uid in self.profile_columns.investor_row)
+        ]
+        comp_up = {cid: company_from_row(row) for cid, row in changes.companies.items() if row is not None}
+        comp_del = [
+            cid for cid, row in changes.companies.items()
+            if row is None and (cid in self.companies or cid in self.profile_columns.company_row)
+        ]
+        
+        # Profiles + columns
+        self.investors.update(inv_up)
+        self.companies.update(comp_up)
+        for uid in inv_del:
+            self.investors.pop(uid, None)
+        for cid in comp_del:
+            self.companies.pop(cid, None)
+        upsert_profiles(self.profile_columns, list(inv_up.values()), list(comp_up.values()))
+        remove_profiles(self.profile_columns, inv_del, comp_del)
+        
+        # Embeddings (only changed descriptions are encoded) + ANN indexes
+        for profiles, deleted, store, index in (
+            (inv_up, inv_del, self.investor_embeddings, self.investor_index),
+            (comp_up, comp_del, self.company_embeddings, self.company_index),
+        ):
+            store.upsert({pid: p.desc for pid, p in profiles.items()}, encode_texts)
+            store.remove(deleted)
+            if profiles:
+                index.add(list(profiles), store.vectors(list(profiles)))
+            for pid in deleted:
+                if pid in index:
+                    index.remove(pid)
+        
+        # Requesters whose own profile changed get a fresh queue and cache entry;
+        # a changed catalog makes every result on the other side stale
+        for uid in list(inv_up) + inv_del:
+            self.invalidate("investor", uid)
+        for cid in list(comp_up) + comp_del:
+            self.invalidate("company", cid)
+        if inv_up or inv_del:
+            self._catalog_versions["investor"] = next(self._versions)
+        if comp_up or comp_del:
+            self._catalog_versions["company"] = next(self._versions)
+        
+        # Interactions (skip ones the endpoint already applied in this process)
+        for side, pairs, interactions in (
+            ("investor", changes.user_interactions, self.user_interactions),
+            ("company", changes.company_interactions, self.company_interactions),
+        ):
+            for (rid, cid), interacted in pairs.items():
+                if interactions.has(rid, cid) != interacted:
+                    self._set_interaction(side, rid, cid, interacted)
+    
+    def stats(self) -> Dict[str, Optional[Dict]]:
+        """Serving metrics: result cache, swipe queues (and their cursor sessions), the shared encoder batcher and the engine lock."""
+        return {
+            "results": self.results.stats(),
+            "queues": self.queues.stats(),
+            "encoder_batching": encoder_batching_stats(),
+            "locks": self._rw.stats(),
+        }
 
 
 # -----------------------------
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Password_Hashing.py
+
+PBKDF2-SHA256 password hashes, stored as "<salt>$<hex digest>".
+
+The functions are module-level and stdlib-only so the API can run them in a
+worker process (Backend/main.py submits them to a bounded process pool);
+one 100,000-iteration hash is tens of milliseconds of CPU.
+
+Rows imported from the demo CSVs hold plaintext passwords; verify_password
+still accepts them and needs_upgrade() tells the API to replace them with a
+hash after the next successful login.
+"""
+
+import hashlib
+import hmac
+import secrets
+
+PBKDF2_ITERATIONS = 100000
+
+
+def _pbkdf2(password: str, salt: str) -> str:
+    return hashlib.pbkdf2_hmac(
+        'sha256',
+        password.encode('utf-8'),
+        salt.encode('utf-8'),
+        PBKDF2_ITERATIONS
+    ).hex()
+
+
+def hash_password(password: str) -> str:
+    """Hash password with salt for secure storage"""
+    salt = secrets.token_hex(16)
+    return f"{salt}${_pbkdf2(password, salt)}"
+
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    """Verify a password against a stored hash"""
+    # Check if this is a hashed password (contains $)
+    if '$' in stored_hash:
+        salt, hash_value = stored_hash.split('$', 1)
+        return hmac.compare_digest(_pbkdf2(password, salt), hash_value)
+    else:
+        # Plain text password (for existing demo data)
+        return password == stored_hash
+
+
+def needs_upgrade(stored_hash: str) -> bool:
+    """True for legacy plaintext rows"""
+    return '$' not in stored_hash
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Profile_Columns.py
+
+Columnar (struct-of-arrays) view of investor and company profiles, used to
+score every candidate in one vectorized pass instead of looping over
+profile objects in Python.
+
+- industries / investor stages / investor places -> packed uint64 bitmasks
+- company stage / company place                  -> integer codes
+- check size range / fund size                   -> float64 (NaN = unknown)
+
+upsert_profiles() / remove_profiles() apply live profile changes in place
+(vocabularies only grow; bitmasks are widened when they need another word).
+Columns restored from a read-only engine snapshot (columns_from_arrays) are
+copied the first time a row is overwritten.
+
+pair_features() reproduces jaccard / stage_fit / place_fit / check_fit from
+Model_Reccomendation.py exactly (same float64 operations in the same order),
+so prefilter_scores() is numerically identical to compute_prefilter_score().
+"""
+
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+# -----------------------------
+# Vocabulary / bitmask helpers
+# -----------------------------
+
+class Vocab:
+    """String -> integer code mapping shared by both sides."""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.codes: Dict[str, int] = {}
+        for v in values:
+            self.code(v)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def words(self) -> int:
+        """Number of uint64 words needed for a bitmask over this vocab."""
+        return max(1, (len(self.codes) + 63) // 64)
+
+    def code(self, value: str) -> int:
+        if value not in self.codes:
+            self.codes[value] = len(self.codes)
+        return self.codes[value]
+
+
+def _bitmasks(rows: List[List[str]], vocab: Vocab) -> np.ndarray:
+    """Pack lists of category strings into [N, W] uint64 bitmasks."""
+    bits = np.zeros((len(rows), vocab.words), dtype=np.uint64)
+    for i, values in enumerate(rows):
+        for v in values:
+            c = vocab.codes[v]
+            bits[i, c >> 6] |= np.uint64(1) << np.uint64(c & 63)
+    return bits
+
+
+def popcount_rows(bits: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a [N, W] uint64 array."""
+    bytes_ = np.ascontiguousarray(bits).view(np.uint8).reshape(len(bits), -1)
+    return _POPCOUNT8[bytes_].sum(axis=1, dtype=np.int64)
+
+
+def test_bit(bits: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """bits[i] has bit codes[i] set -> 1.0 else 0.0 (row-aligned)."""
+    codes = codes.astype(np.uint64)
+    words = bits[np.arange(len(bits)), (codes >> np.uint64(6)).astype(np.int64)]
+    return ((words >> (codes & np.uint64(63))) & np.uint64(1)).astype(np.float64)
+
+
+def _money(values: Iterable) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+# -----------------------------
+# Column containers
+# -----------------------------
+
+@dataclass
+class CompanyColumns:
+    ids: np.ndarray            # int64 [N]
+    industry_bits: np.ndarray  # uint64 [N, W]
+    industry_count: np.ndarray # int64 [N]
+    stage: np.ndarray          # int32 [N], code into ProfileColumns.stages
+    place: np.ndarray          # int32 [N], code into ProfileColumns.places
+    fund_size: np.ndarray      # float64 [N]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class InvestorColumns:
+    ids: np.ndarray            # int64 [N]
+    industry_bits: np.ndarray  # uint64 [N, W]
+    industry_count: np.ndarray # int64 [N]
+    stage_bits: np.ndarray     # uint64 [N, Ws]
+    place_bits: np.ndarray     # uint64 [N, Wp]
+    check_min: np.ndarray      # float64 [N]
+    check_max: np.ndarray      # float64 [N]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class ProfileColumns:
+    investors: InvestorColumns
+    companies: CompanyColumns
+    industries: Vocab
+    stages: Vocab
+    places: Vocab
+    investor_row: Dict[int, int]
+    company_row: Dict[int, int]
+
+
+def _company_columns(comp_list: List, industries: Vocab, stages: Vocab, places: Vocab) -> CompanyColumns:
+    comp_industry = _bitmasks([c.industries for c in comp_list], industries)
+    return CompanyColumns(
+        ids=np.array([c.id for c in comp_list], dtype=np.int64),
+        industry_bits=comp_industry,
+        industry_count=popcount_rows(comp_industry),
+        stage=np.array([stages.code(c.stage) for c in comp_list], dtype=np.int32),
+        place=np.array([places.code(c.place) for c in comp_list], dtype=np.int32),
+        fund_size=_money(c.fund_size for c in comp_list),
+    )
+
+
+def _investor_columns(inv_list: List, industries: Vocab, stages: Vocab, places: Vocab) -> InvestorColumns:
+    inv_industry = _bitmasks([p.industries for p in inv_list], industries)
+    return InvestorColumns(
+        ids=np.array([p.id for p in inv_list], dtype=np.int64),
+        industry_bits=inv_industry,
+        industry_count=popcount_rows(inv_industry),
+        stage_bits=_bitmasks([p.stages for p in inv_list], stages),
+        place_bits=_bitmasks([p.places for p in inv_list], places),
+        check_min=_money(p.check_min for p in inv_list),
+        check_max=_money(p.check_max for p in inv_list),
+    )
+
+
+def build_profile_columns(investors: Dict, companies: Dict) -> ProfileColumns:
+    """Build columnar arrays from {id: InvestorProfile} / {id: CompanyProfile}."""
+    inv_list = list(investors.values())
+    comp_list = list(companies.values())
+
+    industries = Vocab(v for p in inv_list + comp_list for v in p.industries)
+    stages = Vocab([v for p in inv_list for v in p.stages] + [c.stage for c in comp_list])
+    places = Vocab([v for p in inv_list for v in p.places] + [c.place for c in comp_list])
+
+    comp_cols = _company_columns(comp_list, industries, stages, places)
+    inv_cols = _investor_columns(inv_list, industries, stages, places)
+
+    return ProfileColumns(
+        investors=inv_cols,
+        companies=comp_cols,
+        industries=industries,
+        stages=stages,
+        places=places,
+        investor_row={int(i): r for r, i in enumerate(inv_cols.ids)},
+        company_row={int(c): r for r, c in enumerate(comp_cols.ids)},
+    )
+
+
+# -----------------------------
+# Live updates
+# -----------------------------
+
+def _widen(bits: np.ndarray, words: int) -> np.ndarray:
+    if bits.shape[1] >= words:
+        return bits
+    return np.hstack([bits, np.zeros((len(bits), words - bits.shape[1]), dtype=np.uint64)])
+
+
+def _upsert_rows(table, row_of: Dict[int, int], new):
+    """Overwrite rows whose id exists, append the rest (every column array)."""
+    existing = np.array([int(pid) in row_of for pid in new.ids], dtype=bool)
+    targets = np.array([row_of[int(pid)] for pid in new.ids[existing]], dtype=np.int64)
+    for f in fields(table):
+        old, upd = getattr(table, f.name), getattr(new, f.name)
+        if not old.flags.writeable:
+            old = old.copy()  # mapped from a snapshot
+            setattr(table, f.name, old)
+        old[targets] = upd[existing]
+        if not existing.all():
+            setattr(table, f.name, np.concatenate([old, upd[~existing]]))
+    for pid in new.ids[~existing]:
+        row_of[int(pid)] = len(row_of)
+
+
+def _remove_rows(table, row_of: Dict[int, int], ids: Sequence[int]):
+    gone = [row_of[pid] for pid in ids if pid in row_of]
+    if not gone:
+        return
+    keep = np.ones(len(table.ids), dtype=bool)
+    keep[gone] = False
+    for f in fields(table):
+        setattr(table, f.name, getattr(table, f.name)[keep])
+    row_of.clear()
+    row_of.update({int(pid): r for r, pid in enumerate(table.ids)})
+
+
+def upsert_profiles(cols: ProfileColumns, investors: Sequence = (), companies: Sequence = ()):
+    """Insert or update investor / company profiles in place."""
+    for p in investors:
+        for v in p.industries:
+            cols.industries.code(v)
+        for v in p.stages:
+            cols.stages.code(v)
+        for v in p.places:
+            cols.places.code(v)
+    for c in companies:
+        for v in c.industries:
+            cols.industries.code(v)
+        cols.stages.code(c.stage)
+        cols.places.code(c.place)
+
+    inv, comp = cols.investors, cols.companies
+    inv.industry_bits = _widen(inv.industry_bits, cols.industries.words)
+    comp.industry_bits = _widen(comp.industry_bits, cols.industries.words)
+    inv.stage_bits = _widen(inv.stage_bits, cols.stages.words)
+    inv.place_bits = _widen(inv.place_bits, cols.places.words)
+
+    if companies:
+        _upsert_rows(comp, cols.company_row, _company_columns(list(companies), cols.industries, cols.stages, cols.places))
+    if investors:
+        _upsert_rows(inv, cols.investor_row, _investor_columns(list(investors), cols.industries, cols.stages, cols.places))
+
+
+def remove_profiles(cols: ProfileColumns, investor_ids: Sequence[int] = (), company_ids: Sequence[int] = ()):
+    """Delete profiles by id (rows after them shift down)."""
+    _remove_rows(cols.investors, cols.investor_row, investor_ids)
+    _remove_rows(cols.companies, cols.company_row, company_ids)
+
+
+# -----------------------------
+# Snapshot (de)serialization
+# -----------------------------
+
+def columns_to_arrays(cols: ProfileColumns) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    """({'investors.<field>' / 'companies.<field>': array}, {vocab name: words in code order})."""
+    arrays = {}
+    for side, table in (("investors", cols.investors), ("companies", cols.companies)):
+        for f in fields(table):
+            arrays[f"{side}.{f.name}"] = getattr(table, f.name)
+    vocabs = {name: list(getattr(cols, name).codes) for name in ("industries", "stages", "places")}
+    return arrays, vocabs
+
+
+def columns_from_arrays(arrays: Dict[str, np.ndarray], vocabs: Dict[str, List[str]]) -> ProfileColumns:
+    """Inverse of columns_to_arrays(); the arrays are used as-is (no copy)."""
+    inv = InvestorColumns(**{f.name: arrays[f"investors.{f.name}"] for f in fields(InvestorColumns)})
+    comp = CompanyColumns(**{f.name: arrays[f"companies.{f.name}"] for f in fields(CompanyColumns)})
+    return ProfileColumns(
+        investors=inv,
+        companies=comp,
+        industries=Vocab(vocabs["industries"]),
+        stages=Vocab(vocabs["stages"]),
+        places=Vocab(vocabs["places"]),
+        investor_row={pid: r for r, pid in enumerate(inv.ids.tolist())},
+        company_row={pid: r for r, pid in enumerate(comp.ids.tolist())},
+    )
+
+
+# -----------------------------
+# Vectorized features
+# -----------------------------
+
+def check_fit_vec(u_min: np.ndarray, u_max: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    """Vectorized check_fit(); NaN stands in for None."""
+    u_min, u_max, amount = np.broadcast_arrays(
+        np.asarray(u_min, dtype=np.float64),
+        np.asarray(u_max, dtype=np.float64),
+        np.asarray(amount, dtype=np.float64),
+    )
+    valid = (u_min > 0) & (u_max > 0) & (amount > 0)  # False for NaN
+    lo = np.minimum(u_min, u_max)
+    hi = np.maximum(u_min, u_max)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mid = 0.5 * (lo + hi)
+        small_fit = np.maximum(0.0, np.minimum(0.3, (amount / lo) * 0.3))
+        base = 1.0 / (1.0 + amount / mid)
+        fit = np.minimum(1.0, base * 2.0)
+    fit = np.where(amount < lo, small_fit, fit)
+    return np.where(valid, fit, 0.3)
+
+
+def pair_features(
+    cols: ProfileColumns,
+    inv_rows: np.ndarray,
+    comp_rows: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Categorical features for row-aligned (investor, company) pairs.
+    Either index array may be a broadcast scalar row.
+    """
+    inv_rows, comp_rows = np.broadcast_arrays(np.asarray(inv_rows), np.asarray(comp_rows))
+    inv, comp = cols.investors, cols.companies
+
+    inter = popcount_rows(inv.industry_bits[inv_rows] & comp.industry_bits[comp_rows])
+    union = inv.industry_count[inv_rows] + comp.industry_count[comp_rows] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ind_ov = np.where(union > 0, inter / union, 0.0)
+
+    return {
+        "industry_overlap": ind_ov,
+        "stage_fit": test_bit(inv.stage_bits[inv_rows], comp.stage[comp_rows]),
+        "place_fit": test_bit(inv.place_bits[inv_rows], comp.place[comp_rows]),
+        "check_fit": check_fit_vec(inv.check_min[inv_rows], inv.check_max[inv_rows], comp.fund_size[comp_rows]),
+    }
+
+
+def prefilter_scores(cols: ProfileColumns, inv_rows: np.ndarray, comp_rows: np.ndarray) -> np.ndarray:
+    """Vectorized compute_prefilter_score() over row-aligned pairs."""
+    f = pair_features(cols, inv_rows, comp_rows)
+    return (
+        0.35 * f["industry_overlap"] +
+        0.25 * f["stage_fit"] +
+        0.20 * f["place_fit"] +
+        0.20 * f["check_fit"]
+    )
+
+
+def top_n_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """
+    Indices of the n highest scores, in the same order a stable descending
+    sort would give (ties keep their original order). O(N) via argpartition.
+    """
+    if n <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if n < len(scores):
+        kth = scores[np.argpartition(scores, len(scores) - n)[len(scores) - n]]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[: n - len(above)]
+        idx = np.concatenate([above, ties])
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
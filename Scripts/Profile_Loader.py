@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Profile_Loader.py
+
+Fast bulk reads of profiles and interactions from invest.sqlite.
+
+- one SELECT per table, fetching only the columns the engine uses
+- money strings ('$5M', '$50k', '200,000') parsed with vectorized string ops
+  (same rules as Model_Reccomendation.parse_money), once per distinct value
+- comma-separated lists split/stripped in one pass over the exploded
+  distinct values; every category string is interned through a shared
+  pool, and rows with the same field value share one (read-only) list
+- interactions come back as one group_concat string of packed
+  (requester << 32 | candidate) ints, parsed by numpy straight into an
+  InteractionStore (CSR arrays, see Interaction_Store.py)
+
+The engine builds its profile objects from these columns; load time and
+memory against the CSV loaders are measured by `Benchmarks.py load`.
+"""
+
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Interaction_Store import InteractionStore
+from Make_Database import CHANGELOG, CUI, DB_COMPANY_INFO, DB_USER_INFO, UCI
+
+
+def read_columns(conn: sqlite3.Connection, sql: str) -> Dict[str, list]:
+    """Run one query and return {column: list of values}."""
+    cur = conn.execute(sql)
+    names = [d[0] for d in cur.description]
+    rows = cur.fetchall()
+    if not rows:
+        return {name: [] for name in names}
+    return {name: list(col) for name, col in zip(names, zip(*rows))}
+
+
+def parse_money_vec(values: Sequence) -> np.ndarray:
+    """Vectorized parse_money(): float64 dollars, NaN where unparseable/missing."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna(""))
+    return _parse_money_unique(uniques)[codes]
+
+
+def _parse_money_unique(values) -> np.ndarray:
+    s = pd.Series(values, dtype=object).astype(str).str.strip()
+    s = s.str.replace(r"[$,]", "", regex=True).str.lower()
+    mult = np.where(s.str.endswith("k"), 1e3, np.where(s.str.endswith("m"), 1e6, 1.0))
+    digits = s.where(mult == 1.0, s.str[:-1]).str.strip()
+    return pd.to_numeric(digits, errors="coerce").to_numpy(dtype=np.float64) * mult
+
+
+def split_lists(values: Sequence, pool: Dict[str, str]) -> List[List[str]]:
+    """
+    'AI, Fintech' -> ['AI', 'Fintech'] for every value, with strings interned
+    through `pool` (shared across calls so both sides reuse the same objects).
+    Rows with identical values get the same list object.
+    """
+    row_codes, fields = pd.factorize(pd.Series(values, dtype=object).fillna(""))
+    parts = pd.Series(fields, dtype=object).astype(str).str.split(",").explode().str.strip()
+    parts = parts[parts != ""]
+    interned = [pool.setdefault(p, p) for p in parts.tolist()]
+
+    # parts is ordered by source field; cut the flat list at field boundaries
+    bounds = np.searchsorted(parts.index.to_numpy(), np.arange(len(fields) + 1)).tolist()
+    lists = [interned[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    return [lists[c] for c in row_codes.tolist()]
+
+
+def intern_values(values: Sequence, pool: Dict[str, str]) -> List[str]:
+    """Single category per row (company stage / place), interned."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna(""))
+    interned = np.array([pool.setdefault(str(u), str(u)) for u in uniques], dtype=object)
+    return interned[codes].tolist()
+
+
+def read_interactions(conn: sqlite3.Connection, table: str, k1: str, k2: str) -> InteractionStore:
+    """Actual interactions (like_or_not 0/1) of one table, grouped by k1."""
+    packed = conn.execute(
+        f"SELECT group_concat(({k1} << 32) | {k2}) FROM {table} WHERE like_or_not != -1"
+    ).fetchone()[0]
+    if not packed:
+        return InteractionStore.from_packed(np.zeros(0, dtype=np.int64))
+    return InteractionStore.from_packed(np.array(packed.split(","), dtype=np.int64))
+
+
+def read_snapshot(
+    conn: sqlite3.Connection,
+    interactions: bool = True,
+) -> Tuple[Dict, Dict, Optional[InteractionStore], Optional[InteractionStore], int]:
+    """
+    Parsed investor / company columns, both interaction maps and the last
+    changelog id, read inside one transaction so they describe the same
+    database state. interactions=False skips the interaction tables (both
+    maps come back as None), for engines that map them from a snapshot.
+    """
+    pool: Dict[str, str] = {}
+    conn.execute("BEGIN")
+    try:
+        changelog_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {CHANGELOG}").fetchone()[0]
+        users = read_columns(
+            conn,
+            f"SELECT user_id, U_name, U_invest_requirements, U_industry, U_fund_stage, U_places, "
+            f"U_check_size_min, U_check_size_max FROM {DB_USER_INFO} ORDER BY user_id",
+        )
+        comps = read_columns(
+            conn,
+            f"SELECT company_id, C_name, C_desc, C_industry, C_funding_stage, C_place, C_fund_size "
+            f"FROM {DB_COMPANY_INFO} ORDER BY company_id",
+        )
+        user_interactions = company_interactions = None
+        if interactions:
+            user_interactions = read_interactions(conn, UCI, "u_id", "c_id")
+            company_interactions = read_interactions(conn, CUI, "c_id", "u_id")
+    finally:
+        conn.execute("COMMIT")
+
+    investors = {
+        "id": users["user_id"],
+        "name": users["U_name"],
+        "desc": users["U_invest_requirements"],
+        "industries": split_lists(users["U_industry"], pool),
+        "stages": split_lists(users["U_fund_stage"], pool),
+        "places": split_lists(users["U_places"], pool),
+        "check_min": parse_money_vec(users["U_check_size_min"]),
+        "check_max": parse_money_vec(users["U_check_size_max"]),
+    }
+    companies = {
+        "id": comps["company_id"],
+        "name": comps["C_name"],
+        "desc": comps["C_desc"],
+        "industries": split_lists(comps["C_industry"], pool),
+        "stage": intern_values(comps["C_funding_stage"], pool),
+        "place": intern_values(comps["C_place"], pool),
+        "fund_size": parse_money_vec(comps["C_fund_size"]),
+    }
+    return investors, companies, user_interactions, company_interactions, changelog_id
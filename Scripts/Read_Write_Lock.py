@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Read_Write_Lock.py
+
+Shared/exclusive lock for the recommendation engine.
+
+Scoring requests take the lock shared (any number at once) and see profiles,
+columns, embeddings and indexes that cannot change under them; applying a
+changelog batch takes it exclusively. Writers are preferred: once a writer
+is waiting, new readers queue behind it, so a steady stream of requests
+cannot starve updates.
+
+Not reentrant: a thread holding read() must not call read() or write()
+again.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class ReadWriteLock:
+    """Many readers or one writer, writer-preferring."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+        self._reads = 0
+        self._writes = 0
+        self._write_wait = 0.0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+            self._reads += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        start = time.perf_counter()
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+            self._writes += 1
+            self._write_wait += time.perf_counter() - start
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "reads": self._reads,
+                "writes": self._writes,
+                "active_readers": self._readers,
+                "write_wait_ms_mean": self._write_wait / self._writes * 1000.0 if self._writes else 0.0,
+            }
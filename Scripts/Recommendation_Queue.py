@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Recommendation_Queue.py
+
+Materialized per-requester recommendation queues, held as cursor sessions
+(Cursor_Store.py) so the recommendation endpoints page through them.
+
+Each active requester (side, requester_id, reciprocal) has at most one
+queue of pre-scored recommendations: starting a stream opens it (replacing
+the previous one), and reads with the returned cursor pop the following
+pages instead of rerunning the full pipeline. A read that finds the queue
+empty fills it synchronously; a read that leaves fewer than
+`low_watermark` items schedules a refill on a single background worker. A
+fill is a deeper scoring pass whose candidates the queue does not hold yet
+are appended, up to `max_depth` items per queue. The session store caps
+the total number of queued items, so inactive requesters' queues are
+evicted first.
+
+Invalidation:
+- invalidate(side, rid): profile edit / interaction revert -> drop the
+  queue (its cursor is rejected; a refill already running is discarded)
+- candidates swiped or deleted since they were queued are skipped when a
+  page is read
+"""
+
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Cursor_Store import CursorError, CursorStore, encode_cursor
+
+QUEUE_FILL_SIZE = 20       # recommendations added per (re)fill
+QUEUE_LOW_WATERMARK = 5    # refill in the background below this many unread items
+QUEUE_MAX_DEPTH = 200      # recommendations one queue holds at most
+
+Owner = Tuple[str, int, bool]
+Item = Tuple[int, str, float]
+
+
+class RecommendationQueues:
+    """Per-requester recommendation queues over cursor sessions, with background refill."""
+
+    def __init__(
+        self,
+        fill_fn: Callable[[Owner, int], List[Item]],
+        sessions: Optional[CursorStore] = None,
+        fill_size: int = QUEUE_FILL_SIZE,
+        low_watermark: int = QUEUE_LOW_WATERMARK,
+        max_depth: int = QUEUE_MAX_DEPTH,
+    ):
+        self.fill_fn = fill_fn  # (owner, depth) -> the owner's first `depth` recommendations, in draw order
+        self.sessions = sessions or CursorStore()
+        self.fill_size = fill_size
+        self.low_watermark = low_watermark
+        self.max_depth = max_depth
+
+        self._lock = threading.Lock()
+        self._pending: "queue.Queue[Tuple[str, Owner]]" = queue.Queue()
+        self._scheduled = set()
+        self._worker = None
+
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+
+    # -----------------------------
+    # Serving
+    # -----------------------------
+
+    def start(self, owner: Owner, items: List[Item], offset: int = 0, complete: bool = False) -> str:
+        """
+        Open the owner's queue with `items` (in draw order), the first
+        `offset` of them already served; returns the cursor after those.
+        complete=True: `items` already holds every eligible candidate.
+        """
+        sid = self.sessions.open(owner, items, complete or len(items) >= self.max_depth)
+        return encode_cursor(sid, offset)
+
+    def pop(
+        self,
+        token: str,
+        owner: Owner,
+        n: int,
+        keep: Callable[[List[Item]], List[Item]],
+    ) -> Tuple[List[Item], Optional[str]]:
+        """
+        Up to n items after the cursor (`keep` drops the ones that no longer
+        apply, e.g. swiped since), and the cursor for the next read (None
+        once the queue is exhausted). Fills the queue synchronously if it
+        runs dry.
+
+        Raises:
+            CursorError: the cursor is malformed, expired, dropped or not this owner's
+        """
+        sid, offset, items, complete = self.sessions.read(token, owner)
+        page, filled = [], False
+        while len(page) < n:
+            if offset >= len(items):
+                if complete:
+                    break
+                self._fill(sid, owner, items)
+                items, complete = self.sessions.items(sid)
+                filled = True
+                continue
+            chunk = items[offset:offset + n - len(page)]
+            offset += len(chunk)
+            page.extend(keep(chunk))
+
+        with self._lock:
+            if filled:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not complete and len(items) - offset < self.low_watermark:
+            self._schedule(sid, owner)
+        return page, encode_cursor(sid, offset) if offset < len(items) or not complete else None
+
+    # -----------------------------
+    # Invalidation
+    # -----------------------------
+
+    def invalidate(self, side: str, rid: int):
+        """Drop a requester's queues (both scoring modes); refills in flight are discarded."""
+        for reciprocal in (False, True):
+            self.sessions.close((side, rid, reciprocal))
+
+    # -----------------------------
+    # Filling
+    # -----------------------------
+
+    def _fill(self, sid: str, owner: Owner, items: List[Item]) -> bool:
+        """Score one step deeper and append the recommendations not queued yet."""
+        depth = min(len(items) + self.fill_size, self.max_depth)
+        drawn = self.fill_fn(owner, depth)
+        held = {item[0] for item in items}
+        fresh = [item for item in drawn if item[0] not in held][:self.max_depth - len(items)]
+        # Fewer than `depth` means every eligible candidate was drawn
+        complete = len(drawn) < depth or len(items) + len(fresh) >= self.max_depth
+        return self.sessions.extend(sid, len(items), fresh, complete)
+
+    def _schedule(self, sid: str, owner: Owner):
+        with self._lock:
+            if sid in self._scheduled:
+                return
+            self._scheduled.add(sid)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="recommendation-refill", daemon=True)
+                self._worker.start()
+        self._pending.put((sid, owner))
+
+    def _run(self):
+        while True:
+            sid, owner = self._pending.get()
+            try:
+                items, complete = self.sessions.items(sid)
+                if not complete and self._fill(sid, owner, items):
+                    with self._lock:
+                        self.refills += 1
+            except CursorError:
+                pass  # dropped, replaced or evicted meanwhile
+            except Exception as e:
+                print(f"Queue refill failed for {owner}: {e}")
+            finally:
+                with self._lock:
+                    self._scheduled.discard(sid)
+
+    # -----------------------------
+    # Introspection
+    # -----------------------------
+
+    def stats(self) -> Dict[str, int]:
+        """Queue hits / synchronous fills (misses) / background refills, plus the session store's counters."""
+        with self._lock:
+            counters = {"hits": self.hits, "misses": self.misses, "refills": self.refills}
+        return {**counters, **self.sessions.stats()}
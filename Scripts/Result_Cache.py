@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Result_Cache.py
+
+Versioned LRU/TTL cache of recommendation results with
+stale-while-revalidate.
+
+Each entry is stored under a key (side, requester_id, num, reciprocal) with
+the version it was computed at: (candidate catalog version, requester
+profile version, requester interaction version, model version). A lookup
+with the current version is a hit while the entry is younger than `ttl`.
+Otherwise the entry is stale:
+
+- younger than `max_stale` and still usable (the caller's `usable` hook can
+  drop candidates swiped since, and returns None if nothing is left):
+  served immediately, and one background worker recomputes it
+- else: a miss, computed synchronously
+
+Versions only grow, so bumping a requester's interaction version (swipe,
+reverted interaction) or profile version invalidates exactly that
+requester's entries; a catalog or model change makes every entry on that
+side stale. hit / miss / stale / refresh / eviction counters come back from
+stats().
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+CACHE_MAX_ENTRIES = 100_000  # LRU cap
+CACHE_TTL_SECONDS = 300.0     # served as a hit for this long if the version matches
+CACHE_MAX_STALE_SECONDS = 3600.0  # stale entries older than this are recomputed synchronously
+
+
+class _Entry:
+    __slots__ = ("version", "value", "stored")
+
+    def __init__(self, version, value):
+        self.version = version
+        self.value = value
+        self.stored = time.monotonic()
+
+
+class VersionedCache:
+    """LRU of versioned results with background revalidation."""
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL_SECONDS,
+        max_stale: float = CACHE_MAX_STALE_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_stale = max_stale
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._pending: "queue.Queue[tuple[Hashable, Hashable, Callable]]" = queue.Queue()
+        self._refreshing = set()
+        self._worker = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+
+    def get(
+        self,
+        key: Hashable,
+        version: Hashable,
+        compute: Callable[[], object],
+        usable: Optional[Callable[[object], Optional[object]]] = None,
+    ):
+        """
+        Cached value for (key, version), computing it on a miss. `version`
+        must be read before `compute` runs, so changes made meanwhile leave
+        the stored entry stale rather than wrongly fresh.
+        """
+        now = time.monotonic()
+        stale = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = now - entry.stored
+                if entry.version == version and age < self.ttl:
+                    self.hits += 1
+                    return entry.value
+                if age < self.max_stale:
+                    stale = entry.value
+
+        if stale is not None and usable is not None:
+            stale = usable(stale)
+        if stale is not None:
+            with self._lock:
+                self.stale += 1
+            self._schedule(key, version, compute)
+            return stale
+
+        with self._lock:
+            self.misses += 1
+        value = compute()
+        self.put(key, version, value)
+        return value
+
+    def put(self, key: Hashable, version: Hashable, value):
+        with self._lock:
+            self._entries[key] = _Entry(version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop one entry outright (no stale serving)."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # -----------------------------
+    # Background revalidation
+    # -----------------------------
+
+    def _schedule(self, key: Hashable, version: Hashable, compute: Callable[[], object]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="result-cache-refresh", daemon=True)
+                self._worker.start()
+        self._pending.put((key, version, compute))
+
+    def _run(self):
+        while True:
+            key, version, compute = self._pending.get()
+            try:
+                self.put(key, version, compute())
+                with self._lock:
+                    self.refreshes += 1
+            except Exception as e:
+                print(f"Result cache refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+    # -----------------------------
+    # Introspection
+    # -----------------------------
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.stale) / lookups if lookups else 0.0,
+            }
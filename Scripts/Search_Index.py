@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Search_Index.py
+
+Profile search for /api/search/investors and /api/search/companies over
+the FTS5 indexes created by Make_Database.py (user_info_fts,
+company_info_fts).
+
+- the query is split into words, each matched as a prefix and all of them
+  required: "hea tech" -> "hea"* "tech"*, so results follow the search
+  bar as the user types
+- results are ordered by BM25, with matches in the name weighted above
+  industry and industry above description; FTS5 ranks every match
+  (ORDER BY rank LIMIT ?)
+- the description comes back as an FTS5 snippet around the matched words
+  (about SNIPPET_TOKENS tokens) instead of the first 150 characters
+
+search_like() is the previous `LIKE '%q%'` scan (full table scan,
+unranked), kept for INVESTLINK_SEARCH_FTS=0 and the benchmarks.
+
+Cost (`Benchmarks.py search`): a query is proportional to its number of
+matches, since every match is ranked. Words that match nothing or few
+rows are answered from the index in about a millisecond at any size,
+where LIKE scans the whole table. Very common words and the first one or
+two letters typed match most rows and take hundreds of milliseconds at
+1M rows, where LIKE returns its first `limit` hits unranked almost at once.
+"""
+
+import re
+import sqlite3
+from typing import List, Optional, Sequence
+
+from Make_Database import FTS_SUFFIX, SEARCH_INDEXES
+
+SNIPPET_TOKENS = 24
+DESCRIPTION_CHARS = 150  # truncation when there is no match to centre a snippet on
+BM25_WEIGHTS = (10.0, 1.0, 4.0)  # name, description, industry (SEARCH_INDEXES column order)
+
+_WORD = re.compile(r"\w+")
+
+
+def match_expression(q: str) -> Optional[str]:
+    """FTS5 MATCH string for a free-text query (None if it has no words)."""
+    words = _WORD.findall(q.lower())
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _truncated(column: str) -> str:
+    return (
+        f"CASE WHEN length({column}) > {DESCRIPTION_CHARS} "
+        f"THEN substr({column}, 1, {DESCRIPTION_CHARS}) || '...' ELSE {column} END"
+    )
+
+
+def search(conn: sqlite3.Connection, table: str, q: str, limit: int,
+           columns: Sequence[str] = (), exclude_id: int = 1) -> List[tuple]:
+    """
+    Rows of (id, name, description, *columns) from `table` matching q, best
+    first. An empty query lists the first `limit` profiles.
+    """
+    key, (name, description, _) = SEARCH_INDEXES[table]
+    extra = "".join(f", t.{c}" for c in columns)
+    if not q:
+        return conn.execute(
+            f"""SELECT t.{key}, t.{name}, {_truncated('t.' + description)}{extra}
+                FROM {table} t
+                WHERE t.{key} != ?
+                LIMIT ?""",
+            (exclude_id, limit)
+        ).fetchall()
+
+    expression = match_expression(q)
+    if expression is None:
+        return []
+    fts = table + FTS_SUFFIX
+    # rank uses the weighted bm25; snippets are only built for returned rows
+    return conn.execute(
+        f"""SELECT t.{key}, t.{name}, snippet({fts}, 1, '', '', '...', {SNIPPET_TOKENS}){extra}
+            FROM {fts}
+            CROSS JOIN {table} t ON t.{key} = {fts}.rowid
+            WHERE {fts} MATCH ?
+              AND rank MATCH 'bm25({', '.join(map(str, BM25_WEIGHTS))})'
+              AND {fts}.rowid != ?
+            ORDER BY rank
+            LIMIT ?""",
+        (expression, exclude_id, limit)
+    ).fetchall()
+
+
+def search_like(conn: sqlite3.Connection, table: str, q: str, limit: int,
+                columns: Sequence[str] = (), exclude_id: int = 1) -> List[tuple]:
+    """Same rows via `LIKE '%q%'` on the indexed columns (unranked full scan)."""
+    if not q:
+        return search(conn, table, q, limit, columns, exclude_id)
+    key, (name, description, industry) = SEARCH_INDEXES[table]
+    extra = "".join(f", t.{c}" for c in columns)
+    pattern = f"%{q}%"
+    return conn.execute(
+        f"""SELECT t.{key}, t.{name}, {_truncated('t.' + description)}{extra}
+            FROM {table} t
+            WHERE t.{key} != ? AND (
+                t.{name} LIKE ? OR
+                t.{description} LIKE ? OR
+                t.{industry} LIKE ?
+            )
+            LIMIT ?""",
+        (exclude_id, pattern, pattern, pattern, limit)
+    ).fetchall()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Sqlite_Pool.py
+
+Long-lived, tuned SQLite connections for the API.
+
+Opening a connection per request re-reads the schema, starts with a cold
+page cache and never applies any PRAGMAs. The pool instead keeps:
+
+- up to `max_readers` read connections (PRAGMA query_only), checked out
+  for one request at a time; callers beyond that wait up to `timeout`
+  seconds for one to come back
+- one writer connection, serialized by a lock inside the process (other
+  worker processes are handled by SQLite's own locking + busy_timeout)
+
+Every connection is opened with WAL, synchronous=NORMAL, mmap_size,
+cache_size and busy_timeout, and keeps a per-connection prepared statement
+cache (`cached_statements`), which only pays off now that connections
+outlive a request. Connections older than `max_age` seconds are closed and
+reopened when they are next checked in. A connection is rolled back before
+it goes back to the pool if the request left a transaction open.
+
+Check-out waits and connection ages are reported by stats().
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+POOL_MAX_READERS = 16
+POOL_TIMEOUT_SECONDS = 10.0
+POOL_MAX_AGE_SECONDS = 3600.0
+STATEMENT_CACHE = 256  # prepared statements kept per connection
+
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("mmap_size", 256 * 2**20),
+    ("cache_size", -16_000),  # KiB, per connection
+    ("busy_timeout", 5000),   # ms
+)
+
+
+class PoolTimeout(RuntimeError):
+    """No read connection came back within the pool timeout."""
+
+
+class _Conn:
+    __slots__ = ("conn", "opened")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.opened = time.monotonic()
+
+
+class ConnectionPool:
+    """Bounded read connections + one writer on a single SQLite database."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_readers: int = POOL_MAX_READERS,
+        timeout: float = POOL_TIMEOUT_SECONDS,
+        max_age: float = POOL_MAX_AGE_SECONDS,
+    ):
+        self.path = Path(path)
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self.max_age = max_age
+
+        self._idle: "queue.LifoQueue[_Conn]" = queue.LifoQueue()  # most recently used first: warmest cache
+        self._readers: List[_Conn] = []
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.writes = 0
+        self.write_wait_seconds = 0.0
+        self.recycled = 0
+
+    def _connect(self, query_only: bool) -> _Conn:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+        conn.row_factory = sqlite3.Row
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name}={value}")
+        if query_only:
+            conn.execute("PRAGMA query_only=ON")
+        return _Conn(conn)
+
+    def _reset(self, c: _Conn, query_only: bool) -> _Conn:
+        """Roll back a leftover transaction; reopen the connection if it is too old."""
+        if c.conn.in_transaction:
+            c.conn.rollback()
+        if time.monotonic() - c.opened < self.max_age:
+            return c
+        c.conn.close()
+        with self._lock:
+            self.recycled += 1
+        return self._connect(query_only)
+
+    # -----------------------------
+    # Check-out
+    # -----------------------------
+
+    @contextmanager
+    def reader(self):
+        """A read-only connection for the duration of the block."""
+        start = time.perf_counter()
+        c = self._checkout()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        try:
+            yield c.conn
+        finally:
+            self._checkin(c)
+
+    def _checkout(self) -> _Conn:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = len(self._readers) < self.max_readers
+            if grow:
+                self._readers.append(None)  # reserve the slot before connecting outside the lock
+            else:
+                self.waits += 1
+        if grow:
+            try:
+                c = self._connect(query_only=True)
+            except Exception:
+                with self._lock:
+                    self._readers.remove(None)
+                raise
+            with self._lock:
+                self._readers[self._readers.index(None)] = c
+            return c
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"no database connection free after {self.timeout:.0f} s")
+
+    def _checkin(self, c: _Conn):
+        try:
+            fresh = self._reset(c, query_only=True)
+        except sqlite3.Error:
+            fresh = None
+        with self._lock:
+            i = self._readers.index(c)
+            if fresh is None:
+                del self._readers[i]  # broken: the next checkout opens a new one
+            else:
+                self._readers[i] = fresh
+        if fresh is not None:
+            self._idle.put(fresh)
+
+    @contextmanager
+    def writer(self):
+        """The writer connection, held exclusively for the duration of the block."""
+        start = time.perf_counter()
+        with self._writer_lock:
+            with self._lock:
+                self.writes += 1
+                self.write_wait_seconds += time.perf_counter() - start
+            if self._writer is None:
+                self._writer = self._connect(query_only=False)
+            try:
+                yield self._writer.conn
+            finally:
+                try:
+                    self._writer = self._reset(self._writer, query_only=False)
+                except sqlite3.Error:
+                    self._writer = None
+
+    def close(self):
+        with self._writer_lock, self._lock:
+            for c in self._readers + [self._writer]:
+                if c is not None:
+                    c.conn.close()
+            self._readers.clear()
+            self._writer = None
+            self._idle = queue.LifoQueue()
+
+    # -----------------------------
+    # Introspection
+    # -----------------------------
+
+    def stats(self) -> Dict[str, float]:
+        now = time.monotonic()
+        with self._lock:
+            open_readers = [c for c in self._readers if c is not None]
+            ages = [now - c.opened for c in open_readers + ([self._writer] if self._writer else [])]
+            return {
+                "readers": len(open_readers),
+                "max_readers": self.max_readers,
+                "idle_readers": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "mean_wait_ms": 1e3 * self.wait_seconds / self.checkouts if self.checkouts else 0.0,
+                "max_wait_ms": 1e3 * self.max_wait_seconds,
+                "writes": self.writes,
+                "mean_write_wait_ms": 1e3 * self.write_wait_seconds / self.writes if self.writes else 0.0,
+                "recycled": self.recycled,
+                "oldest_connection_s": max(ages) if ages else 0.0,
+                "mean_connection_age_s": sum(ages) / len(ages) if ages else 0.0,
+            }
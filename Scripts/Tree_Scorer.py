@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Tree_Scorer.py
+
+Pure-numpy scorer for the LightGBM text models in Models/.
+
+The model file is parsed once and every tree is flattened into contiguous
+arrays. Two evaluation strategies, both free of per-row Python work, pandas
+and Booster call overhead:
+
+- Bitvector (QuickScorer-style), used when no split has a missing-value rule
+  and every tree has <= 64 leaves (true for our models): each tree's leaves
+  are a uint64 bitmask; a split whose test is false clears the leaves of its
+  left subtree. Per feature, splits are sorted by threshold and prefix-ANDed
+  per tree, so a row needs one searchsorted + one table row per feature, and
+  the exit leaf is the lowest surviving bit.
+- Node traversal: leaves are self-looping nodes and all trees step down
+  together for max-depth iterations, honouring LightGBM's missing rules.
+
+Supports numerical splits (all our models use these) with LightGBM's
+missing-value rules, and the `binary` / `regression` objectives.
+Outputs match lgb.Booster.predict() up to floating-point summation order.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+_ZERO_THRESHOLD = 1e-35  # LightGBM kZeroThreshold
+_MISSING_ZERO = 1
+_MISSING_NAN = 2
+PREDICT_BLOCK_ROWS = 4096  # rows evaluated per vectorized block
+
+
+def _parse_blocks(text: str) -> List[Dict[str, str]]:
+    """Split a LightGBM model file into key=value blocks (header, trees, ...)."""
+    blocks, cur = [], {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            if cur:
+                blocks.append(cur)
+                cur = {}
+            continue
+        if line == "end of trees":
+            break
+        if "=" in line:
+            k, v = line.split("=", 1)
+            cur[k] = v
+    if cur:
+        blocks.append(cur)
+    return blocks
+
+
+def _floats(s: str) -> np.ndarray:
+    return np.array(s.split(), dtype=np.float64)
+
+
+def _ints(s: str) -> np.ndarray:
+    return np.array(s.split(), dtype=np.int64)
+
+
+class CompiledTreeModel:
+    """Flattened LightGBM ensemble evaluated with numpy."""
+
+    def __init__(self, text: str):
+        blocks = _parse_blocks(text)
+        header = blocks[0]
+        trees = [b for b in blocks[1:] if "Tree" in b]
+
+        self.feature_names = header.get("feature_names", "").split()
+        self.num_features = int(header["max_feature_idx"]) + 1
+        self.average_output = "average_output" in text.split("Tree=", 1)[0]
+
+        objective = header.get("objective", "regression").split()
+        self.objective = objective[0]
+        self.sigmoid = 1.0
+        for opt in objective[1:]:
+            if opt.startswith("sigmoid:"):
+                self.sigmoid = float(opt.split(":", 1)[1])
+        if self.objective not in ("binary", "regression", "regression_l2"):
+            raise ValueError(f"Unsupported objective: {self.objective}")
+        if int(header.get("num_class", 1)) != 1:
+            raise ValueError("Multiclass models are not supported")
+
+        feature, threshold, left, right = [], [], [], []
+        default_left, missing_type, value, roots = [], [], [], []
+        parsed = []  # (left_child, right_child, split_feature, threshold, leaf_value) per tree
+        depth = 1
+        offset = 0
+        for tree in trees:
+            if int(tree.get("num_cat", 0)) > 0 or tree.get("is_linear", "0") != "0":
+                raise ValueError("Categorical splits and linear trees are not supported")
+
+            leaf_values = _floats(tree["leaf_value"])
+            n_leaves = int(tree["num_leaves"])
+            n_inner = n_leaves - 1
+            leaf_base = offset + n_inner
+            roots.append(offset if n_inner else leaf_base)
+
+            if n_inner:
+                dt = _ints(tree["decision_type"])
+                lc, rc = _ints(tree["left_child"]), _ints(tree["right_child"])
+                # Children < 0 are leaves: ~child is the leaf index
+                feature.append(_ints(tree["split_feature"]))
+                threshold.append(_floats(tree["threshold"]))
+                left.append(np.where(lc >= 0, offset + lc, leaf_base + ~lc))
+                right.append(np.where(rc >= 0, offset + rc, leaf_base + ~rc))
+                default_left.append((dt & 2) > 0)
+                missing_type.append((dt >> 2) & 3)
+                value.append(np.zeros(n_inner))
+                depth = max(depth, self._depth(lc, rc))
+                parsed.append((lc, rc, feature[-1], threshold[-1], leaf_values))
+            else:
+                parsed.append((None, None, None, None, leaf_values))
+
+            # Leaves loop to themselves so extra steps are no-ops
+            leaf_ids = leaf_base + np.arange(n_leaves)
+            feature.append(np.zeros(n_leaves, dtype=np.int64))
+            threshold.append(np.full(n_leaves, np.inf))
+            left.append(leaf_ids)
+            right.append(leaf_ids)
+            default_left.append(np.ones(n_leaves, dtype=bool))
+            missing_type.append(np.zeros(n_leaves, dtype=np.int64))
+            value.append(leaf_values)
+            offset = leaf_base + n_leaves
+
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.default_left = np.concatenate(default_left)
+        self.missing_type = np.concatenate(missing_type).astype(np.int8)
+        self.value = np.concatenate(value)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.max_depth = depth
+        self.has_missing_splits = bool((self.missing_type != 0).any())
+
+        self.bitvector = None
+        if not self.has_missing_splits and all(len(t[4]) <= 64 for t in parsed):
+            self.bitvector = self._build_bitvector(parsed)
+
+    @staticmethod
+    def _depth(lc: np.ndarray, rc: np.ndarray) -> int:
+        """Depth (number of splits on the longest root-to-leaf path)."""
+        best, stack = 0, [(0, 1)]
+        while stack:
+            node, d = stack.pop()
+            best = max(best, d)
+            for child in (lc[node], rc[node]):
+                if child >= 0:
+                    stack.append((child, d + 1))
+        return best
+
+    @staticmethod
+    def _leaf_order(lc: np.ndarray, rc: np.ndarray):
+        """
+        Left-to-right rank of every leaf, and for every internal node the
+        bitmask of leaf ranks in its left subtree.
+        """
+        n_inner = len(lc)
+        rank = np.zeros(n_inner + 1, dtype=np.int64)
+        left_mask = np.zeros(n_inner, dtype=np.uint64)
+        span = {}  # node -> (first leaf rank, last leaf rank + 1)
+        counter = 0
+        # Iterative post-order walk, visiting left before right
+        stack = [(0, False)]
+        while stack:
+            node, done = stack.pop()
+            if node < 0:
+                rank[~node] = counter
+                span[node] = (counter, counter + 1)
+                counter += 1
+                continue
+            if not done:
+                stack.append((node, True))
+                stack.append((rc[node], False))
+                stack.append((lc[node], False))
+                continue
+            lo, hi = span[lc[node]]
+            left_mask[node] = np.uint64(((1 << (hi - lo)) - 1) << lo)
+            span[node] = (lo, span[rc[node]][1])
+        return rank, left_mask
+
+    def _build_bitvector(self, parsed) -> dict:
+        n_trees = len(parsed)
+        all_ones = np.uint64(0xFFFFFFFFFFFFFFFF)
+        leaf_table = np.zeros((n_trees, 64), dtype=np.float64)
+        per_feature = {f: ([], [], []) for f in range(self.num_features)}  # thresholds, trees, masks
+
+        for t, (lc, rc, feat, thr, leaf_values) in enumerate(parsed):
+            if lc is None:
+                leaf_table[t, 0] = leaf_values[0]
+                continue
+            rank, left_mask = self._leaf_order(lc, rc)
+            leaf_table[t, rank] = leaf_values
+            for node in range(len(lc)):
+                ths, trees, masks = per_feature[int(feat[node])]
+                ths.append(thr[node])
+                trees.append(t)
+                masks.append(~left_mask[node])
+
+        features = []
+        for f, (ths, trees, masks) in per_feature.items():
+            if not ths:
+                continue
+            order = np.argsort(np.array(ths), kind="stable")
+            ths = np.array(ths)[order]
+            trees = np.array(trees)[order]
+            masks = np.array(masks, dtype=np.uint64)[order]
+            # table[k, t] = AND of masks of the first k splits (by threshold) in tree t
+            table = np.full((len(ths) + 1, n_trees), all_ones, dtype=np.uint64)
+            for k in range(len(ths)):
+                table[k + 1] = table[k]
+                table[k + 1, trees[k]] &= masks[k]
+            features.append((f, ths, table))
+
+        return {"features": features, "leaf_table": leaf_table, "all_ones": all_ones}
+
+    def _raw_bitvector(self, X: np.ndarray) -> np.ndarray:
+        bv = self.bitvector
+        X = np.nan_to_num(X, nan=0.0)  # missing_type None: NaN behaves like 0.0
+        alive = np.full((len(X), self.num_trees), bv["all_ones"], dtype=np.uint64)
+        for f, ths, table in bv["features"]:
+            # splits with threshold < x go right (x > threshold): their left leaves die
+            alive &= table.take(np.searchsorted(ths, X[:, f], side="left"), axis=0)
+        lowest = alive & (~alive + np.uint64(1))
+        leaf = np.log2(lowest.astype(np.float64)).astype(np.intp)
+        raw = bv["leaf_table"][np.arange(self.num_trees), leaf].sum(axis=1)
+        if self.average_output:
+            raw /= self.num_trees
+        return raw
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "CompiledTreeModel":
+        return cls(Path(path).read_text())
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    def _raw_block(self, X: np.ndarray) -> np.ndarray:
+        if self.bitvector is not None:
+            return self._raw_bitvector(X)
+
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            mt = self.missing_type[node]
+            nan = np.isnan(x)
+            x = np.where(nan & (mt != _MISSING_NAN), 0.0, x)
+            missing = ((mt == _MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD)) | ((mt == _MISSING_NAN) & nan)
+            go_left = np.where(missing, self.default_left[node], x <= self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self._finish(node)
+
+    def _finish(self, node: np.ndarray) -> np.ndarray:
+        raw = self.value.take(node).sum(axis=1)
+        if self.average_output:
+            raw /= self.num_trees
+        return raw
+
+    def predict(self, X, raw_score: bool = False) -> np.ndarray:
+        """
+        Score a [N, num_features] float32/float64 matrix.
+        Returns probabilities for binary models (raw margins if raw_score).
+        """
+        X = np.asarray(X)
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+        if X.ndim != 2 or X.shape[1] < self.num_features:
+            raise ValueError(f"Expected [N, {self.num_features}] features, got {X.shape}")
+
+        raw = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), PREDICT_BLOCK_ROWS):
+            block = X[start:start + PREDICT_BLOCK_ROWS].astype(np.float64, copy=False)
+            raw[start:start + PREDICT_BLOCK_ROWS] = self._raw_block(block)
+
+        if raw_score or self.objective != "binary":
+            return raw
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * raw))
@@ -0,0 +1,149 @@
+"""Concurrent readers and writers: no exceptions, and readers never see a half-applied change."""
+
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Scripts"))
+
+from Interaction_Store import COMPACT_MIN, InteractionStore
+from Read_Write_Lock import ReadWriteLock
+
+SECONDS = 2.0
+
+
+def run_threads(readers, writer, n_readers=4, seconds=SECONDS):
+    """Loop n_readers reader(rng) threads and one writer() thread for `seconds`; returns the exceptions raised."""
+    stop, errors = threading.Event(), []
+
+    def guarded(fn, *args):
+        try:
+            while not stop.is_set():
+                fn(*args)
+        except Exception as e:  # reported below; stop the other threads too
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=guarded, args=(readers, np.random.default_rng(i))) for i in range(n_readers)]
+    threads.append(threading.Thread(target=guarded, args=(writer,)))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def test_readers_never_see_a_write_in_progress():
+    lock = ReadWriteLock()
+    state = {"a": 0, "b": 0}
+    reads = []
+
+    def reader(rng):
+        with lock.read():
+            a = state["a"]
+            time.sleep(0.0001)
+            assert state["b"] == a
+        reads.append(a)
+
+    def writer():
+        with lock.write():
+            state["a"] += 1
+            time.sleep(0.0001)
+            state["b"] = state["a"]
+        time.sleep(0.001)
+
+    assert run_threads(reader, writer) == []
+    assert reads and state["a"] > 10  # both sides made progress
+    assert lock.stats()["active_readers"] == 0
+
+
+def test_interaction_reads_are_stable_while_other_rows_are_edited():
+    rng = np.random.default_rng(0)
+    keys, values = rng.integers(0, 100, 20000), rng.integers(0, 1000, 20000)
+    store = InteractionStore.from_pairs(keys, values)
+    candidate_ids = np.arange(1000, dtype=np.int64)
+    stable = list(range(50))  # rows only readers touch
+    expected = store.exclusion_masks(stable, candidate_ids)
+    edits = iter(range(10 ** 9))
+
+    def reader(rng):
+        k = int(rng.integers(0, len(stable)))
+        assert np.array_equal(store.exclusion_mask(stable[k], candidate_ids), expected[k])
+        assert np.array_equal(store.exclusion_masks(stable, candidate_ids), expected)
+
+    def writer():
+        i = next(edits)
+        key, value = 50 + i % 50, i % 1000
+        store.add(key, value) if i % 3 else store.discard(key, value)
+
+    assert run_threads(reader, writer) == []
+    assert next(edits) > COMPACT_MIN  # the overlay was merged back at least once
+    assert np.array_equal(store.exclusion_masks(stable, candidate_ids), expected)
+
+
+def test_engine_serves_consistent_results_under_writes(tmp_path):
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    import Model_Reccomendation as mr
+    from Changelog_Sync import ChangeSet
+
+    db = tmp_path / "invest.sqlite"
+    shutil.copy(ROOT / "Data" / "invest.sqlite", db)
+    engine = mr.RecommendationEngine(db_path=db)
+    engine.load()
+    conn = sqlite3.connect(db, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+
+    investor_ids, company_ids = sorted(engine.investors), sorted(engine.companies)
+    # Readers ask for one half of the requesters, the writer swipes for the other
+    read_investors, write_investors = investor_ids[::2], investor_ids[1::2]
+    read_companies = company_ids[::2]
+    baseline = {
+        ("investor", i): engine.recommend_for_investor(i) for i in read_investors[:20]
+    } | {
+        ("company", c): engine.recommend_for_company(c) for c in read_companies[:20]
+    }
+    temp_uid, temp_cid = max(investor_ids) + 1_000_000, max(company_ids) + 1_000_000
+    writes = iter(range(10 ** 9))
+
+    def reader(rng):
+        side, rid = list(baseline)[int(rng.integers(0, len(baseline)))]
+        recs = engine.recommend_for_investor(rid) if side == "investor" else engine.recommend_for_company(rid)
+        assert len({pid for pid, _, _ in recs}) == len(recs)
+
+    def writer():
+        i = next(writes)
+        uid, cid = write_investors[i % len(write_investors)], company_ids[i % len(company_ids)]
+        inv = conn.execute("SELECT * FROM user_info WHERE user_id = ?", (uid,)).fetchone()
+        comp = conn.execute("SELECT * FROM company_info WHERE company_id = ?", (cid,)).fetchone()
+        # Re-apply unchanged profiles and add/remove a temporary pair, so the
+        # column arrays and index lists grow and shrink under the readers
+        temp = engine.investors.get(temp_uid) is None
+        engine.apply_changes(ChangeSet(
+            last_id=0,
+            investors={uid: inv, temp_uid: dict(inv, user_id=temp_uid) if temp else None},
+            companies={cid: comp, temp_cid: dict(comp, company_id=temp_cid) if temp else None},
+        ))
+        if not engine.user_interactions.has(uid, cid):
+            engine.record_interaction("investor", uid, cid, True)
+            engine.record_interaction("investor", uid, cid, False)
+        time.sleep(0.005)
+
+    assert run_threads(reader, writer, n_readers=8) == []
+    assert next(writes) > 10
+
+    # Once the temporary profiles are gone again, every reader's results are as before
+    if engine.investors.get(temp_uid) is not None:
+        engine.apply_changes(ChangeSet(last_id=0, investors={temp_uid: None}, companies={temp_cid: None}))
+    for (side, rid), recs in baseline.items():
+        again = engine.recommend_for_investor(rid) if side == "investor" else engine.recommend_for_company(rid)
+        assert again == recs
@@ -0,0 +1,41 @@
+"""Optimized encoder backends against the float32 eager reference."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+import Model_Reccomendation as mr
+
+TEXTS = 64
+MIN_COSINE = 0.99  # per text, against the eager embedding
+
+
+@pytest.fixture(scope="module")
+def reference():
+    texts = [c.desc for c in mr.load_companies_from_csv(mr.COMPANY_CSV).values()][:TEXTS]
+    return texts, mr.encode_texts(texts, backend="eager")
+
+
+@pytest.mark.parametrize("backend", [b for b in mr.ENCODER_BACKENDS if b != "eager"])
+def test_backend_matches_eager(backend, reference):
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+    texts, expected = reference
+
+    emb = mr.encode_texts(texts, backend=backend)
+    single = mr.encode_text(texts[0], backend=backend)
+
+    assert emb.shape == expected.shape
+    assert torch.allclose(emb.norm(dim=1), torch.ones(len(texts)), atol=1e-4)
+    assert (emb * expected).sum(dim=1).min().item() >= MIN_COSINE
+    assert torch.dot(single, expected[0]).item() >= MIN_COSINE
+
+
+def test_encoder_id_separates_backends():
+    assert len({mr.encoder_id(b) for b in mr.ENCODER_BACKENDS}) == len(mr.ENCODER_BACKENDS)
@@ -0,0 +1,98 @@
+"""Gumbel-top-k draws against the exact sequential-without-replacement (Plackett-Luce) distribution."""
+
+import sys
+from functools import lru_cache
+from itertools import permutations
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+
+from Gumbel_Sampler import gumbel_top_k, requester_seed, sample_pages
+
+P = np.array([0.95, 0.6, 0.45, 0.3, 0.2, 0.1, 0.05, 0.01])
+K = 3
+DRAWS = 20000
+ALPHA = 1e-3  # the draws are seeded, so a pass/fail never changes between runs
+
+
+def ordered_draw_probs(p, k):
+    """Exact probability of every ordered k-draw without replacement (proportional to p)."""
+    out = {}
+    for draw in permutations(range(len(p)), k):
+        prob, left = 1.0, p.sum()
+        for i in draw:
+            prob *= p[i] / left
+            left -= p[i]
+        out[draw] = prob
+    return out
+
+
+@lru_cache(maxsize=None)
+def sample_counts(make_draw, temperature):
+    """(observed, expected) counts of every ordered draw; shared by both tests of a sampler."""
+    draw = make_draw()
+    exact = ordered_draw_probs(P ** (1.0 / temperature), K)
+    outcomes = list(exact)
+    index = {o: j for j, o in enumerate(outcomes)}
+    counts = np.zeros(len(outcomes))
+    for i in range(DRAWS):
+        counts[index[tuple(int(x) for x in draw(i, temperature))]] += 1
+    return counts, np.array([exact[o] for o in outcomes]) * DRAWS
+
+
+def generator_draw():
+    rng = np.random.default_rng(0)
+    return lambda i, T: gumbel_top_k(P, K, T, rng=rng)
+
+
+def hashed_draw():
+    ids = np.arange(len(P))
+    return lambda i, T: gumbel_top_k(P, K, T, ids=ids, seed=requester_seed("investor", i))
+
+
+SAMPLERS = [
+    pytest.param(generator_draw, 1.0, id="generator"),
+    pytest.param(hashed_draw, 1.0, id="hashed"),
+    pytest.param(hashed_draw, 0.5, id="hashed-T0.5"),
+    pytest.param(hashed_draw, 2.0, id="hashed-T2"),
+]
+
+
+@pytest.mark.parametrize("make_draw,temperature", SAMPLERS)
+def test_draw_frequencies_match_exact_probabilities(make_draw, temperature):
+    counts, expected = sample_counts(make_draw, temperature)
+
+    # ~5 standard deviations of the most likely outcome's frequency
+    assert np.abs(counts - expected).max() / DRAWS < 0.015
+
+
+@pytest.mark.parametrize("make_draw,temperature", SAMPLERS)
+def test_draws_pass_chi_square(make_draw, temperature):
+    chisquare = pytest.importorskip("scipy.stats").chisquare
+    counts, expected = sample_counts(make_draw, temperature)
+
+    # Pool sparse outcomes so every cell expects >= 5 draws
+    sparse = expected < 5
+    obs = np.append(counts[~sparse], counts[sparse].sum())
+    exp = np.append(expected[~sparse], expected[sparse].sum())
+    assert chisquare(obs, exp).pvalue >= ALPHA
+
+
+def test_hashed_order_is_stable_across_pools_and_pages():
+    rng = np.random.default_rng(4)
+    probs = rng.uniform(0.01, 0.99, 1000)
+    ids = rng.permutation(5000)[:1000]
+    seed = requester_seed("company", 12)
+
+    order = gumbel_top_k(probs, 1000, ids=ids, seed=seed)
+    pages = sample_pages(probs, 10, [0, 3, 1], ids=ids, seed=seed)
+    assert [p.tolist() for p in pages] == [order[0:10].tolist(), order[30:40].tolist(), order[10:20].tolist()]
+
+    # A candidate keeps its key when others are removed: the order over a subset is the restricted order
+    keep = np.sort(rng.choice(1000, 300, replace=False))
+    sub = gumbel_top_k(probs[keep], 300, ids=ids[keep], seed=seed)
+    kept = set(ids[keep].tolist())
+    assert ids[keep][sub].tolist() == [pid for pid in ids[order].tolist() if pid in kept]
@@ -0,0 +1,70 @@
+"""CSR interaction store against the set-per-requester baseline it replaced."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+
+from Interaction_Store import InteractionStore
+
+REQUESTERS = 200
+CANDIDATES = 500
+
+
+def random_pairs(seed, n=5000):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, REQUESTERS, n), rng.integers(0, CANDIDATES, n)
+
+
+def as_sets(keys, values):
+    rows = {}
+    for k, v in zip(keys.tolist(), values.tolist()):
+        rows.setdefault(k, set()).add(v)
+    return rows
+
+
+def set_masks(rows, requesters, candidate_ids):
+    return np.stack([np.isin(candidate_ids, list(rows.get(k, ()))) for k in requesters])
+
+
+def assert_same_masks(store, rows, candidate_ids):
+    requesters = list(range(-1, REQUESTERS + 1))  # includes requesters without interactions
+    expected = set_masks(rows, requesters, candidate_ids)
+    assert np.array_equal(np.stack([store.exclusion_mask(k, candidate_ids) for k in requesters]), expected)
+    assert np.array_equal(store.exclusion_masks(requesters, candidate_ids), expected)
+    assert len(store) == sum(len(r) for r in rows.values())
+
+
+def test_masks_match_sets():
+    keys, values = random_pairs(0)
+    rows = as_sets(keys, values)
+    # Unsorted, with ids nobody interacted with and ids outside the interaction range
+    candidate_ids = np.random.default_rng(1).permutation(CANDIDATES + 50).astype(np.int64)
+
+    assert_same_masks(InteractionStore.from_pairs(keys, values), rows, candidate_ids)
+    assert_same_masks(InteractionStore.from_dict(rows), rows, candidate_ids)
+
+
+def test_masks_match_sets_after_edits_and_compaction():
+    keys, values = random_pairs(2)
+    rows = as_sets(keys, values)
+    store = InteractionStore.from_pairs(keys, values)
+    candidate_ids = np.arange(CANDIDATES, dtype=np.int64)
+    rng = np.random.default_rng(3)
+
+    for _ in range(2000):
+        k, v = int(rng.integers(0, REQUESTERS + 20)), int(rng.integers(0, CANDIDATES))
+        if rng.random() < 0.7:
+            store.add(k, v)
+            rows.setdefault(k, set()).add(v)
+        else:
+            store.discard(k, v)
+            rows.get(k, set()).discard(v)
+        assert store.has(k, v) == (v in rows.get(k, ()))
+    assert_same_masks(store, rows, candidate_ids)
+
+    store.compact()
+    assert_same_masks(store, rows, candidate_ids)
+    assert store.to_dict() == {k: r for k, r in rows.items() if r}
@@ -0,0 +1,90 @@
+"""Live profile updates on columns mapped read-only from an engine snapshot."""
+
+import sqlite3
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+
+from Engine_Snapshot import open_snapshot, write_snapshot
+from Make_Database import DB_COMPANY_INFO, DB_USER_INFO, DDL_CHANGELOG, DDL_CORE
+from Profile_Columns import build_profile_columns, columns_from_arrays, columns_to_arrays, upsert_profiles
+from Profile_Loader import read_snapshot
+
+
+def add_investor(conn, uid, industry="Fintech", stages="Seed", places="USA", check_min="$100k", check_max="$1M"):
+    conn.execute(
+        f"INSERT OR REPLACE INTO {DB_USER_INFO} (user_id, U_name, U_invest_requirements, U_industry, "
+        "U_fund_stage, U_places, U_check_size_min, U_check_size_max) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (uid, f"Investor {uid}", "", industry, stages, places, check_min, check_max),
+    )
+
+
+def add_company(conn, cid, industry="Fintech", stage="Seed", place="USA", fund_size="$500k"):
+    conn.execute(
+        f"INSERT OR REPLACE INTO {DB_COMPANY_INFO} (company_id, C_name, C_desc, C_industry, "
+        "C_funding_stage, C_place, C_fund_size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (cid, f"Company {cid}", "", industry, stage, place, fund_size),
+    )
+
+
+def load_profiles(conn):
+    """{id: profile} per side, read with Profile_Loader (fields as in load_profiles_from_db)."""
+    conn.commit()
+    inv, comp, _, _, _ = read_snapshot(conn, interactions=False)
+    Investor, Company = namedtuple("Investor", inv), namedtuple("Company", comp)
+    investors = {row[0]: Investor(*row) for row in zip(*inv.values())}
+    companies = {row[0]: Company(*row) for row in zip(*comp.values())}
+    return investors, companies
+
+
+def database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "invest.sqlite")
+    conn.executescript(DDL_CORE + DDL_CHANGELOG)
+    for pid in (1, 2):
+        add_investor(conn, pid)
+        add_company(conn, pid)
+    return conn
+
+
+def mapped_columns(tmp_path, conn):
+    cols = build_profile_columns(*load_profiles(conn))
+    arrays, vocabs = columns_to_arrays(cols)
+    write_snapshot(tmp_path / "engine.snapshot", {f"cols.{k}": v for k, v in arrays.items()}, {})
+    snap = open_snapshot(tmp_path / "engine.snapshot")
+    mapped = columns_from_arrays(snap.arrays("cols."), vocabs)
+    assert not mapped.investors.ids.flags.writeable
+    return mapped
+
+
+def test_upsert_new_ids_into_snapshot_columns(tmp_path):
+    conn = database(tmp_path)
+    cols = mapped_columns(tmp_path, conn)
+    add_investor(conn, 3, industry="Health")
+    add_company(conn, 3, place="UK")
+    investors, companies = load_profiles(conn)
+
+    upsert_profiles(cols, investors=[investors[3]], companies=[companies[3]])
+
+    assert cols.investors.ids.tolist() == [1, 2, 3]
+    assert cols.companies.ids.tolist() == [1, 2, 3]
+    assert cols.investor_row[3] == 2 and cols.company_row[3] == 2
+    assert cols.companies.place[2] == cols.places.codes["UK"]
+    assert cols.investors.industry_count[2] == 1
+
+
+def test_upsert_existing_and_new_ids_into_snapshot_columns(tmp_path):
+    conn = database(tmp_path)
+    cols = mapped_columns(tmp_path, conn)
+    add_company(conn, 2, fund_size="$9M")
+    add_company(conn, 4, industry="AI, Fintech", fund_size="")
+    _, companies = load_profiles(conn)
+
+    upsert_profiles(cols, companies=[companies[2], companies[4]])
+
+    assert cols.companies.ids.tolist() == [1, 2, 4]
+    assert np.allclose(cols.companies.fund_size, [5e5, 9e6, np.nan], equal_nan=True)
+    assert cols.companies.industry_count[2] == 2
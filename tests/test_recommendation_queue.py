@@ -0,0 +1,138 @@
+"""Per-requester recommendation queues over cursor sessions."""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Scripts"))
+
+from Cursor_Store import CursorError, CursorStore
+from Recommendation_Queue import RecommendationQueues
+
+OWNER = ("investor", 7, False)
+
+
+class Ranking:
+    """fill_fn over a fixed draw order of candidate ids; records the depths asked for."""
+
+    def __init__(self, n):
+        self.order = [(cid, f"c{cid}", 1.0 / cid) for cid in range(1, n + 1)]
+        self.depths = []
+        self.filled = threading.Event()
+
+    def __call__(self, owner, depth):
+        self.depths.append(depth)
+        self.filled.set()
+        return self.order[:depth]
+
+
+def keep_all(items):
+    return items
+
+
+def ids(page):
+    return [item[0] for item in page]
+
+
+def test_pages_pop_in_order_and_fill_on_demand():
+    ranking = Ranking(50)
+    queues = RecommendationQueues(ranking, fill_size=10, low_watermark=0, max_depth=30)
+    cursor = queues.start(OWNER, ranking.order[:5], offset=5)
+
+    seen = []
+    while cursor is not None:
+        page, cursor = queues.pop(cursor, OWNER, 5, keep_all)
+        seen.extend(ids(page))
+
+    assert seen == list(range(6, 31))  # stops at max_depth
+    assert ranking.depths == [15, 25, 30]
+
+
+def test_queue_completes_when_candidates_run_out():
+    ranking = Ranking(8)
+    queues = RecommendationQueues(ranking, fill_size=10, low_watermark=0)
+    cursor = queues.start(OWNER, ranking.order[:5], offset=5)
+
+    page, cursor = queues.pop(cursor, OWNER, 5, keep_all)
+
+    assert ids(page) == [6, 7, 8] and cursor is None
+
+
+def test_same_cursor_returns_same_page():
+    ranking = Ranking(40)
+    queues = RecommendationQueues(ranking, low_watermark=0)
+    cursor = queues.start(OWNER, ranking.order[:20])
+
+    first = queues.pop(cursor, OWNER, 5, keep_all)
+    again = queues.pop(cursor, OWNER, 5, keep_all)
+
+    assert first == again
+
+
+def test_skipped_items_do_not_shorten_the_page():
+    ranking = Ranking(40)
+    queues = RecommendationQueues(ranking, low_watermark=0)
+    cursor = queues.start(OWNER, ranking.order[:20])
+    swiped = {2, 3}
+
+    page, _ = queues.pop(cursor, OWNER, 5, lambda items: [i for i in items if i[0] not in swiped])
+
+    assert ids(page) == [1, 4, 5, 6, 7]
+
+
+def test_low_queue_is_refilled_in_the_background():
+    ranking = Ranking(100)
+    queues = RecommendationQueues(ranking, fill_size=20, low_watermark=5)
+    cursor = queues.start(OWNER, ranking.order[:8])
+
+    page, cursor = queues.pop(cursor, OWNER, 5, keep_all)
+
+    assert ranking.filled.wait(5)
+    for _ in range(100):  # the refill appends right after fill_fn returns
+        if queues.stats()["refills"]:
+            break
+        threading.Event().wait(0.01)
+    assert queues.stats()["refills"] == 1
+    page, _ = queues.pop(cursor, OWNER, 10, keep_all)
+    assert ids(page) == list(range(6, 16))
+    assert queues.stats()["misses"] == 0
+
+
+def test_invalidate_drops_the_cursor():
+    ranking = Ranking(40)
+    queues = RecommendationQueues(ranking, low_watermark=0)
+    cursor = queues.start(OWNER, ranking.order[:20])
+
+    queues.invalidate("investor", 7)
+
+    with pytest.raises(CursorError):
+        queues.pop(cursor, OWNER, 5, keep_all)
+
+
+def test_one_queue_per_requester_and_foreign_cursors_rejected():
+    ranking = Ranking(40)
+    queues = RecommendationQueues(ranking, low_watermark=0)
+    old = queues.start(OWNER, ranking.order[:20])
+    new = queues.start(OWNER, ranking.order[:20])
+
+    with pytest.raises(CursorError):
+        queues.pop(old, OWNER, 5, keep_all)
+    with pytest.raises(CursorError):
+        queues.pop(new, ("investor", 8, False), 5, keep_all)
+    assert queues.stats()["sessions"] == 1
+
+
+def test_item_cap_evicts_least_recently_read():
+    sessions = CursorStore(max_items=25)
+    queues = RecommendationQueues(Ranking(40), sessions, low_watermark=0)
+    items = Ranking(10).order
+    first = queues.start(("investor", 1, False), items)
+    queues.start(("investor", 2, False), items)
+    queues.pop(first, ("investor", 1, False), 1, keep_all)  # 1 is now the most recently read
+    queues.start(("investor", 3, False), items)
+
+    stats = sessions.stats()
+    assert stats["sessions"] == 2 and stats["items"] == 20 and stats["evictions"] == 1
+    queues.pop(first, ("investor", 1, False), 1, keep_all)